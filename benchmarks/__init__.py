@@ -0,0 +1 @@
+"""Benchmarks del simulador. Se ejecutan con ``python -m benchmarks.<modulo>``."""
@@ -0,0 +1,123 @@
+"""Compara la erosión vectorizada con bucles celda a celda.
+
+Uso: ``python -m benchmarks.bench_erosion``
+
+Primero comprueba en rejillas pequeñas que la versión vectorizada, con el
+mismo ruido, da las mismas alturas que un bucle escalar que lee siempre el
+estado del principio del paso (orden de Jacobi, como ``erode_padded``); si
+la diferencia pasa de ``TOLERANCE`` termina con código de error. También
+informa de la distancia al bucle original (``apply_erosion_scalar``), que
+lee celdas ya modificadas en el mismo paso: ese cambio de orden es
+intencionado (ver ``tectonics.erosion``) y la diferencia crece con la
+rejilla. Después mide el tiempo por paso. Las mismas comprobaciones están
+en ``tests/test_erosion.py``.
+"""
+import sys
+import time
+
+import numpy as np
+
+from tectonics.erosion import NEIGHBOURS, apply_erosion, erode_padded
+from tectonics.perlin import noise_grid
+
+RATE = 0.01
+SIZES = [(300, 400), (600, 800), (2048, 2048)]
+TOLERANCE = 1e-4  # Redondeo de float32 frente a float64 con alturas de hasta ~40
+
+
+def sample_terrain(rows, cols):
+    return noise_grid(rows, cols, 25.0, octaves=6, persistence=0.5, lacunarity=2.0) * 10
+
+
+def apply_erosion_scalar(terrain, rate, noise):
+    """Bucle celda a celda original, con el ruido dado, para comparar resultados."""
+    rows, cols = len(terrain), len(terrain[0])
+    for y in range(rows):
+        for x in range(cols):
+            if terrain[y][x] > 0:
+                terrain[y][x] -= rate * noise[y][x]
+                for dy, dx in NEIGHBOURS:
+                    ny, nx = y + dy, x + dx
+                    if 0 <= ny < rows and 0 <= nx < cols:
+                        height_diff = terrain[y][x] - terrain[ny][nx]
+                        if height_diff > 1:
+                            terrain[y][x] -= height_diff * rate
+                            terrain[ny][nx] += height_diff * rate * 0.5
+    return terrain
+
+
+def erosion_jacobi_scalar(terrain, rate, noise):
+    """Bucle celda a celda con la regla de ``erode_padded``: todo se lee del estado inicial."""
+    rows, cols = len(terrain), len(terrain[0])
+    lowered = [[h - rate * noise[y][x] if h > 0 else h for x, h in enumerate(row)]
+               for y, row in enumerate(terrain)]
+    result = [row[:] for row in lowered]
+    for y in range(rows):
+        for x in range(cols):
+            for dy, dx in NEIGHBOURS:
+                ny, nx = y + dy, x + dx
+                if 0 <= ny < rows and 0 <= nx < cols:
+                    height_diff = lowered[y][x] - lowered[ny][nx]
+                    if height_diff > 1 and terrain[y][x] > 0:
+                        result[y][x] -= height_diff * rate
+                        result[ny][nx] += height_diff * rate * 0.5
+    return result
+
+
+def compare(rows, cols, seed=0):
+    """Máxima diferencia tras un paso con el mismo ruido: ``(frente a Jacobi, frente al original)``."""
+    # Terreno abrupto para que haya muchas pendientes mayores que 1
+    heights = sample_terrain(rows, cols) * 4
+    noise = np.random.default_rng(seed).random((rows, cols), dtype=np.float32)
+    result = erode_padded(np.pad(heights, 1, constant_values=np.nan), np.pad(noise, 1), RATE)
+    start = heights.astype(np.float64).tolist()
+    jacobi = erosion_jacobi_scalar(start, RATE, noise.tolist())
+    original = apply_erosion_scalar(start, RATE, noise.tolist())
+    return (float(np.abs(result - np.array(jacobi)).max()),
+            float(np.abs(result - np.array(original)).max()))
+
+
+def time_step(step, terrain, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        step(terrain)
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    failed = False
+    for rows, cols in [(8, 8), (16, 24), (32, 32)]:
+        jacobi, original = compare(rows, cols)
+        ok = jacobi <= TOLERANCE
+        failed |= not ok
+        print(f"{cols}x{rows}: diferencia máxima {jacobi:.2e} con el bucle de Jacobi "
+              f"({'ok' if ok else f'supera {TOLERANCE:.0e}'}), {original:.2e} con el original "
+              f"(rate={RATE})")
+    if failed:
+        print("La erosión vectorizada no coincide con la referencia escalar")
+        return 1
+
+    # El mismo generador da el mismo resultado
+    a = sample_terrain(64, 64)
+    b = a.copy()
+    apply_erosion(a, RATE, rng=7)
+    apply_erosion(b, RATE, rng=7)
+    print(f"Semilla fija reproducible: {np.array_equal(a, b)}")
+
+    print(f"{'rejilla':>12} {'bucle (ms)':>12} {'vectorizado (ms)':>17} {'aceleración':>12}")
+    rng = np.random.default_rng(0)
+    for rows, cols in SIZES:
+        heights = sample_terrain(rows, cols)
+        vec = time_step(lambda h: apply_erosion(h, RATE, rng), heights.copy(), 5)
+        if rows * cols <= 300 * 400:
+            noise = rng.random((rows, cols)).tolist()
+            scalar = time_step(lambda t: apply_erosion_scalar(t, RATE, noise),
+                               heights.astype(np.float64).tolist(), 1)
+            print(f"{cols:>5}x{rows:<6} {scalar * 1000:>12.1f} {vec * 1000:>17.2f} {scalar / vec:>11.1f}x")
+        else:
+            print(f"{cols:>5}x{rows:<6} {'-':>12} {vec * 1000:>17.2f} {'-':>12}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Escalado del ruido y de la erosión por bandas con 1..N procesos.
+
+Uso: ``python -m benchmarks.bench_parallel [--size 8192x8192] [--max-workers N] [--kernel erosion]``
+
+Compara ``noise_grid`` y ``erosion.apply_erosion`` en un solo proceso contra
+``parallel_noise_grid`` y ``ParallelErosion`` con 1, 2, 4... procesos y
+comprueba que el resultado es idéntico (sin costuras entre bandas).
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from tectonics import erosion
+from tectonics.headless import parse_size
+from tectonics.parallel import ParallelErosion, parallel_noise_grid
+from tectonics.perlin import noise_grid
+from tectonics.terrain import Terrain
+
+NOISE_PARAMS = dict(octaves=6, persistence=0.5, lacunarity=2.0)
+SCALE = 100.0
+EROSION_RATE = 0.01
+
+
+def worker_counts(max_workers):
+    """1, 2, 4, ... hasta ``max_workers`` (incluido)."""
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def best_time(function, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def check_seams(rows=1000, cols=300, workers=4):
+    """Diferencia máxima entre la versión por bandas y la secuencial."""
+    expected = noise_grid(rows, cols, SCALE, **NOISE_PARAMS)
+    bands = parallel_noise_grid(rows, cols, SCALE, workers=workers, bands=7, **NOISE_PARAMS)
+    return float(np.abs(bands - expected).max())
+
+
+def check_erosion(rows=301, cols=203, workers=4, steps=3):
+    """Diferencia máxima entre la erosión por bandas y la secuencial tras unos pasos."""
+    expected = noise_grid(rows, cols, SCALE / 10, **NOISE_PARAMS) * 10
+    heights = expected.copy()
+    serial_rng, bands_rng = np.random.default_rng(1), np.random.default_rng(1)
+    with ParallelErosion((rows, cols), workers) as backend:
+        for _ in range(steps):
+            erosion.apply_erosion(expected, EROSION_RATE, serial_rng)
+            backend.apply(heights, EROSION_RATE, bands_rng)
+    return float(np.abs(heights - expected).max())
+
+
+def print_row(label, elapsed, serial, cells):
+    print(f"{label:>9} {elapsed:>11.3f} {cells / elapsed / 1e6:>10.1f} {serial / elapsed:>11.2f}x")
+
+
+def bench_noise(rows, cols, counts, repeats):
+    print(f"Ruido: diferencia máxima entre bandas y secuencial: {check_seams():.2e}")
+    serial = best_time(lambda: noise_grid(rows, cols, SCALE, **NOISE_PARAMS), repeats)
+    print(f"{'procesos':>9} {'tiempo (s)':>11} {'Mceldas/s':>10} {'aceleración':>12}")
+    print_row('secuen.', serial, serial, rows * cols)
+    for workers in counts:
+        elapsed = best_time(lambda: parallel_noise_grid(rows, cols, SCALE, workers=workers, **NOISE_PARAMS),
+                            repeats)
+        print_row(workers, elapsed, serial, rows * cols)
+
+
+def bench_erosion(rows, cols, counts, repeats):
+    print(f"Erosión: diferencia máxima entre bandas y secuencial: {check_erosion():.2e}")
+    heights = noise_grid(rows, cols, SCALE, **NOISE_PARAMS) * 10
+    serial = best_time(lambda: erosion.apply_erosion(heights, EROSION_RATE), repeats)
+    print(f"{'procesos':>9} {'tiempo (s)':>11} {'Mceldas/s':>10} {'aceleración':>12}")
+    print_row('secuen.', serial, serial, rows * cols)
+    for workers in counts:
+        terrain = Terrain(heights)  # Un Terrain pasa a la memoria compartida sin copias por paso
+        with ParallelErosion((rows, cols), workers) as backend:
+            backend.apply(terrain, EROSION_RATE)  # Arranca los procesos antes de medir
+            elapsed = best_time(lambda: backend.apply(terrain, EROSION_RATE), repeats)
+        print_row(workers, elapsed, serial, rows * cols)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=parse_size, default=(4096, 4096), metavar='ANCHOxALTO',
+                        help='tamaño de la rejilla (por defecto 4096x4096)')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--repeats', type=int, default=1)
+    parser.add_argument('--kernel', choices=('noise', 'erosion'), action='append',
+                        help='qué medir (por defecto ambos)')
+    args = parser.parse_args()
+    rows, cols = args.size
+    counts = worker_counts(args.max_workers)
+    print(f"rejilla {cols}x{rows}, {os.cpu_count()} núcleos")
+    for kernel in args.kernel or ('noise', 'erosion'):
+        (bench_noise if kernel == 'noise' else bench_erosion)(rows, cols, counts, args.repeats)
+
+
+if __name__ == '__main__':
+    main()
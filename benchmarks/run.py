@@ -0,0 +1,349 @@
+"""Batería de benchmarks de generación, simulación y renderizado.
+
+Uso::
+
+    python -m benchmarks.run                      # todos los casos, JSON por stdout
+    python -m benchmarks.run --quick --out r.json # solo la rejilla más pequeña
+    python -m benchmarks.run --only jordan2.apply_erosion --only simulador
+
+Cada caso se mide en varias rejillas con el driver de vídeo ``dummy`` de SDL
+(no abre ventanas). El resultado es un JSON con ms por llamada y celdas por
+segundo para poder comparar ejecuciones a lo largo del tiempo.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import numpy as np
+import pygame
+
+JORDAN2_SIZES = [(300, 400), (600, 800), (1200, 1600)]
+SIMULADOR_SIZES = [(40, 53), (80, 106), (160, 213)]
+PRUEBA6_SIZES = [(30, 40), (60, 80), (120, 160)]
+PLATE_SIZES = [(512, 512), (1024, 1024), (2048, 2048)]
+PLATE_COUNT = 40
+
+CASES = []
+
+
+def case(name, sizes):
+    """Registra ``setup(rows, cols) -> función a medir`` como caso del benchmark."""
+    def register(setup):
+        CASES.append((name, sizes, setup))
+        return setup
+    return register
+
+
+@contextlib.contextmanager
+def grid(module, rows, cols, cell):
+    """Cambia temporalmente el tamaño de rejilla de un script que usa constantes globales."""
+    names = ('ROWS', 'COLS', 'WIDTH', 'HEIGHT')
+    saved = {name: getattr(module, name) for name in names if hasattr(module, name)}
+    values = {'ROWS': rows, 'COLS': cols, 'WIDTH': cols * cell, 'HEIGHT': rows * cell}
+    for name in saved:
+        setattr(module, name, values[name])
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(module, name, value)
+
+
+def jordan2():
+    import simuladorJordan2
+    return simuladorJordan2
+
+
+# --- simuladorJordan2.py -------------------------------------------------------
+
+@case('jordan2.generate_terrain', JORDAN2_SIZES)
+def bench_generate_terrain(rows, cols):
+    S = jordan2()
+    return lambda: S.generate_terrain(rows, cols, cache=False)
+
+
+@case('jordan2.generate_terrain_cached', JORDAN2_SIZES)
+def bench_generate_terrain_cached(rows, cols):
+    from tectonics.cache import TerrainCache
+    S = jordan2()
+    cache = TerrainCache(tempfile.mkdtemp(prefix='tectonics_bench_'))
+    S.generate_terrain(rows, cols, cache=cache)  # Llena la caché
+    return lambda: S.generate_terrain(rows, cols, cache=cache)
+
+
+@case('jordan2.apply_influence', JORDAN2_SIZES)
+def bench_apply_influence(rows, cols):
+    S = jordan2()
+    terrain = S.generate_terrain(rows, cols)
+
+    def run():
+        with grid(S, rows, cols, S.GRID_SIZE):
+            S.apply_influence(terrain, cols // 2, rows // 2, 20, 3)
+    return run
+
+
+@case('jordan2.simulate_plate_tectonics', JORDAN2_SIZES)
+def bench_simulate_plate_tectonics(rows, cols):
+    from tectonics.simulation import create_plates_from_lines, random_dividing_line
+    S = jordan2()
+    random.seed(0)
+    terrain = S.generate_terrain(rows, cols)
+    plates = create_plates_from_lines(random_dividing_line(rows, cols), (rows, cols))
+    return lambda: S.simulate_plate_tectonics(terrain, plates)
+
+
+@case('jordan2.apply_erosion', JORDAN2_SIZES)
+def bench_apply_erosion(rows, cols):
+    S = jordan2()
+    terrain = S.generate_terrain(rows, cols)
+    rng = np.random.default_rng(0)
+    return lambda: S.apply_erosion(terrain, rng)
+
+
+@case('jordan2.draw_terrain', JORDAN2_SIZES)
+def bench_draw_terrain(rows, cols):
+    S = jordan2()
+    terrain = S.generate_terrain(rows, cols)
+    screen = pygame.Surface((cols * S.GRID_SIZE, rows * S.GRID_SIZE))
+
+    def run():
+        terrain.mark_all_dirty()  # Fotograma completo
+        S.draw_terrain(screen, terrain)
+    return run
+
+
+@case('jordan2.draw_terrain_dirty', JORDAN2_SIZES)
+def bench_draw_terrain_dirty(rows, cols):
+    S = jordan2()
+    terrain = S.generate_terrain(rows, cols)
+    screen = pygame.Surface((cols * S.GRID_SIZE, rows * S.GRID_SIZE))
+    S.draw_terrain(screen, terrain)
+
+    def run():
+        # Un trazo de pincel: solo se repintan sus baldosas
+        terrain.mark_dirty(cols // 2 - 20, rows // 2 - 20, cols // 2 + 21, rows // 2 + 21)
+        S.draw_terrain(screen, terrain)
+    return run
+
+
+@case('jordan2.add_visual_effects', JORDAN2_SIZES)
+def bench_add_visual_effects(rows, cols):
+    from tectonics.events import VOLCANO, EventModel
+    S = jordan2()
+    random.seed(0)
+    terrain = S.generate_terrain(rows, cols)
+    screen = pygame.Surface((cols * S.GRID_SIZE, rows * S.GRID_SIZE), pygame.SRCALPHA)
+    events = EventModel(terrain.shape, rng=0)
+    for _ in range(20):
+        events.quake(terrain.copy(), random.randrange(cols), random.randrange(rows))
+    for _ in range(5):
+        events.add(VOLCANO, random.randrange(cols), random.randrange(rows), 3, 1000)
+
+    def run():
+        with grid(S, rows, cols, S.GRID_SIZE):
+            S.add_visual_effects(screen, terrain, events)
+    return run
+
+
+@case('tectonics.particles', JORDAN2_SIZES)
+def bench_particles(rows, cols):
+    from tectonics.particles import ParticleSystem
+    S = jordan2()
+    count = rows * cols // 10  # 12k partículas en la rejilla de 300x400
+    screen = pygame.Surface((cols * S.GRID_SIZE, rows * S.GRID_SIZE), pygame.SRCALPHA)
+    particles = ParticleSystem(count, rng=0)
+    rng = np.random.default_rng(0)
+
+    def run():
+        # Se reponen las que mueren para medir siempre con el sistema lleno
+        missing = count - particles.count
+        particles.spawn(rng.uniform(0, screen.get_width(), missing), rng.uniform(0, screen.get_height(), missing),
+                        S.COLORS['earthquake'], life=(0.5, 1.0), size=(1, 3), speed=20)
+        particles.update(1 / S.FPS)
+        particles.draw(screen)
+    return run
+
+
+@case('tectonics.hydraulics_step', JORDAN2_SIZES)
+def bench_hydraulics_step(rows, cols):
+    from tectonics.hydraulics import HydraulicErosion
+    from tectonics.simulation import generate_terrain
+    terrain = generate_terrain(rows, cols)
+    hydraulics = HydraulicErosion(terrain.shape)
+    hydraulics.run(terrain, 20)  # Que ya haya agua corriendo
+    return lambda: hydraulics.step(terrain)
+
+
+@case('tectonics.plate_field_step', PLATE_SIZES)
+def bench_plate_field_step(rows, cols):
+    from tectonics.plates import MOTION_SCALE
+    from tectonics.simulation import create_random_plates, generate_terrain
+    random.seed(0)
+    terrain = generate_terrain(rows, cols)
+    plates = create_random_plates((rows, cols), PLATE_COUNT, rng=0)
+    # Una celda por paso en cada eje: todas las placas se mueven en cada llamada (el peor caso)
+    for plate in plates:
+        plate.velocity = np.sign(plate.velocity) / MOTION_SCALE
+    rng = np.random.default_rng(0)
+    return lambda: plates.step(terrain, rng)
+
+
+# --- simulador.py --------------------------------------------------------------
+
+@case('simulador.generate_terrain_map', SIMULADOR_SIZES)
+def bench_generate_terrain_map(rows, cols):
+    import simulador
+    np.random.seed(0)
+    return lambda: simulador.generate_terrain_map(cols, rows)
+
+
+@case('simulador.find_continents', SIMULADOR_SIZES)
+def bench_find_continents(rows, cols):
+    import simulador
+    np.random.seed(0)
+    terrain = simulador.generate_terrain_map(cols, rows)
+    return lambda: simulador.find_continents(terrain)
+
+
+@case('simulador.continents_update', SIMULADOR_SIZES)
+def bench_continents_update(rows, cols):
+    import simulador
+    np.random.seed(0)
+    terrain = simulador.generate_terrain_map(cols, rows)
+    continents = simulador.find_continents(terrain)
+    mask = terrain == 1
+
+    def run():
+        # Un bloque de 5x5 que aparece y desaparece, como el paso de una placa
+        mask[rows // 2:rows // 2 + 5, cols // 2:cols // 2 + 5] ^= True
+        continents.update(mask)
+    return run
+
+
+@case('simulador.render_map', SIMULADOR_SIZES)
+def bench_render_map(rows, cols):
+    import simulador
+    np.random.seed(0)
+    random.seed(0)
+    terrain = simulador.generate_terrain_map(cols, rows)
+    continents = simulador.find_continents(terrain)
+    plates = simulador.initialize_plates(cols, rows, terrain)
+    block = simulador.BLOCK_SIZE
+    screen = pygame.Surface((cols * block, rows * block))
+    return lambda: simulador.render_map(screen, terrain, plates, block, continents)
+
+
+# --- prueba_6.py ---------------------------------------------------------------
+
+@case('prueba_6.update_grid', PRUEBA6_SIZES)
+def bench_update_grid(rows, cols):
+    import prueba_6 as P
+    P.ROWS, P.COLS = rows, cols
+    P.grid_colors = [[P.WHITE for _ in range(cols)] for _ in range(rows)]
+    P.line_col, P.line_direction = 0, 1
+    # La línea recorre media rejilla para que haya columnas ya coloreadas
+    for _ in range(cols // 2):
+        P.move_line()
+        P.update_grid()
+    return P.update_grid
+
+
+# --- Ejecución -----------------------------------------------------------------
+
+def measure(func, min_time=0.5, max_repeats=50):
+    """Tiempos en segundos de varias llamadas (al menos una y unos ``min_time`` segundos)."""
+    func()  # Calentamiento: cachés, superficies, importaciones perezosas
+    times = []
+    start = time.perf_counter()
+    while len(times) < max_repeats and (not times or time.perf_counter() - start < min_time):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                             text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def run_cases(selected, quick=False, min_time=0.5, log=None):
+    results = []
+    for name, sizes, setup in CASES:
+        if selected and not any(name.startswith(prefix) for prefix in selected):
+            continue
+        for rows, cols in sizes[:1] if quick else sizes:
+            times = measure(setup(rows, cols), min_time=min_time)
+            median = float(np.median(times))
+            result = {
+                'case': name, 'rows': rows, 'cols': cols, 'repeats': len(times),
+                'mean_ms': float(np.mean(times)) * 1000, 'median_ms': median * 1000,
+                'min_ms': min(times) * 1000,
+                'cells_per_s': rows * cols / median if median > 0 else None,
+            }
+            results.append(result)
+            if log:
+                log(f"{name:<38} {cols:>5}x{rows:<5} {result['median_ms']:>10.3f} ms "
+                    f"{result['cells_per_s'] / 1e6:>9.2f} Mceldas/s")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description=__doc__.split('\n')[0])
+    parser.add_argument('--only', action='append', default=[], metavar='PREFIJO',
+                        help='solo los casos cuyo nombre empieza así (se puede repetir)')
+    parser.add_argument('--quick', action='store_true', help='solo la rejilla más pequeña de cada caso')
+    parser.add_argument('--min-time', type=float, default=0.5, help='segundos mínimos por medida')
+    parser.add_argument('--out', default=None, help='archivo JSON de salida (por defecto stdout)')
+    parser.add_argument('--list', action='store_true', help='lista los casos y termina')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, sizes, _ in CASES:
+            print(name, ' '.join(f"{c}x{r}" for r, c in sizes))
+        return 0
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))  # Algunas funciones necesitan un modo de vídeo
+    log = lambda text: print(text, file=sys.stderr)
+    results = run_cases(args.only, args.quick, args.min_time, log)
+    pygame.quit()
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pygame': pygame.version.ver,
+            'platform': platform.platform(),
+            'sdl_videodriver': os.environ.get('SDL_VIDEODRIVER'),
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
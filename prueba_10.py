@@ -1,5 +1,6 @@
 import pygame
-import noise
+from tectonics.cache import cached_noise_grid
+from tectonics.terrain import Terrain
 import random
 
 # Tamaño de la ventana
@@ -26,17 +27,11 @@ def get_color(height):
 def generate_terrain(rows, cols):
     """Genera el terreno usando ruido Perlin."""
     scale = 100  # Escala para el ruido Perlin
-    terrain = []
-    for y in range(rows):
-        row = []
-        for x in range(cols):
-            # Genera el ruido Perlin para la posición x, y
-            noise_value = noise.pnoise2(x / scale, y / scale, octaves=6, persistence=0.5, lacunarity=2.0)
-            # Mapea los valores de ruido a un rango de alturas de 0 a 15
-            height = int((noise_value + 1) * 7.5)  # Mapea el ruido (-1 a 1) a (0 a 15)
-            row.append(height)
-        terrain.append(row)
-    return terrain
+    # Genera el ruido Perlin de toda la rejilla en una sola llamada
+    noise_values = cached_noise_grid(rows, cols, scale, octaves=6, persistence=0.5, lacunarity=2.0)
+    # Mapea los valores de ruido a un rango de alturas de 0 a 15
+    heights = ((noise_values + 1) * 7.5).astype(int)  # Mapea el ruido (-1 a 1) a (0 a 15)
+    return Terrain(heights)
 
 def draw_terrain(terrain):
     """Dibuja el terreno en pantalla, dividido en dos placas."""
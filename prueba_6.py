@@ -1,18 +1,12 @@
 import pygame
 import random
 
-# Inicializar Pygame
-pygame.init()
-
 # Configuración de la pantalla
 WIDTH, HEIGHT = 800, 600
 CELL_SIZE = 20
 COLS = WIDTH // CELL_SIZE
 ROWS = HEIGHT // CELL_SIZE
 
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Línea y rastro fijo")
-
 # Colores
 WHITE = (255, 255, 255)
 RED = (255, 0, 0)
@@ -63,29 +57,39 @@ def update_grid():
                     distance = abs(line_col - col)
                     grid_colors[row][col] = get_color_from_distance(distance)
 
-# Bucle principal
-running = True
-clock = pygame.time.Clock()
+def main():
+    global screen
+    # Inicializar Pygame
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Línea y rastro fijo")
+
+    # Bucle principal
+    running = True
+    clock = pygame.time.Clock()
+
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
 
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
+        # Mover la línea
+        if not move_line():  # Si llega al borde, termina
             running = False
 
-    # Mover la línea
-    if not move_line():  # Si llega al borde, termina
-        running = False
+        # Actualizar colores de la cuadrícula
+        update_grid()
 
-    # Actualizar colores de la cuadrícula
-    update_grid()
+        # Dibujar todo
+        screen.fill(BLACK)
+        draw_grid()
 
-    # Dibujar todo
-    screen.fill(BLACK)
-    draw_grid()
+        # Actualizar pantalla
+        pygame.display.flip()
+        clock.tick(1)  # Controlar la velocidad (10 FPS)
 
-    # Actualizar pantalla
-    pygame.display.flip()
-    clock.tick(1)  # Controlar la velocidad (10 FPS)
+    # Salir
+    pygame.quit()
 
-# Salir
-pygame.quit()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,17 @@
 import pygame
-import noise
+from tectonics import erosion
+from tectonics.cache import cached_noise_grid
+from tectonics.render import TerrainRenderer
+from tectonics.world import Camera, ChunkedWorld
 import numpy as np
 
 # Configuración inicial
 WIDTH, HEIGHT = 800, 600  # Tamaño de la pantalla
 GRID_SIZE = 2  # Tamaño del grid en píxeles
 ROWS, COLS = (HEIGHT // GRID_SIZE) * 2, (WIDTH // GRID_SIZE) * 2  # Doble del tamaño de la pantalla
+SCROLL_SPEED = 8  # Celdas que avanza la cámara por fotograma con las flechas
+EROSION_RATE = 0.001  # Erosión por tick de los bloques visibles
+OFFSCREEN_EVERY = 8  # Los bloques cargados fuera de la vista se simulan uno de cada tantos ticks
 
 # Colores para las alturas
 COLORS = {
@@ -17,40 +23,53 @@ for i in range(3, 16):
     intensity = int(144 - (i - 2) * 9)  # Oscurece progresivamente
     COLORS[i] = (0, intensity, 0)
 
+TERRAIN_RENDERER = TerrainRenderer(lambda height: COLORS[int(height)], GRID_SIZE,
+                                   min_height=0, max_height=15, steps_per_unit=1)
+
 # Generar terreno
-def generate_terrain(rows, cols):
+def generate_chunk(x0, y0, cols, rows):
+    """Genera el bloque del mundo con esquina global (x0, y0)."""
     scale = 100
     octaves = 6
     persistence = 0.5
     lacunarity = 2.0
-    terrain = np.zeros((rows, cols), dtype=int)
+    # La fila i se usa como coordenada x del ruido, por eso se genera
+    # la rejilla traspuesta (cols, rows) y luego se gira
+    noise_values = cached_noise_grid(
+        cols, rows, scale,
+        row_offset=x0,
+        col_offset=y0,
+        octaves=octaves,
+        persistence=persistence,
+        lacunarity=lacunarity,
+        repeatx=COLS,
+        repeaty=ROWS,
+        base=42
+    ).T
+    heights = ((noise_values + 0.5) * 15).astype(int)  # Escala el ruido a valores entre 0 y 15
+    return np.clip(heights, 0, 15)
+
+def generate_terrain():
+    """Crea un mundo por bloques que solo genera las zonas que se visitan."""
+    return ChunkedWorld(generate_chunk)
+
+EROSION_RNG = np.random.default_rng()
 
-    for i in range(rows):
-        for j in range(cols):
-            x = i / scale
-            y = j / scale
-            noise_value = noise.pnoise2(
-                x, y,
-                octaves=octaves,
-                persistence=persistence,
-                lacunarity=lacunarity,
-                repeatx=cols,
-                repeaty=rows,
-                base=42
-            )
-            height = int((noise_value + 0.5) * 15)  # Escala el ruido a valores entre 0 y 15
-            terrain[i, j] = min(max(height, 0), 15)
-    return terrain
+def erode_chunk(chunk, ticks, padded):
+    """Erosiona un bloque con el borde de sus vecinos; los de fuera de la vista avanzan ``ticks`` de golpe."""
+    noise = EROSION_RNG.random(padded.shape, dtype=np.float32)
+    changed = np.empty(chunk.shape, dtype=bool)
+    chunk.heights[...] = erosion.erode_padded(padded, noise, EROSION_RATE * ticks, changed)
+    chunk.mark_mask(changed)
 
 # Dibujar el terreno
-def draw_terrain(screen, terrain):
-    for i in range(ROWS):
-        for j in range(COLS):
-            color = COLORS[terrain[i, j]]
-            pygame.draw.rect(
-                screen, color,
-                (j * GRID_SIZE, i * GRID_SIZE, GRID_SIZE, GRID_SIZE)
-            )
+def draw_terrain(screen, world, camera, moved):
+    """Dibuja la parte del mundo que ve la cámara."""
+    x0, y0, x1, y1 = camera.bounds
+    visible = world.read(x0, y0, x1, y1)
+    # Si la cámara se movió se repinta todo; si no, solo lo modificado
+    dirty = None if moved else world.dirty_in(x0, y0, x1, y1)
+    TERRAIN_RENDERER.draw(screen, visible, dirty=dirty)
 
 # Configuración de pygame
 pygame.init()
@@ -58,8 +77,10 @@ screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Simulador de choque de placas tectónicas")
 clock = pygame.time.Clock()
 
-# Generar el terreno inicial
-terrain = generate_terrain(ROWS, COLS)
+# Generar el terreno inicial y la cámara del tamaño de la pantalla
+terrain = generate_terrain()
+camera = Camera(WIDTH // GRID_SIZE, HEIGHT // GRID_SIZE)
+moved = True
 
 running = True
 while running:
@@ -68,12 +89,26 @@ while running:
             running = False
         elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
             # Reiniciar la simulación
-            terrain = generate_terrain(ROWS, COLS)
+            terrain.close()
+            terrain = generate_terrain()
+            moved = True
+
+    # Mover la cámara con las flechas
+    keys = pygame.key.get_pressed()
+    dx = (keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]) * SCROLL_SPEED
+    dy = (keys[pygame.K_DOWN] - keys[pygame.K_UP]) * SCROLL_SPEED
+    if dx or dy:
+        camera.move(dx, dy)
+        moved = True
+
+    # Simular los bloques visibles en cada tick y el resto de los cargados más despacio
+    terrain.step(camera, erode_chunk, offscreen_every=OFFSCREEN_EVERY)
 
     # Dibujar el terreno
-    screen.fill((0, 0, 0))
-    draw_terrain(screen, terrain)
+    draw_terrain(screen, terrain, camera, moved)
+    moved = False
     pygame.display.flip()
     clock.tick(30)
 
+terrain.close()  # Borra los bloques volcados a disco
 pygame.quit()
\ No newline at end of file
@@ -1,5 +1,8 @@
 import pygame
-import noise
+import numpy as np
+from tectonics.cache import cached_noise_grid
+from tectonics.terrain import Terrain
+from tectonics.render import TerrainRenderer
 
 # Configuración inicial
 WIDTH, HEIGHT = 800, 600  # Tamaño de la pantalla
@@ -28,29 +31,20 @@ def get_color(height):
         red = min(139, (height - 2) * 10)  # De verde a marrón
         return (red, green, 0)
 
+# Colores de las alturas enteras 0-15 calculados una sola vez
+TERRAIN_RENDERER = TerrainRenderer(get_color, GRID_SIZE, min_height=0, max_height=15, steps_per_unit=1)
+
 def generate_terrain(rows, cols):
     """Genera el terreno usando ruido Perlin."""
     scale = 100  # Escala para el ruido Perlin
-    terrain = []
-    for y in range(rows):
-        row = []
-        for x in range(cols):
-            noise_value = noise.pnoise2(x / scale, y / scale, octaves=6, persistence=0.5, lacunarity=2.0)
-            height = int((noise_value + 1) * 7.5)  # Mapea valores de ruido (-1 a 1) a alturas (0-15)
-            row.append(height)
-        terrain.append(row)
-    return terrain
+    noise_values = cached_noise_grid(rows, cols, scale, octaves=6, persistence=0.5, lacunarity=2.0)
+    heights = ((noise_values + 1) * 7.5).astype(int)  # Mapea valores de ruido (-1 a 1) a alturas (0-15)
+    return Terrain(heights)
 
 def draw_terrain(screen, terrain, offset_x):
     """Dibuja el terreno en pantalla."""
-    for y, row in enumerate(terrain):
-        for x, height in enumerate(row):
-            if 0 <= x - offset_x < COLS // 2:  # Ajusta para el desplazamiento
-                color = get_color(height)
-                pygame.draw.rect(
-                    screen, color, 
-                    ((x - offset_x) * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
-                )
+    visible = np.asarray(terrain)[:, offset_x:offset_x + COLS // 2]  # Ajusta para el desplazamiento
+    TERRAIN_RENDERER.draw(screen, visible)
 
 def main():
     pygame.init()
@@ -3,7 +3,10 @@ import random
 import numpy as np
 import sys
 from pygame.locals import *
-from collections import deque
+
+from tectonics.filters import box_blur, gaussian_blur
+from tectonics.labeling import RegionTracker
+from tectonics.render import TerrainRenderer
 
 # Configuración de la ventana y parámetros
 WINDOW_WIDTH = 800
@@ -12,6 +15,8 @@ BLOCK_SIZE = 15
 NUM_PLATES = 5
 EVENT_PROBABILITY = 0.02  # Probabilidad de un evento aleatorio (terremoto)
 PLATE_SPEED = 1  # Velocidad de movimiento de las placas
+SMOOTHING_RADIUS = 1  # Radio del filtro de caja del mapa inicial (1 = promedio 3x3)
+SMOOTHING_PASSES = 1  # Pasadas del filtro; más pasadas o más radio dan continentes más grandes
 
 # Colores suaves y seguros
 WATER_COLOR = (0, 102, 204)  # Azul tranquilo para el agua
@@ -20,46 +25,27 @@ MOUNTAIN_COLOR = (101, 67, 33)  # Marrón oscuro para las montañas
 PLATE_COLOR = (173, 216, 230)  # Azul claro para las placas
 BUTTON_COLOR = (0, 153, 0)  # Verde suave para los botones
 BUTTON_HOVER_COLOR = (0, 128, 0)  # Verde oscuro para el hover de botones
-LIGHT_COLOR = (255, 255, 255)  # Blanco para iluminar las zonas elevadas
 
 # Función para mejorar la forma de los continentes (algoritmo de difusión)
-def generate_terrain_map(width, height):
+def generate_terrain_map(width, height, radius=SMOOTHING_RADIUS, passes=SMOOTHING_PASSES, sigma=None):
     terrain_map = np.random.random((height, width))  # Crear un mapa de terreno aleatorio
 
-    # Aplicar suavizado para generar un terreno más realista (Filtro de promedio 3x3)
-    for y in range(1, height-1):
-        for x in range(1, width-1):
-            neighborhood = terrain_map[y-1:y+2, x-1:x+2]
-            terrain_map[y, x] = np.mean(neighborhood)
-    
+    # Aplicar suavizado para generar un terreno más realista: filtro de caja (o gaussiano
+    # de ``sigma`` celdas) con sumas acumuladas, en tiempo lineal sea cual sea el radio
+    if sigma:
+        terrain_map = gaussian_blur(terrain_map, sigma, passes)
+    else:
+        terrain_map = box_blur(terrain_map, radius, passes)
+
     # Convertir valores para representar agua (0) y tierra (1)
     terrain_map = np.where(terrain_map < 0.5, 255, 1)  # Agua o tierra
     return terrain_map
 
-# Algoritmo para identificar continentes (búsqueda en profundidad)
+# Continentes: regiones conexas de tierra (valor 1) etiquetadas con NumPy
 def find_continents(terrain):
-    visited = np.zeros_like(terrain)
-    continents = []
-    
-    def dfs(x, y, continent_id):
-        stack = deque([(x, y)])
-        continent = []
-        while stack:
-            cx, cy = stack.pop()
-            if 0 <= cx < len(terrain[0]) and 0 <= cy < len(terrain) and terrain[cy][cx] == 1 and not visited[cy][cx]:
-                visited[cy][cx] = 1
-                continent.append((cx, cy))
-                for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                    stack.append((cx + dx, cy + dy))
-        return continent
-
-    for y in range(len(terrain)):
-        for x in range(len(terrain[0])):
-            if terrain[y][x] == 1 and not visited[y][x]:
-                continent = dfs(x, y, len(continents))
-                continents.append(continent)
-    
-    return continents
+    """Devuelve un ``RegionTracker`` con la rejilla de etiquetas y el área, caja y centroide
+    de cada continente; ``continents.update(terrain == 1)`` lo pone al día tras cada cambio."""
+    return RegionTracker(np.asarray(terrain) == 1)
 
 class Plate:
     def __init__(self, plate_id, x, y, color):
@@ -125,26 +111,50 @@ def generate_earthquake(terrain):
                 if 0 <= x + dx < len(terrain[0]) and 0 <= y + dy < len(terrain):
                     terrain[y + dy][x + dx] = max(0, terrain[y + dy][x + dx] - magnitude)
 
+def map_color(level):
+    if level == 0:
+        return WATER_COLOR  # Agua
+    elif level == 1:
+        return TERRAIN_COLOR  # Terreno
+    return MOUNTAIN_COLOR  # Montañas (cuando el terreno está elevado)
+
+# Niveles agua (0), terreno (1) y montaña (2) con sombreado de relieve en lugar del
+# borde blanco de antes; el mapa pintado se guarda y solo se recalcula donde cambia
+MAP_RENDERER = TerrainRenderer(map_color, BLOCK_SIZE, min_height=0, max_height=2, steps_per_unit=1,
+                               shading=True, relief=0.5)
+_drawn_levels = None
+
+# Un color fijo por etiqueta de continente (antes se sorteaba uno nuevo en cada fotograma)
+CONTINENT_PALETTE = np.random.default_rng(0).integers(120, 181, (256, 3)).astype(np.uint8)
+_continent_layer = None  # (versión de las etiquetas, superficie escalada)
+
+def continent_layer(continents, block_size):
+    """Superficie con los continentes coloreados; solo se rehace cuando cambian las etiquetas."""
+    global _continent_layer
+    if _continent_layer is None or _continent_layer[0] != continents.version:
+        labels = continents.labels
+        image = CONTINENT_PALETTE[labels % len(CONTINENT_PALETTE)]
+        image[labels == 0] = 0  # Color transparente: ahí se ve el mapa
+        layer = pygame.surfarray.make_surface(image.transpose(1, 0, 2))
+        layer.set_colorkey((0, 0, 0))
+        layer = pygame.transform.scale(layer, (labels.shape[1] * block_size, labels.shape[0] * block_size))
+        _continent_layer = (continents.version, layer)
+    return _continent_layer[1]
+
 def render_map(screen, terrain, plates, block_size, continents):
-    for y in range(len(terrain)):
-        for x in range(len(terrain[y])):
-            value = terrain[y][x]
-            if value == 0:
-                color = WATER_COLOR  # Agua
-            elif value == 1:
-                color = TERRAIN_COLOR  # Terreno
-            else:
-                color = MOUNTAIN_COLOR  # Montañas (cuando el terreno está elevado)
-
-            pygame.draw.rect(screen, color, (x * block_size, y * block_size, block_size, block_size))
-            if value > 1:  # Agregar iluminación a las zonas elevadas
-                pygame.draw.rect(screen, LIGHT_COLOR, (x * block_size, y * block_size, block_size, block_size), 2)
-
-    # Dibujar los continentes con colores dinámicos
-    for continent in continents:
-        continent_color = (random.randint(120, 180), random.randint(120, 180), random.randint(120, 180))
-        for x, y in continent:
-            pygame.draw.rect(screen, continent_color, (x * block_size, y * block_size, block_size, block_size))
+    global _drawn_levels
+    levels = np.minimum(terrain, 2)
+    if _drawn_levels is None or _drawn_levels.shape != levels.shape:
+        dirty = None
+    else:
+        ys, xs = np.nonzero(levels != _drawn_levels)
+        dirty = [(xs.min(), ys.min(), xs.max() + 1, ys.max() + 1)] if len(xs) else []
+    _drawn_levels = levels
+    MAP_RENDERER.draw(screen, levels, dirty=dirty)
+    MAP_RENDERER.restore(screen, [screen.get_rect()])  # La pantalla se borra en cada fotograma
+
+    # Dibujar los continentes, cada uno con su color
+    screen.blit(continent_layer(continents, block_size), (0, 0))
 
     # Dibujar las placas con sombras y efectos
     for plate in plates:
@@ -183,6 +193,7 @@ def main():
             plate.move(WINDOW_WIDTH // BLOCK_SIZE, WINDOW_HEIGHT // BLOCK_SIZE)
             plate.handle_collision(terrain)
             plate.interact_with_plates(terrain, plates)
+        continents.update(terrain == 1)  # Solo se reetiqueta la zona que cambió
 
         render_map(screen, terrain, plates, BLOCK_SIZE, continents)
         draw_ui(screen)
@@ -1,7 +1,10 @@
 import pygame
 import random
-import math
-import noise  # Para la generación procedural de terreno con Perlin Noise
+from tectonics.cache import cached_noise_grid  # Perlin Noise vectorizado y guardado en caché de disco
+from tectonics.render import TerrainRenderer
+from tectonics.parallel import ParallelErosion
+from tectonics.terrain import Terrain
+from tectonics import brush, erosion
 import numpy as np
 
 # Configuración inicial
@@ -30,6 +33,7 @@ COLORS = {
 
 SIMULATION_SPEED = 0.5
 EROSION_RATE = 0.01
+EROSION_WORKERS = 1  # > 1: erosión repartida por bandas entre tantos procesos
 PLATE_TYPES = ['oceanic', 'continental']
 
 class TectonicPlate:
@@ -51,38 +55,24 @@ def get_color(height):
     else:
         return COLORS['mountain']  # Montañas (marrón)
 
+# Tabla altura -> color precalculada a partir de get_color (pasos de 1/16)
+TERRAIN_RENDERER = TerrainRenderer(get_color, GRID_SIZE, min_height=-16, max_height=16)
+
 def generate_terrain(rows, cols):
     """Genera un terreno utilizando Perlin Noise para un mapa más natural."""
-    terrain = []
-    for y in range(rows):
-        row = []
-        for x in range(cols):
-            # Usamos Perlin noise para generar un valor de altura
-            noise_value = noise.pnoise2(x / NOISE_SCALE, y / NOISE_SCALE, octaves=6, persistence=0.5, lacunarity=2.0)
-            height = noise_value * 10  # Multiplicamos por un factor para amplificar la variabilidad
-            row.append(height)
-        terrain.append(row)
-    
-    return terrain
+    # Calculamos todo el campo de ruido de una vez en lugar de celda a celda
+    noise_values = cached_noise_grid(rows, cols, NOISE_SCALE, octaves=6, persistence=0.5, lacunarity=2.0)
+    noise_values *= 10  # Multiplicamos por un factor para amplificar la variabilidad
+    return Terrain(noise_values)
 
 def apply_influence(terrain, center_x, center_y, radius, intensity):
     """Modifica la altura del terreno con una influencia circular."""
-    for y in range(max(0, center_y - radius), min(ROWS, center_y + radius + 1)):
-        for x in range(max(0, center_x - radius), min(COLS, center_x + radius + 1)):
-            distance = math.sqrt((x - center_x) ** 2 + (y - center_y) ** 2)
-            if distance <= radius:
-                influence = max(0, math.exp(-distance ** 2 / (2 * radius ** 2)))
-                terrain[y][x] = min(15, max(-1, terrain[y][x] + int(intensity * influence)))
+    # Núcleo gaussiano precalculado por radio; trunc igual que int()
+    brush.apply_dab(terrain, center_x, center_y, radius, intensity)
 
 def draw_terrain(screen, terrain):
     """Dibuja el terreno en pantalla solo donde es necesario para optimizar rendimiento."""
-    for y in range(ROWS):
-        for x in range(COLS):
-            color = get_color(terrain[y][x])
-            pygame.draw.rect(
-                screen, color, 
-                (x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
-            )
+    TERRAIN_RENDERER.draw(screen, terrain)
 
 def draw_dividing_lines(screen, lines):
     """Dibuja las líneas divisorias entre las placas tectónicas."""
@@ -213,22 +203,13 @@ def simulate_plate_tectonics(terrain, plates):
     
     return terrain, earthquake_points
 
-def apply_erosion(terrain):
-    """Aplica efectos de erosión al terreno"""
-    for y in range(ROWS):
-        for x in range(COLS):
-            if terrain[y][x] > 0:  # Solo erosiona tierra sobre el nivel del mar
-                # Erosión básica
-                terrain[y][x] -= EROSION_RATE * random.random()
-                
-                # Erosión por pendiente
-                for dy, dx in [(-1,0), (1,0), (0,-1), (0,1)]:
-                    ny, nx = y + dy, x + dx
-                    if 0 <= ny < ROWS and 0 <= nx < COLS:
-                        height_diff = terrain[y][x] - terrain[ny][nx]
-                        if height_diff > 1:  # Si hay una pendiente pronunciada
-                            terrain[y][x] -= height_diff * EROSION_RATE
-                            terrain[ny][nx] += height_diff * EROSION_RATE * 0.5
+def apply_erosion(terrain, rng=None, backend=None):
+    """Aplica efectos de erosión al terreno (``rng``: semilla opcional para reproducirla)"""
+    # Erosión básica y por pendiente sobre toda la rejilla en una pasada
+    if backend is not None:
+        backend.apply(terrain, EROSION_RATE, rng)  # Mismo resultado, en varios procesos
+    else:
+        erosion.apply_erosion(terrain, EROSION_RATE, rng)
 
 def draw_geological_effects(screen, terrain, earthquake_points):
     """Dibuja efectos geológicos especiales"""
@@ -262,12 +243,15 @@ def main():
 
     plates = []
     earthquake_points = []
+    erosion_backend = ParallelErosion((ROWS, COLS), EROSION_WORKERS) if EROSION_WORKERS > 1 else None
     
     while True:
         screen.fill((0, 0, 0))  # Limpiar pantalla
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                if erosion_backend is not None:
+                    erosion_backend.close()
                 pygame.quit()
                 return
             if event.type == pygame.MOUSEBUTTONDOWN:
@@ -288,7 +272,7 @@ def main():
             if not plates:
                 plates = create_plates_from_lines(lines)
             terrain, earthquake_points = simulate_plate_tectonics(terrain, plates)
-            apply_erosion(terrain)
+            apply_erosion(terrain, backend=erosion_backend)
         
         # Dibujar terreno
         draw_terrain(screen, terrain)
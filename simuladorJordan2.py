@@ -1,16 +1,25 @@
+import functools
 import pygame
-import random
-import math
-import noise  # Para la generación procedural de terreno con Perlin Noise
+import time
 import numpy as np
-from pygame import gfxdraw
+from tectonics.render import TerrainRenderer
+from tectonics import brush, checkpoint, erosion
+from tectonics.events import QUAKE, VOLCANO, EventModel
+from tectonics.history import EditHistory
+from tectonics.particles import ParticleSystem, sample_cells
+from tectonics.parallel import ParallelErosion
+from tectonics.profiler import FrameProfiler
+from tectonics.scheduler import SimulationScheduler
+from tectonics.snapshots import SnapshotWriter
+# Núcleo de la simulación, compartido con el modo sin ventana
+from tectonics.simulation import (create_plates_from_lines, generate_terrain, plates_from_state,
+                                  plates_to_state, simulate_plate_tectonics)
 
 # Configuración inicial
 WIDTH, HEIGHT = 800, 600  # Tamaño de la pantalla
 GRID_SIZE = 2  # Tamaño de cada celda
 ROWS, COLS = HEIGHT // GRID_SIZE, WIDTH // GRID_SIZE  # Reajustamos para que se dibuje correctamente
 FPS = 60
-NOISE_SCALE = 100.0  # Escala para el ruido Perlin
 
 # Colores para representar diferentes alturas
 COLORS = {
@@ -28,22 +37,30 @@ COLORS = {
     'ui_bg': (45, 45, 45),         # Fondo UI
     'ui_button': (65, 65, 65),     # Botones
     'ui_hover': (85, 85, 85),      # Hover
-    'ui_text': (200, 200, 200)     # Texto
+    'ui_text': (200, 200, 200),    # Texto
+    'line': (255, 255, 255)        # Línea divisoria
 }
 
 # Botones de reset y elevar se eliminaron
 
-SIMULATION_SPEED = 0.5
 EROSION_RATE = 0.01
-PLATE_TYPES = ['oceanic', 'continental']
-
-class TectonicPlate:
-    """Clase para manejar las placas tectónicas"""
-    def __init__(self, points, plate_type='continental'):
-        self.points = points
-        self.type = plate_type
-        self.velocity = np.array([random.uniform(-1, 1), random.uniform(-1, 1)])
-        self.velocity *= SIMULATION_SPEED
+SIM_TIMESTEP = 1 / FPS  # Paso fijo de la simulación, independiente del renderizado
+SIM_SUBSTEPS = 1  # Pasos de simulación por cada paso fijo
+EROSION_WORKERS = 1  # > 1: erosión repartida por bandas entre tantos procesos
+CHECKPOINT_PATH = "simulacion.ckpt"  # 'G' guarda y 'C' carga este archivo
+CHECKPOINT_EVERY = 3600  # Guardado automático cada N pasos (~1 minuto)
+TRACE_PATH = "frame_trace.json"  # 'T' exporta aquí la traza de fases (Chrome trace / Perfetto)
+TIMELAPSE_DIR = "timelapse"  # 'V' graba aquí un PNG cada TIMELAPSE_EVERY pasos
+TIMELAPSE_EVERY = 30
+HISTORY_BYTES = 64 * 1024 * 1024  # Memoria máxima del historial de Ctrl+Z / Ctrl+Y
+PARTICLE_CAPACITY = 20000  # Partículas de efectos visuales vivas a la vez
+SPARKLE_RATE = 0.0002  # Probabilidad por celda de agua y fotograma de un destello
+EMBERS_PER_MAGNITUDE = 0.4  # Chispas de lava por fotograma y unidad de magnitud de cada volcán
+QUAKE_PARTICLES = 3  # Partículas de polvo por terremoto reciente y fotograma
+SOURCE_REFRESH_FRAMES = 30  # Cada cuántos fotogramas se recalculan las celdas de agua
+
+# Tiempos por fase de cada fotograma; 'P' muestra u oculta el resumen en pantalla
+PROFILER = FrameProfiler()
 
 class UI:
     def __init__(self):
@@ -116,6 +133,80 @@ class UI:
         text = self.font.render(button_text, True, COLORS['ui_text'])
         text_rect = text.get_rect(center=self.start_button.center)
         screen.blit(text, text_rect)
+        return sidebar
+
+    def draw_stats(self, screen, sim_steps_per_second, render_fps):
+        """Muestra el ritmo medido de la simulación y del renderizado"""
+        lines = [f"Simulación: {sim_steps_per_second:.0f} pasos/s", f"Render: {render_fps:.0f} FPS"]
+        for i, line in enumerate(lines):
+            text = self.font.render(line, True, COLORS['ui_text'])
+            screen.blit(text, (WIDTH - self.sidebar_width + 10, HEIGHT - 110 + i * 20))
+
+class SimulationState:
+    """Estado compartido entre el bucle de la ventana y el hilo de simulación"""
+    def __init__(self, terrain, erosion_backend=None, seed=None):
+        self.terrain = terrain
+        self.erosion_backend = erosion_backend
+        # Generador propio del hilo de simulación: no lo comparte con las partículas de la ventana
+        self.rng = np.random.default_rng(seed)
+        self.plates = []
+        self.earthquake_points = []
+        self.events = EventModel(terrain.shape, rng=self.rng)  # Volcanes y terremotos que duran varios pasos
+        self.steps = 0
+        self.recorder = None  # SnapshotWriter del time-lapse mientras se graba
+
+    def step(self):
+        """Avanza un paso fijo: tectónica y erosión"""
+        with PROFILER.phase('tectonics'):
+            self.terrain, self.earthquake_points = simulate_plate_tectonics(self.terrain, self.plates, self.rng)
+            self.events.step(self.terrain, self.earthquake_points)
+        with PROFILER.phase('erosion'):
+            apply_erosion(self.terrain, self.rng, self.erosion_backend)
+        self.steps += 1
+        if self.recorder is not None and self.steps % TIMELAPSE_EVERY == 0:
+            # Solo copia las alturas; el color y el PNG se hacen en el hilo del escritor
+            self.recorder.submit(self.steps, self.terrain)
+
+def save_checkpoint(path, state, ui, lines, radius, mode, simulation_started, can_cut):
+    """Guarda el terreno y todo el estado de la partida en un punto de control
+
+    Si no se puede escribir (disco lleno, archivo bloqueado) se avisa y la
+    partida sigue; el siguiente guardado lo vuelve a intentar.
+    """
+    try:
+        _write_checkpoint(path, state, ui, lines, radius, mode, simulation_started, can_cut)
+    except OSError as exc:
+        print(f"No se pudo guardar el punto de control: {exc}")
+
+def _write_checkpoint(path, state, ui, lines, radius, mode, simulation_started, can_cut):
+    checkpoint.save(path, state.terrain, state.steps, {
+        'plates': plates_to_state(state.plates),
+        'earthquake_points': [list(p) for p in state.earthquake_points],
+        'events': state.events.to_state(),
+        'lines': [list(p) for p in lines],
+        'controls': ui.controls,
+        'radius': radius,
+        'mode': mode,
+        'simulation_started': simulation_started,
+        'can_cut': can_cut,
+    })
+
+def load_checkpoint(path, state, ui):
+    """Restaura un punto de control; devuelve (lines, radius, mode, simulation_started, can_cut)"""
+    # Sin mapear el archivo: el mapa lo mantendría abierto y no se podría volver a guardar encima
+    terrain, steps, data = checkpoint.load(path, mmap=False)
+    if terrain.shape != (ROWS, COLS):
+        raise checkpoint.CheckpointError(f"{path}: el terreno mide {terrain.shape}, se esperaba {(ROWS, COLS)}")
+    state.terrain = terrain
+    state.steps = steps
+    state.plates = plates_from_state(data['plates'], terrain.shape)
+    state.earthquake_points = [tuple(p) for p in data['earthquake_points']]
+    # Los puntos de control anteriores a los eventos persistentes empiezan sin ninguno
+    state.events = (EventModel.from_state(terrain.shape, data['events'], rng=state.rng) if 'events' in data
+                    else EventModel(terrain.shape, rng=state.rng))
+    ui.controls.update(data['controls'])
+    lines = [tuple(p) for p in data['lines']]
+    return lines, data['radius'], data['mode'], data['simulation_started'], data['can_cut']
 
 def get_color(height):
     """Retorna el color basado en la altura del terreno."""
@@ -128,61 +219,53 @@ def get_color(height):
     else:
         return COLORS['mountain']  # Montañas (marrón)
 
-def generate_terrain(rows, cols):
-    """Genera un terreno utilizando Perlin Noise para un mapa más natural."""
-    terrain = []
-    for y in range(rows):
-        row = []
-        for x in range(cols):
-            # Usamos Perlin noise para generar un valor de altura
-            noise_value = noise.pnoise2(x / NOISE_SCALE, y / NOISE_SCALE, octaves=6, persistence=0.5, lacunarity=2.0)
-            height = noise_value * 10  # Multiplicamos por un factor para amplificar la variabilidad
-            row.append(height)
-        terrain.append(row)
-    
-    return terrain
+# Tabla altura -> color precalculada a partir de get_color (pasos de 1/16), con sombreado
+# de relieve por pendiente ('H' lo activa y desactiva); el mar se dibuja plano
+TERRAIN_RENDERER = TerrainRenderer(get_color, GRID_SIZE, min_height=-16, max_height=16,
+                                   shading=True, sea_level=0)
 
 def apply_influence(terrain, center_x, center_y, radius, intensity):
     """Modifica la altura del terreno con una influencia circular."""
-    for y in range(max(0, center_y - radius), min(ROWS, center_y + radius + 1)):
-        for x in range(max(0, center_x - radius), min(COLS, center_x + radius + 1)):
-            distance = math.sqrt((x - center_x) ** 2 + (y - center_y) ** 2)
-            if distance <= radius:
-                influence = max(0, math.exp(-distance ** 2 / (2 * radius ** 2)))
-                terrain[y][x] = min(15, max(-1, terrain[y][x] + int(intensity * influence)))
-
-def draw_terrain(screen, terrain):
-    """Dibuja el terreno en pantalla solo donde es necesario para optimizar rendimiento."""
-    for y in range(ROWS):
-        for x in range(COLS):
-            color = get_color(terrain[y][x])
-            pygame.draw.rect(
-                screen, color, 
-                (x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
-            )
+    # Núcleo gaussiano precalculado por radio; trunc igual que int()
+    brush.apply_dab(terrain, center_x, center_y, radius, intensity)
+
+def draw_terrain(screen, terrain, dirty=None):
+    """Dibuja el terreno en pantalla solo donde es necesario para optimizar rendimiento.
+
+    ``terrain`` puede ser una copia de las alturas; entonces ``dirty`` son
+    las cajas que se tomaron del ``Terrain`` al copiarla.
+    """
+    # Solo se repintan las zonas que se modificaron desde el último fotograma
+    if dirty is None:
+        dirty = terrain.take_dirty()
+    return TERRAIN_RENDERER.draw(screen, terrain, dirty=dirty)
 
 def draw_dividing_lines(screen, lines):
     """Dibuja las líneas divisorias entre las placas tectónicas."""
+    rects = []
     if len(lines) > 1:
         for i in range(1, len(lines)):
-            pygame.draw.line(screen, COLORS['line'], 
+            rects.append(pygame.draw.line(screen, COLORS['line'], 
                              (lines[i - 1][0] * GRID_SIZE, lines[i - 1][1] * GRID_SIZE), 
-                             (lines[i][0] * GRID_SIZE, lines[i][1] * GRID_SIZE), 2)
+                             (lines[i][0] * GRID_SIZE, lines[i][1] * GRID_SIZE), 2))
+    return rects
 
 def draw_instructions(screen, simulation_started, can_cut):
     """Dibuja las instrucciones para el usuario en la pantalla."""
     font = pygame.font.SysFont("Arial", 24)
+    rects = []
     if not simulation_started:
         instructions = font.render("Presiona 'E' para elevar/reducir el terreno", True, (255, 255, 255))
-        screen.blit(instructions, (10, 10))
+        rects.append(screen.blit(instructions, (10, 10)))
         instructions2 = font.render("Arrastra para crear divisorias entre placas", True, (255, 255, 255))
-        screen.blit(instructions2, (10, 40))
+        rects.append(screen.blit(instructions2, (10, 40)))
         if can_cut:
             instructions3 = font.render("Haz clic derecho para cortar el trazado", True, (255, 255, 255))
-            screen.blit(instructions3, (10, 70))
+            rects.append(screen.blit(instructions3, (10, 70)))
     else:
         instructions = font.render("Simulación comenzada. Presiona 'R' para reiniciar.", True, (255, 255, 255))
-        screen.blit(instructions, (10, 10))
+        rects.append(screen.blit(instructions, (10, 10)))
+    return rects
 
 def draw_button(screen, mouse_pos, start_button):
     """Dibuja el botón 'Empezó la simulación' y maneja su estado de hover."""
@@ -196,7 +279,8 @@ def draw_button(screen, mouse_pos, start_button):
     
     return button_rect
 
-def handle_mouse_click(event, terrain, radius, lines, mode, dragging_line, simulation_started, ui, can_cut):
+def handle_mouse_click(event, terrain, radius, lines, mode, dragging_line, simulation_started, ui, can_cut,
+                       stroke=None, history=None):
     """Maneja los clics del ratón y actualiza el estado del terreno y líneas divisorias."""
     mouse_x, mouse_y = event.pos
 
@@ -214,7 +298,10 @@ def handle_mouse_click(event, terrain, radius, lines, mode, dragging_line, simul
 
     if event.button == 1:  # Clic izquierdo
         if 0 <= grid_y < ROWS and 0 <= grid_x < COLS:
-            apply_influence(terrain, grid_x, grid_y, radius, intensity=3 if mode == "Elevate" else -3)
+            if stroke is not None:
+                stroke.append((grid_x, grid_y))
+            else:
+                apply_influence(terrain, grid_x, grid_y, radius, intensity=3 if mode == "Elevate" else -3)
     elif event.button == 3:  # Clic derecho
         if can_cut:
             dragging_line = False
@@ -222,19 +309,28 @@ def handle_mouse_click(event, terrain, radius, lines, mode, dragging_line, simul
         else:
             dragging_line = True
             if 0 <= grid_y < ROWS and 0 <= grid_x < COLS:
+                if history is not None:
+                    history.record_lines(lines)
                 lines.append((grid_x, grid_y))
 
     return terrain, lines, dragging_line, simulation_started, can_cut
 
-def handle_mouse_motion(event, terrain, radius, lines, dragging_line, mode):
-    """Maneja el movimiento del ratón para dibujar divisorias y modificar terreno."""
+def handle_mouse_motion(event, terrain, radius, lines, dragging_line, mode, stroke=None):
+    """Maneja el movimiento del ratón para dibujar divisorias y modificar terreno.
+
+    Si se pasa ``stroke`` solo se anota la posición; el trazo se aplica una
+    vez por fotograma con ``paint_stroke``.
+    """
     mouse_x, mouse_y = event.pos
     grid_x = mouse_x // GRID_SIZE
     grid_y = mouse_y // GRID_SIZE
     
     if pygame.mouse.get_pressed()[0]:  # Arrastrar para modificar terreno
         if 0 <= grid_y < ROWS and 0 <= grid_x < COLS:
-            apply_influence(terrain, grid_x, grid_y, radius, intensity=3 if mode == "Elevate" else -3)
+            if stroke is not None:
+                stroke.append((grid_x, grid_y))
+            else:
+                apply_influence(terrain, grid_x, grid_y, radius, intensity=3 if mode == "Elevate" else -3)
 
     if dragging_line:  # Arrastrar para dibujar línea divisoria
         if 0 <= grid_y < ROWS and 0 <= grid_x < COLS:
@@ -243,6 +339,16 @@ def handle_mouse_motion(event, terrain, radius, lines, dragging_line, mode):
     
     return lines
 
+def paint_stroke(terrain, stroke, radius, mode, history=None, start=None):
+    """Aplica de una vez el trazo de pincel acumulado durante el fotograma.
+
+    ``start`` es la última posición del fotograma anterior con el botón
+    pulsado, para que un arrastre rápido no deje huecos entre fotogramas.
+    """
+    if stroke:
+        before = functools.partial(history.touch, terrain) if history is not None else None
+        brush.stroke(terrain, stroke, radius, 3 if mode == "Elevate" else -3, before, start)
+
 def handle_mouse_wheel(event, radius):
     """Maneja el evento de la rueda del mouse para ajustar el radio de influencia."""
     if event.y > 0:  # Rueda hacia arriba
@@ -251,109 +357,114 @@ def handle_mouse_wheel(event, radius):
         radius = max(1, radius - 1)
     return radius
 
-def create_plates_from_lines(lines):
-    """Convierte las líneas dibujadas en placas tectónicas"""
-    if len(lines) < 2:
-        return []
-    
-    plates = []
-    current_points = []
-    for point in lines:
-        current_points.append(point)
-    
-    plate_type = random.choice(PLATE_TYPES)
-    plates.append(TectonicPlate(current_points, plate_type))
-    return plates
-
-def simulate_plate_tectonics(terrain, plates):
-    """Simula los efectos de las placas tectónicas"""
-    if not plates:
-        return terrain, []
-    
-    earthquake_points = []
-    
-    # Simular colisiones y efectos
-    for plate in plates:
-        for i in range(len(plate.points) - 1):
-            x1, y1 = plate.points[i]
-            x2, y2 = plate.points[i + 1]
-            
-            # Zona de deformación
-            collision_radius = 5
-            for y in range(max(0, int(y1-collision_radius)), min(ROWS, int(y1+collision_radius))):
-                for x in range(max(0, int(x1-collision_radius)), min(COLS, int(x1+collision_radius))):
-                    if 0 <= y < ROWS and 0 <= x < COLS:
-                        # Probabilidad de efectos geológicos
-                        if random.random() < 0.05:  # Actividad tectónica
-                            if plate.type == 'continental':
-                                # Formación de montañas
-                                terrain[y][x] = min(15, terrain[y][x] + random.uniform(0.2, 0.5))
-                                if random.random() < 0.01:  # Probabilidad de terremoto
-                                    earthquake_points.append((x, y))
-                            else:
-                                # Subducción en placas oceánicas
-                                terrain[y][x] = max(-1, terrain[y][x] - random.uniform(0.1, 0.3))
-    
-    return terrain, earthquake_points
-
-def apply_erosion(terrain):
-    """Aplica efectos de erosión al terreno"""
-    for y in range(ROWS):
-        for x in range(COLS):
-            if terrain[y][x] > 0:  # Solo erosiona tierra sobre el nivel del mar
-                # Erosión básica
-                terrain[y][x] -= EROSION_RATE * random.random()
-                
-                # Erosión por pendiente
-                for dy, dx in [(-1,0), (1,0), (0,-1), (0,1)]:
-                    ny, nx = y + dy, x + dx
-                    if 0 <= ny < ROWS and 0 <= nx < COLS:
-                        height_diff = terrain[y][x] - terrain[ny][nx]
-                        if height_diff > 1:  # Si hay una pendiente pronunciada
-                            terrain[y][x] -= height_diff * EROSION_RATE
-                            terrain[ny][nx] += height_diff * EROSION_RATE * 0.5
-
-def draw_geological_effects(screen, terrain, earthquake_points):
-    """Dibuja efectos geológicos especiales"""
-    # Dibujar volcanes en puntos altos
-    for y in range(ROWS):
-        for x in range(COLS):
-            if terrain[y][x] > 10:  # Altura suficiente para volcán
-                if random.random() < 0.001:  # Probabilidad de volcán
-                    pygame.draw.circle(screen, COLORS['volcano'], 
-                                    (x * GRID_SIZE, y * GRID_SIZE), 3)
-    
-    # Dibujar terremotos
-    for x, y in earthquake_points:
-        pygame.draw.circle(screen, COLORS['earthquake'],
-                         (x * GRID_SIZE, y * GRID_SIZE), 4)
-
-def add_visual_effects(screen, terrain, earthquake_points):
-    """Añade efectos visuales avanzados"""
-    # Efecto de brillo para agua
-    for y in range(ROWS):
-        for x in range(COLS):
-            if terrain[y][x] < 0:  # Agua
-                if random.random() < 0.001:
-                    brightness = random.randint(100, 255)
-                    for dx in range(-1, 2):
-                        for dy in range(-1, 2):
-                            if 0 <= x * GRID_SIZE + dx < WIDTH and 0 <= y * GRID_SIZE + dy < HEIGHT:
-                                pygame.gfxdraw.pixel(screen, 
-                                                   x * GRID_SIZE + dx, 
-                                                   y * GRID_SIZE + dy, 
-                                                   (brightness, brightness, brightness, 100))
-
-    # Efectos de partículas para terremotos
-    for x, y in earthquake_points:
-        for _ in range(8):  # Más partículas
-            offset_x = random.randint(-5, 5)
-            offset_y = random.randint(-5, 5)
-            alpha = random.randint(50, 200)
-            size = random.randint(1, 3)
-            pos = (int(x * GRID_SIZE + offset_x), int(y * GRID_SIZE + offset_y))
-            if 0 <= pos[0] < WIDTH and 0 <= pos[1] < HEIGHT:
-                pygame.draw.circle(screen, (*COLORS['earthquake'], alpha), pos, size)
+def apply_erosion(terrain, rng=None, backend=None):
+    """Aplica efectos de erosión al terreno (``rng``: semilla opcional para reproducirla)"""
+    # Erosión básica y por pendiente sobre toda la rejilla en una pasada
+    changed = np.empty(terrain.shape, dtype=bool)
+    if backend is not None:
+        backend.apply(terrain, EROSION_RATE, rng, changed)  # Mismo resultado, en varios procesos
+    else:
+        erosion.apply_erosion(terrain, EROSION_RATE, rng, changed)
+    # Solo se repintan las baldosas con tierra erosionada o que recibió material
+    terrain.mark_mask(changed)
+
+def draw_geological_effects(screen, events):
+    """Dibuja los volcanes activos y los epicentros recientes; devuelve las zonas pintadas"""
+    rects = []
+    # Solo los eventos que caen en la vista, sacados del índice espacial
+    for event in events.in_rect(0, 0, COLS, ROWS):
+        center = (event.x * GRID_SIZE + GRID_SIZE // 2, event.y * GRID_SIZE + GRID_SIZE // 2)
+        if event.kind == VOLCANO:
+            rects.append(pygame.draw.circle(screen, COLORS['volcano'], center, 2 + event.magnitude // 2))
+            rects.append(pygame.draw.circle(screen, COLORS['lava'], center, 1))
+        else:
+            # La onda del temblor se abre a medida que se apaga
+            radius = 2 + int((1 - event.strength) * event.magnitude * 2)
+            rects.append(pygame.draw.circle(screen, COLORS['earthquake'], center, radius, 1))
+    return rects
+
+class VisualEffects:
+    """Destellos en el agua, chispas de lava de los volcanes y polvo de los terremotos"""
+
+    def __init__(self, capacity=PARTICLE_CAPACITY):
+        self.particles = ParticleSystem(capacity, rng=np.random.default_rng())  # Generador propio de la ventana
+        self.water = np.empty(0, dtype=np.intp)
+        self.frames = 0
+
+    def refresh_sources(self, terrain):
+        """Índices planos de las celdas de agua que emiten destellos"""
+        self.water = np.flatnonzero(np.asarray(terrain) < 0)
+
+    def emit(self, terrain, events):
+        if self.frames % SOURCE_REFRESH_FRAMES == 0 or self.water.size == 0:
+            self.refresh_sources(terrain)
+        self.frames += 1
+        particles, rng = self.particles, self.particles.rng
+        cols = np.asarray(terrain).shape[1]
+
+        cells = sample_cells(self.water, SPARKLE_RATE, rng)
+        if len(cells):
+            brightness = rng.integers(100, 256, len(cells)).astype(np.uint8)
+            particles.spawn((cells % cols + 0.5) * GRID_SIZE, (cells // cols + 0.5) * GRID_SIZE,
+                            np.repeat(brightness[:, None], 3, axis=1),
+                            life=(0.2, 0.6), alpha=(0.3, 0.5), size=(2, 3))
+        volcanoes = events.in_rect(0, 0, cols, len(terrain), VOLCANO)
+        if volcanoes:
+            where = np.array([(e.x, e.y) for e in volcanoes], dtype=np.float32)
+            counts = rng.poisson([EMBERS_PER_MAGNITUDE * e.magnitude for e in volcanoes])
+            where = (np.repeat(where, counts, axis=0) + 0.5) * GRID_SIZE
+            particles.spawn(where[:, 0], where[:, 1], COLORS['lava'], life=(0.5, 1.5),
+                            alpha=(0.6, 1.0), size=(1, 2), speed=6, drift=(0, -15))
+        quakes = events.in_rect(0, 0, cols, len(terrain), QUAKE)
+        if quakes:
+            # Cada temblor levanta menos polvo a medida que se apaga
+            where = np.array([(e.x, e.y) for e in quakes], dtype=np.float32)
+            counts = rng.binomial(QUAKE_PARTICLES, [e.strength for e in quakes])
+            where = (np.repeat(where, counts, axis=0) + 0.5) * GRID_SIZE
+            particles.spawn(where[:, 0], where[:, 1], COLORS['earthquake'], life=(0.3, 0.8),
+                            alpha=(0.2, 0.8), size=(1, 3), speed=20, jitter=5)
+
+# Partículas de los efectos visuales, en arrays de capacidad fija
+EFFECTS = VisualEffects()
+
+def add_visual_effects(screen, terrain, events, dt=1 / FPS):
+    """Añade efectos visuales avanzados y devuelve las zonas de pantalla que pinta"""
+    EFFECTS.particles.update(dt)
+    EFFECTS.emit(terrain, events)
+    return EFFECTS.particles.draw(screen)
+
+def toggle_timelapse(state):
+    """Empieza o termina la grabación del time-lapse con los colores del mapa."""
+    if state.recorder is None:
+        # Si el disco no da abasto se descartan fotogramas en lugar de frenar la simulación
+        state.recorder = SnapshotWriter(TIMELAPSE_DIR, 'png', policy='drop',
+                                        colorize=TERRAIN_RENDERER.colorize)
+        print(f"Grabando time-lapse en {TIMELAPSE_DIR}/")
+    else:
+        stats = state.recorder.close()
+        state.recorder = None
+        print(f"Time-lapse: {stats['written']} fotogramas, {stats['dropped']} descartados, "
+              f"{stats['frames_per_s']:.1f} fotogramas/s")
+
+def draw_profiler(screen, profiler, font):
+    """Muestra los percentiles p50/p95/p99 (ms) de cada fase sobre el terreno"""
+    rows = [("fase", "p50", "p95", "p99")]
+    for name, _, values in profiler.summary():
+        rows.append((name, *(f"{v:.2f}" for v in values)))
+    line_height = font.get_linesize()
+    panel = pygame.Rect(10, 0, 230, line_height * len(rows) + 10)
+    panel.bottom = HEIGHT - 10
+    background = pygame.Surface(panel.size, pygame.SRCALPHA)
+    background.fill((0, 0, 0, 170))
+    screen.blit(background, panel)
+    for i, row in enumerate(rows):
+        y = panel.y + 5 + i * line_height
+        screen.blit(font.render(row[0], True, COLORS['ui_text']), (panel.x + 5, y))
+        # Columnas numéricas alineadas a la derecha
+        for j, cell in enumerate(row[1:]):
+            text = font.render(cell, True, COLORS['ui_text'])
+            screen.blit(text, (panel.x + 135 + j * 45 - text.get_width(), y))
+    return panel
 
 def main():
     pygame.init()
@@ -362,58 +473,146 @@ def main():
     clock = pygame.time.Clock()
     ui = UI()
 
-    terrain = generate_terrain(ROWS, COLS)
+    erosion_backend = ParallelErosion((ROWS, COLS), EROSION_WORKERS) if EROSION_WORKERS > 1 else None
+    state = SimulationState(generate_terrain(ROWS, COLS), erosion_backend)
     lines = []
     radius = 5
     mode = "Elevate"
     dragging_line = False
     simulation_started = False
     can_cut = True
-    plates = []
-    earthquake_points = []
+
+    # La simulación corre en su propio hilo a paso fijo; el terreno se toca con el candado
+    # (por turnos) y se dibuja una copia fuera de él
+    scheduler = SimulationScheduler(state.step, SIM_TIMESTEP, SIM_SUBSTEPS)
+    scheduler.start()
+    autosave = checkpoint.CheckpointWriter(CHECKPOINT_PATH, CHECKPOINT_EVERY)
+    history = EditHistory(HISTORY_BYTES)
+    running = True
+    
+    overlay_rects = []  # Zonas pintadas encima del terreno en el fotograma anterior
+    last_brush = None  # Última posición del pincel mientras el botón sigue pulsado
+    # Copia de las alturas que se dibuja sin el candado mientras el otro hilo sigue simulando
+    view = np.empty((ROWS, COLS), dtype=np.float32)
+    show_profiler = False
     
-    while True:
-        screen.fill((0, 0, 0))
+    while running:
+        frame_start = time.perf_counter_ns()
         mouse_pos = pygame.mouse.get_pos()
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                return
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                terrain, lines, dragging_line, simulation_started, can_cut = handle_mouse_click(
-                    event, terrain, radius, lines, mode, dragging_line, simulation_started, ui, can_cut)
-            if event.type == pygame.MOUSEMOTION:
-                if mouse_pos[0] > WIDTH - ui.sidebar_width:
-                    ui.handle_mouse_interaction(mouse_pos)
-                else:
-                    lines = handle_mouse_motion(event, terrain, radius, lines, dragging_line, mode)
-            if event.type == pygame.MOUSEWHEEL:
-                radius = handle_mouse_wheel(event, radius)
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_r:
-                    terrain = generate_terrain(ROWS, COLS)
-                    lines = []
-                    simulation_started = False
-                    can_cut = True
-                elif event.key == pygame.K_e:
-                    mode = "Lower" if mode == "Elevate" else "Elevate"
-        
-        if simulation_started:
-            if not plates:
-                plates = create_plates_from_lines(lines)
-            terrain, earthquake_points = simulate_plate_tectonics(terrain, plates)
-            apply_erosion(terrain)
-        
-        draw_terrain(screen, terrain)
-        draw_dividing_lines(screen, lines)
-        add_visual_effects(screen, terrain, earthquake_points)
-        
-        ui.draw_sidebar(screen, simulation_started)
-        draw_instructions(screen, simulation_started, can_cut)
-
-        pygame.display.flip()
+        with scheduler.lock:
+            with PROFILER.phase('events'):
+                stroke = []  # Posiciones del pincel en este fotograma
+                stroke_ended = False
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        running = False
+                    if event.type == pygame.MOUSEBUTTONDOWN:
+                        state.terrain, lines, dragging_line, simulation_started, can_cut = handle_mouse_click(
+                            event, state.terrain, radius, lines, mode, dragging_line, simulation_started, ui, can_cut,
+                            stroke, history)
+                    if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                        stroke_ended = True
+                    if event.type == pygame.MOUSEMOTION:
+                        if mouse_pos[0] > WIDTH - ui.sidebar_width:
+                            ui.handle_mouse_interaction(mouse_pos)
+                        else:
+                            lines = handle_mouse_motion(event, state.terrain, radius, lines, dragging_line,
+                                                        mode, stroke)
+                    if event.type == pygame.MOUSEWHEEL:
+                        radius = handle_mouse_wheel(event, radius)
+                    if event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_r:
+                            state.terrain = generate_terrain(ROWS, COLS)
+                            state.events.clear()
+                            lines = []
+                            history.clear()
+                            simulation_started = False
+                            can_cut = True
+                        elif event.key == pygame.K_e:
+                            mode = "Lower" if mode == "Elevate" else "Elevate"
+                        elif event.key == pygame.K_g:
+                            save_checkpoint(CHECKPOINT_PATH, state, ui, lines, radius, mode,
+                                            simulation_started, can_cut)
+                            autosave.last_step = state.steps
+                        elif event.key == pygame.K_c:
+                            try:
+                                lines, radius, mode, simulation_started, can_cut = load_checkpoint(
+                                    CHECKPOINT_PATH, state, ui)
+                                autosave.last_step = state.steps
+                                history.clear()
+                            except (OSError, checkpoint.CheckpointError) as exc:
+                                print(f"No se pudo cargar el punto de control: {exc}")
+                        elif event.key == pygame.K_p:
+                            show_profiler = not show_profiler
+                        elif event.key == pygame.K_v:
+                            toggle_timelapse(state)
+                        elif event.key == pygame.K_h:
+                            TERRAIN_RENDERER.shading = not TERRAIN_RENDERER.shading
+                        elif event.key == pygame.K_t:
+                            print(f"Traza guardada en {PROFILER.export_chrome_trace(TRACE_PATH)}")
+                        elif event.key == pygame.K_z and event.mod & pygame.KMOD_CTRL:
+                            if event.mod & pygame.KMOD_SHIFT:
+                                lines = history.redo(state.terrain, lines)
+                            else:
+                                lines = history.undo(state.terrain, lines)
+                        elif event.key == pygame.K_y and event.mod & pygame.KMOD_CTRL:
+                            lines = history.redo(state.terrain, lines)
+                paint_stroke(state.terrain, stroke, radius, mode, history, last_brush)
+                if stroke:
+                    last_brush = stroke[-1]
+                if stroke_ended:
+                    last_brush = None
+                    history.commit(state.terrain)  # Un trazo completo = una entrada del historial
+
+            if simulation_started and not scheduler.running:
+                if not state.plates:
+                    # Una placa móvil por cada región que separan las divisorias
+                    state.plates = create_plates_from_lines(lines, (ROWS, COLS))
+                scheduler.resume()
+            elif not simulation_started and scheduler.running:
+                scheduler.pause()
+
+            # Guardado periódico para no perder una simulación larga
+            if simulation_started and autosave.due(state.steps):
+                save_checkpoint(CHECKPOINT_PATH, state, ui, lines, radius, mode,
+                                simulation_started, can_cut)
+                autosave.last_step = state.steps
+
+            # Con el candado solo se copia lo que hay que dibujar
+            with PROFILER.phase('snapshot'):
+                np.copyto(view, np.asarray(state.terrain))
+                dirty = state.terrain.take_dirty()
+                events = state.events.snapshot()
+
+        # Terreno modificado y fondo bajo los overlays del fotograma anterior
+        with PROFILER.phase('terrain_draw'):
+            update_rects = draw_terrain(screen, view, dirty)
+            update_rects += TERRAIN_RENDERER.restore(screen, overlay_rects)
+        with PROFILER.phase('effects'):
+            overlay_rects = draw_dividing_lines(screen, lines)
+            overlay_rects += add_visual_effects(screen, view, events, clock.get_time() / 1000)
+            overlay_rects += draw_geological_effects(screen, events)
+
+        with PROFILER.phase('sidebar'):
+            overlay_rects += draw_instructions(screen, simulation_started, can_cut)
+            update_rects.append(ui.draw_sidebar(screen, simulation_started))
+            ui.draw_stats(screen, scheduler.steps_per_second, clock.get_fps())
+        if show_profiler:
+            overlay_rects.append(draw_profiler(screen, PROFILER, ui.font))
+
+        with PROFILER.phase('flip'):
+            pygame.display.update(update_rects + overlay_rects)
+        PROFILER.record('frame', frame_start, time.perf_counter_ns())
         clock.tick(FPS)
 
+    # Se detiene el hilo fuera del candado para que pueda terminar su paso
+    scheduler.stop()
+    if state.recorder is not None:
+        toggle_timelapse(state)
+    if erosion_backend is not None:
+        erosion_backend.close()
+    pygame.quit()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,5 @@
+"""Núcleo compartido del simulador de placas tectónicas.
+
+Los módulos se importan por separado (``from tectonics.perlin import ...``)
+para que las partes de simulación no arrastren pygame al importarse.
+"""
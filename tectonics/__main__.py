@@ -0,0 +1,88 @@
+"""Línea de comandos: ``python -m tectonics run --steps 100000 --size 2048x2048``.
+
+``python -m tectonics hydraulics --iterations 5000`` aplica solo la erosión hidráulica.
+"""
+import argparse
+import sys
+
+from tectonics import headless, snapshots
+
+
+def add_snapshot_arguments(parser):
+    parser.add_argument('--snapshot-format', choices=snapshots.FORMATS, default='npy',
+                        help='npy: un archivo por instantánea; npz: bloques comprimidos; png: imágenes')
+    parser.add_argument('--snapshot-policy', choices=snapshots.POLICIES, default='block',
+                        help='con la cola llena, esperar (block) o descartar la instantánea (drop)')
+    parser.add_argument('--snapshot-queue', type=int, default=8, metavar='N',
+                        help='instantáneas que pueden esperar a escribirse')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m tectonics',
+                                     description='Simulador de placas tectónicas sin ventana')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='simulación por lotes sin pygame')
+    run.add_argument('--steps', type=int, default=1000, help='pasos a simular')
+    run.add_argument('--size', type=headless.parse_size, default=(300, 400),
+                     metavar='ANCHOxALTO', help='tamaño de la rejilla en celdas (por defecto 400x300)')
+    run.add_argument('--out', default=None, help='carpeta para las instantáneas .npy')
+    run.add_argument('--snapshot-every', type=int, default=0, metavar='N',
+                     help='guarda las alturas cada N pasos (0: solo inicio y final)')
+    add_snapshot_arguments(run)
+    run.add_argument('--report-every', type=int, default=1000, metavar='N',
+                     help='muestra el rendimiento cada N pasos')
+    run.add_argument('--seed', type=int, default=None, help='semilla para reproducir la simulación')
+    run.add_argument('--erosion-rate', type=float, default=headless.EROSION_RATE)
+    run.add_argument('--checkpoint', default=None, metavar='ARCHIVO',
+                     help='punto de control con el estado completo (se guarda al terminar)')
+    run.add_argument('--checkpoint-every', type=int, default=0, metavar='N',
+                     help='guarda también el punto de control cada N pasos')
+    run.add_argument('--plates', type=int, default=0, metavar='N',
+                     help='reparte la rejilla en N placas móviles (por defecto dos, con una divisoria)')
+    run.add_argument('--workers', type=int, default=None, metavar='N',
+                     help='procesos para generar el terreno (por defecto todos en mapas grandes)')
+    run.add_argument('--erosion-workers', type=int, default=1, metavar='N',
+                     help='reparte la erosión entre N procesos (mismo resultado que con 1)')
+    run.add_argument('--resume', action='store_true',
+                     help='continúa desde --checkpoint si existe; --steps es el paso final')
+
+    hydraulics = commands.add_parser('hydraulics', help='erosión hidráulica (ríos y valles) sin pygame')
+    hydraulics.add_argument('--iterations', type=int, default=2000, help='iteraciones a simular')
+    hydraulics.add_argument('--size', type=headless.parse_size, default=(300, 400),
+                            metavar='ANCHOxALTO', help='tamaño de la rejilla en celdas (por defecto 400x300)')
+    hydraulics.add_argument('--out', default=None, help='carpeta para las alturas y el agua en .npy')
+    hydraulics.add_argument('--snapshot-every', type=int, default=0, metavar='N',
+                            help='guarda las alturas cada N iteraciones (0: solo inicio y final)')
+    add_snapshot_arguments(hydraulics)
+    hydraulics.add_argument('--report-every', type=int, default=500, metavar='N',
+                            help='muestra el rendimiento cada N iteraciones')
+    hydraulics.add_argument('--rain', type=float, default=0.02, help='lluvia por celda y unidad de tiempo')
+    hydraulics.add_argument('--workers', type=int, default=None, metavar='N',
+                            help='procesos para generar el terreno')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == 'run':
+        rows, cols = args.size
+        headless.run(args.steps, rows, cols, out_dir=args.out,
+                     snapshot_every=args.snapshot_every, report_every=args.report_every,
+                     seed=args.seed, erosion_rate=args.erosion_rate,
+                     checkpoint_path=args.checkpoint, checkpoint_every=args.checkpoint_every,
+                     resume=args.resume, plate_count=args.plates, workers=args.workers,
+                     erosion_workers=args.erosion_workers, snapshot_format=args.snapshot_format,
+                     snapshot_policy=args.snapshot_policy, snapshot_queue=args.snapshot_queue)
+    elif args.command == 'hydraulics':
+        rows, cols = args.size
+        headless.run_hydraulics(args.iterations, rows, cols, out_dir=args.out,
+                                snapshot_every=args.snapshot_every, report_every=args.report_every,
+                                workers=args.workers, snapshot_format=args.snapshot_format,
+                                snapshot_policy=args.snapshot_policy, snapshot_queue=args.snapshot_queue,
+                                rain=args.rain)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""Rasterizado de los bordes de placa en índices de celdas.
+
+Cada segmento de la divisoria se convierte una sola vez en el conjunto de
+celdas a menos de ``radius`` del segmento (una cápsula).
+``PlateField.from_lines`` usa ese índice plano como muro entre placas antes
+de rellenar por inundación las regiones que quedan a cada lado.
+"""
+import numpy as np
+
+
+def segment_distance(xs, ys, x0, y0, x1, y1):
+    """Distancia de los puntos ``(xs, ys)`` al segmento ``(x0, y0)-(x1, y1)``."""
+    dx, dy = x1 - x0, y1 - y0
+    length2 = dx * dx + dy * dy
+    if length2 == 0:
+        return np.hypot(xs - x0, ys - y0)
+    t = np.clip(((xs - x0) * dx + (ys - y0) * dy) / length2, 0.0, 1.0)
+    return np.hypot(xs - (x0 + t * dx), ys - (y0 + t * dy))
+
+
+def rasterize_polyline(points, shape, radius):
+    """Celdas a distancia ``<= radius`` de algún segmento de ``points``.
+
+    Devuelve ``(cells, boxes)``: los índices planos (ordenados y sin
+    repetir) de una rejilla ``shape`` y la caja ``(x0, y0, x1, y1)`` de
+    cada segmento, útil para marcar zonas sucias.
+    """
+    rows, cols = shape
+    mask = np.zeros(shape, dtype=bool)
+    boxes = []
+    for (x0, y0), (x1, y1) in zip(points[:-1], points[1:]):
+        bx0 = max(0, int(np.floor(min(x0, x1) - radius)))
+        by0 = max(0, int(np.floor(min(y0, y1) - radius)))
+        bx1 = min(cols, int(np.ceil(max(x0, x1) + radius)) + 1)
+        by1 = min(rows, int(np.ceil(max(y0, y1) + radius)) + 1)
+        if bx0 >= bx1 or by0 >= by1:
+            continue
+        ys, xs = np.ogrid[by0:by1, bx0:bx1]
+        mask[by0:by1, bx0:bx1] |= segment_distance(xs, ys, x0, y0, x1, y1) <= radius
+        boxes.append((bx0, by0, bx1, by1))
+    return np.flatnonzero(mask), boxes
@@ -0,0 +1,121 @@
+"""Caché en disco de los campos de ruido ya generados.
+
+Cada campo se guarda como ``.npy`` con un nombre derivado de sus parámetros
+(filas, columnas, escala, octavas, persistencia, lacunaridad, semilla...),
+así que reiniciar con los mismos valores solo cuesta mapear el archivo.
+"""
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from tectonics.parallel import generate_noise
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def default_cache_dir():
+    """Carpeta de la caché: ``$TECTONICS_CACHE_DIR`` o ``~/.cache/tectonics``."""
+    return os.environ.get('TECTONICS_CACHE_DIR') or \
+        os.path.join(os.path.expanduser('~'), '.cache', 'tectonics')
+
+
+class TerrainCache:
+    """Guarda arrays en ``directory`` y borra los menos usados al pasar de ``max_bytes``.
+
+    El uso se registra en la fecha de modificación de cada archivo, que se
+    actualiza en cada acierto. Los arrays se cargan con ``mmap_mode='c'``:
+    se leen bajo demanda del disco y escribir en ellos no altera el archivo.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(**params):
+        """Nombre de archivo estable para unos parámetros."""
+        text = repr(sorted(params.items()))
+        return hashlib.sha1(text.encode('utf-8')).hexdigest() + '.npy'
+
+    def get(self, **params):
+        """Devuelve el array guardado con esos parámetros o ``None``."""
+        path = os.path.join(self.directory, self.key(**params))
+        try:
+            array = np.load(path, mmap_mode='c')
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return array
+
+    def put(self, array, **params):
+        """Guarda ``array`` de forma atómica y recorta la caché a ``max_bytes``."""
+        if array.nbytes > self.max_bytes:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp, os.path.join(self.directory, self.key(**params)))
+        except OSError:
+            return  # Sin caché si la carpeta no es escribible
+        self.trim()
+
+    def trim(self):
+        """Borra los archivos usados hace más tiempo hasta caber en ``max_bytes``."""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith('.npy'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith('.npy'):
+                    os.remove(os.path.join(self.directory, name))
+
+
+_default_cache = None
+
+
+def default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = TerrainCache()
+    return _default_cache
+
+
+def cached_noise_grid(rows, cols, scale, octaves=1, persistence=0.5, lacunarity=2.0,
+                      repeatx=1024, repeaty=1024, base=0, row_offset=0, col_offset=0,
+                      cache=None, workers=None):
+    """Como ``noise_grid`` pero leyendo de la caché si ya se generó con esos parámetros.
+
+    Devuelve una copia privada (copy-on-write) que se puede modificar sin
+    tocar el archivo. ``cache=False`` desactiva la caché. Si hay que
+    generarlo, ``workers`` se pasa a ``parallel.generate_noise``.
+    """
+    params = dict(rows=rows, cols=cols, scale=float(scale), octaves=octaves,
+                  persistence=float(persistence), lacunarity=float(lacunarity),
+                  repeatx=repeatx, repeaty=repeaty, base=base,
+                  row_offset=row_offset, col_offset=col_offset)
+    if cache is False:
+        return generate_noise(workers=workers, **params)
+    cache = cache or default_cache()
+    noise = cache.get(**params)
+    if noise is None:
+        noise = generate_noise(workers=workers, **params)
+        cache.put(noise, **params)
+    return np.asarray(noise)
@@ -0,0 +1,119 @@
+"""Puntos de control binarios de la simulación.
+
+Formato (little-endian)::
+
+    MAGIC (8 bytes) | versión u32 | filas u32 | columnas u32 | paso u64 |
+    longitud del JSON u32 | JSON del estado | relleno hasta múltiplo de 64 |
+    alturas float32 en crudo (filas * columnas)
+
+Las alturas quedan alineadas al final del archivo, así que se pueden abrir
+con ``np.memmap`` sin leer el archivo entero. El JSON guarda el resto del
+estado (placas, líneas, controles...).
+"""
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from tectonics.terrain import Terrain
+
+MAGIC = b'TECTCKPT'
+VERSION = 1
+ALIGNMENT = 64
+_HEADER = struct.Struct('<8sIIIQI')
+_DTYPE = np.dtype('<f4')
+
+
+class CheckpointError(ValueError):
+    """El archivo no es un punto de control válido."""
+
+
+def _data_offset(state_len):
+    end = _HEADER.size + state_len
+    return -(-end // ALIGNMENT) * ALIGNMENT
+
+
+def save(path, terrain, step=0, state=None):
+    """Escribe el punto de control de forma atómica (archivo temporal y ``os.replace``)."""
+    heights = np.asarray(terrain, dtype=_DTYPE)
+    rows, cols = heights.shape
+    payload = json.dumps(state or {}, separators=(',', ':')).encode('utf-8')
+    offset = _data_offset(len(payload))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, rows, cols, step, len(payload)))
+            f.write(payload)
+            f.write(b'\0' * (offset - _HEADER.size - len(payload)))
+            f.write(np.ascontiguousarray(heights).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)  # mkstemp crea el archivo solo legible por el dueño
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def read_header(path):
+    """Devuelve ``(filas, columnas, paso, estado, offset)`` sin leer las alturas."""
+    with open(path, 'rb') as f:
+        raw = f.read(_HEADER.size)
+        if len(raw) < _HEADER.size:
+            raise CheckpointError(f"{path}: archivo demasiado corto")
+        magic, version, rows, cols, step, state_len = _HEADER.unpack(raw)
+        if magic != MAGIC:
+            raise CheckpointError(f"{path}: no es un punto de control")
+        if version != VERSION:
+            raise CheckpointError(f"{path}: versión {version} no soportada")
+        state = json.loads(f.read(state_len).decode('utf-8'))
+    return rows, cols, step, state, _data_offset(state_len)
+
+
+def load(path, mmap=True):
+    """Lee un punto de control y devuelve ``(terrain, paso, estado)``.
+
+    Con ``mmap=True`` las alturas se mapean en modo copy-on-write: la carga
+    es inmediata y modificar el terreno no altera el archivo, pero este queda
+    abierto mientras viva el terreno (en Windows no se puede reemplazar hasta
+    entonces). Quien vaya a guardar encima del mismo archivo debe usar
+    ``mmap=False``.
+    """
+    rows, cols, step, state, offset = read_header(path)
+    expected = offset + rows * cols * _DTYPE.itemsize
+    if os.path.getsize(path) < expected:
+        raise CheckpointError(f"{path}: faltan datos del terreno")
+    if mmap:
+        heights = np.memmap(path, dtype=_DTYPE, mode='c', offset=offset, shape=(rows, cols))
+    else:
+        heights = np.fromfile(path, dtype=_DTYPE, count=rows * cols, offset=offset)
+        heights = heights.reshape(rows, cols)
+    return Terrain(np.asarray(heights)), step, state
+
+
+class CheckpointWriter:
+    """Guarda en ``path`` cada ``every`` pasos para no perder más de ese tramo si algo falla."""
+
+    def __init__(self, path, every, start_step=0):
+        self.path = path
+        self.every = every
+        self.last_step = start_step
+
+    def due(self, step):
+        return bool(self.every) and step - self.last_step >= self.every
+
+    def maybe_save(self, step, terrain, state=None):
+        """Guarda si toca; ``state`` puede ser un dict o una función que lo construya."""
+        if not self.due(step):
+            return False
+        self.save(step, terrain, state)
+        return True
+
+    def save(self, step, terrain, state=None):
+        save(self.path, terrain, step, state() if callable(state) else state)
+        self.last_step = step
@@ -0,0 +1,100 @@
+"""Erosión por pendiente vectorizada.
+
+Misma regla que el bucle original de ``apply_erosion``: cada celda de tierra
+(altura > 0) pierde ``rate * ruido`` y, por cada vecino ortogonal más bajo
+en más de 1, cede ``diff * rate`` del que el vecino recibe la mitad.
+
+El orden de actualización cambia a propósito: aquí todas las diferencias se
+calculan sobre el estado del principio del paso (orden de Jacobi), mientras
+que el bucle original leía celdas ya modificadas en orden de barrido (Gauss-
+Seidel). Con pendientes mayores que 1 los resultados no coinciden y la
+diferencia crece con la rejilla (unos 3e-2 en 32x32 con ``rate=0.01``); a
+cambio el resultado no depende del orden y se puede repartir por bandas.
+"""
+import numpy as np
+
+NEIGHBOURS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+_default_rng = np.random.default_rng()
+
+
+def make_rng(rng=None):
+    """Acepta un ``Generator``, una semilla entera o ``None`` (generador global)."""
+    if rng is None:
+        return _default_rng
+    if isinstance(rng, np.random.Generator):
+        return rng
+    return np.random.default_rng(rng)
+
+
+def erode_padded(padded, noise, rate, changed=None):
+    """Un paso de erosión sobre un bloque con un borde de una celda alrededor.
+
+    ``padded`` y ``noise`` miden (filas + 2, columnas + 2); el borde contiene
+    las celdas vecinas del bloque o ``NaN`` fuera del mundo, que nunca
+    intercambia material. Devuelve las nuevas alturas del interior; si se
+    pasa ``changed`` (bool, del tamaño del interior) marca en él las celdas
+    cuya altura cambió.
+    """
+    valid = ~np.isnan(padded)
+    land = padded > 0  # NaN nunca es tierra
+    lowered = noise * land
+    lowered *= -rate
+    lowered += padded
+    np.copyto(lowered, 0, where=~valid)
+    centre = lowered[1:-1, 1:-1]
+    centre_land = land[1:-1, 1:-1]
+    rows, cols = centre.shape
+
+    given = np.zeros_like(centre)
+    received = np.zeros_like(centre)
+    diff = np.empty_like(centre)
+    term = np.empty_like(centre)
+    mask = np.empty(centre.shape, dtype=bool)
+    for dy, dx in NEIGHBOURS:
+        window = (slice(1 + dy, 1 + dy + rows), slice(1 + dx, 1 + dx + cols))
+        np.subtract(centre, lowered[window], out=diff)
+        # Pendiente pronunciada hacia el vecino: la celda cede material
+        np.greater(diff, 1, out=mask)
+        mask &= centre_land
+        mask &= valid[window]
+        given += np.multiply(diff, mask, out=term)
+        # Pendiente pronunciada desde el vecino: la celda recibe la mitad
+        np.less(diff, -1, out=mask)
+        mask &= land[window]
+        received -= np.multiply(diff, mask, out=term)
+
+    given *= -rate
+    given += centre
+    received *= rate * 0.5
+    given += received
+    if changed is not None:
+        np.not_equal(given, padded[1:-1, 1:-1], out=changed)
+    return given
+
+
+def apply_erosion(terrain, rate, rng=None, changed=None):
+    """Aplica un paso de erosión en sitio sobre ``terrain`` (``Terrain`` o ndarray).
+
+    ``rng`` permite fijar la semilla (entero o ``np.random.Generator``) para
+    obtener resultados reproducibles. ``changed`` (bool, mismo tamaño) recibe
+    las celdas modificadas, p. ej. para ``Terrain.mark_mask``.
+    """
+    heights = np.asarray(terrain)
+    noise = make_rng(rng).random(heights.shape, dtype=np.float32)
+    padded = np.pad(heights, 1, constant_values=np.nan)
+    heights[...] = erode_padded(padded, np.pad(noise, 1), rate, changed)
+    return terrain
+
+
+def reach(heights, out=None):
+    """Celdas que un paso de erosión puede modificar: la tierra y sus cuatro vecinas."""
+    land = np.greater(heights, 0, out=out)
+    grown = land.copy()
+    grown[1:] |= land[:-1]
+    grown[:-1] |= land[1:]
+    grown[:, 1:] |= land[:, :-1]
+    grown[:, :-1] |= land[:, 1:]
+    land[...] = grown
+    return land
+
@@ -0,0 +1,264 @@
+"""Volcanes y terremotos persistentes con un índice espacial.
+
+Cada evento tiene posición (celda), magnitud y edad, y vive varios pasos:
+los volcanes levantan el terreno con lava mientras están activos y los
+terremotos hunden el suelo al producirse (como ``generate_earthquake`` de
+``simulador.py``). Los eventos se guardan en una rejilla uniforme de cubos
+(``SpatialHash``), así que «eventos cerca de una celda» o «eventos en la
+vista» solo miran los cubos afectados en lugar de recorrer todo.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from tectonics.brush import MAX_HEIGHT, MIN_HEIGHT
+from tectonics.erosion import make_rng
+
+VOLCANO, QUAKE = 'volcano', 'quake'
+
+VOLCANO_HEIGHT = 10  # Solo nacen volcanes en cumbres por encima de esta altura
+VOLCANO_RATE = 0.1  # Probabilidad por paso de intentar crear un volcán
+VOLCANO_TRIES = 16  # Celdas al azar que se prueban en cada intento
+VOLCANO_SPACING = 12  # Distancia mínima (celdas) entre volcanes
+MAX_VOLCANOES = 32
+VOLCANO_LIFETIME = (600, 3000)  # Pasos de actividad
+VOLCANO_UPLIFT = 0.004  # Elevación por paso y unidad de magnitud en el cráter
+QUAKE_LIFETIME = 60  # Pasos que se recuerda un terremoto
+QUAKE_MERGE_RADIUS = 3  # Un temblor tan cerca de otro activo lo reaviva en vez de crear uno nuevo
+QUAKE_SUBSIDENCE = 0.05  # Hundimiento en el epicentro por unidad de magnitud
+
+
+class SpatialHash:
+    """Puntos ``(x, y)`` con clave, repartidos en cubos de ``bucket`` x ``bucket`` celdas."""
+
+    def __init__(self, bucket=16):
+        self.bucket = bucket
+        self._buckets = {}  # (bx, by) -> {clave: (x, y)}
+        self._where = {}  # clave -> cubo
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, key):
+        return key in self._where
+
+    def insert(self, key, x, y):
+        if key in self._where:
+            self.remove(key)
+        cell = (int(x) // self.bucket, int(y) // self.bucket)
+        self._buckets.setdefault(cell, {})[key] = (x, y)
+        self._where[key] = cell
+
+    def remove(self, key):
+        cell = self._where.pop(key)
+        members = self._buckets[cell]
+        del members[key]
+        if not members:
+            del self._buckets[cell]
+
+    def query_rect(self, x0, y0, x1, y1):
+        """Claves con ``x0 <= x < x1`` e ``y0 <= y < y1``."""
+        bx0, by0 = int(x0) // self.bucket, int(y0) // self.bucket
+        bx1, by1 = (int(x1) - 1) // self.bucket, (int(y1) - 1) // self.bucket
+        if (bx1 - bx0 + 1) * (by1 - by0 + 1) > len(self._buckets):
+            # Caja mayor que lo ocupado (p. ej. toda la vista): basta con los cubos con algo
+            cells = [c for c in self._buckets if bx0 <= c[0] <= bx1 and by0 <= c[1] <= by1]
+        else:
+            cells = [(bx, by) for by in range(by0, by1 + 1) for bx in range(bx0, bx1 + 1)]
+        found = []
+        for cell in cells:
+            for key, (x, y) in self._buckets.get(cell, {}).items():
+                if x0 <= x < x1 and y0 <= y < y1:
+                    found.append(key)
+        return found
+
+    def query_radius(self, x, y, radius):
+        """Claves a distancia ``<= radius`` de ``(x, y)``."""
+        found = []
+        r2 = radius * radius
+        for key in self.query_rect(x - radius, y - radius, x + radius + 1, y + radius + 1):
+            px, py = self._buckets[self._where[key]][key]
+            if (px - x) ** 2 + (py - y) ** 2 <= r2:
+                found.append(key)
+        return found
+
+
+class GeoEvent:
+    """Un volcán o un terremoto en la celda ``(x, y)``."""
+
+    __slots__ = ('id', 'kind', 'x', 'y', 'magnitude', 'age', 'lifetime')
+
+    def __init__(self, id, kind, x, y, magnitude, lifetime, age=0):
+        self.id = id
+        self.kind = kind
+        self.x = x
+        self.y = y
+        self.magnitude = magnitude
+        self.lifetime = lifetime
+        self.age = age
+
+    @property
+    def strength(self):
+        """Intensidad restante (1 al nacer, 0 al acabar), para los efectos visuales."""
+        return max(0.0, 1 - self.age / self.lifetime)
+
+    def to_state(self):
+        return [self.kind, self.x, self.y, self.magnitude, self.lifetime, self.age]
+
+    @classmethod
+    def from_state(cls, id, data):
+        kind, x, y, magnitude, lifetime, age = data
+        return cls(id, kind, x, y, magnitude, lifetime, age)
+
+    def __repr__(self):
+        return f"GeoEvent({self.kind}, x={self.x}, y={self.y}, magnitude={self.magnitude}, age={self.age})"
+
+
+@lru_cache(maxsize=None)
+def _falloff(radius):
+    """Pesos gaussianos (0..1) de un disco de radio ``radius``."""
+    offsets = np.arange(-radius, radius + 1)
+    distance_sq = offsets[None, :] ** 2 + offsets[:, None] ** 2
+    weights = np.exp(-distance_sq / (0.5 * radius ** 2)).astype(np.float32)
+    weights[distance_sq > radius ** 2] = 0
+    weights.flags.writeable = False
+    return weights
+
+
+def displace(terrain, x, y, radius, amount):
+    """Suma ``amount`` en ``(x, y)`` decayendo hasta 0 a ``radius`` celdas.
+
+    Como el pincel, no sube por encima de ``MAX_HEIGHT`` ni hunde por debajo
+    de ``MIN_HEIGHT``; las celdas que ya estaban más allá no se tocan.
+    """
+    rows, cols = terrain.shape
+    x0, y0 = max(0, x - radius), max(0, y - radius)
+    x1, y1 = min(cols, x + radius + 1), min(rows, y + radius + 1)
+    if x0 >= x1 or y0 >= y1:
+        return
+    weights = _falloff(radius)[y0 - y + radius:y1 - y + radius, x0 - x + radius:x1 - x + radius]
+    heights = np.asarray(terrain)
+    region = heights[y0:y1, x0:x1]
+    moved = region + amount * weights
+    if amount >= 0:
+        np.maximum(region, np.minimum(moved, MAX_HEIGHT), out=region)
+    else:
+        np.minimum(region, np.maximum(moved, MIN_HEIGHT), out=region)
+    if hasattr(terrain, 'mark_dirty'):
+        terrain.mark_dirty(x0, y0, x1, y1)
+
+
+class EventModel:
+    """Volcanes y terremotos vivos sobre una rejilla ``shape``.
+
+    ``step`` se llama una vez por paso de simulación con los puntos de
+    terremoto de la tectónica: envejece y retira los eventos, registra los
+    temblores, intenta crear volcanes en las cumbres y aplica sus efectos al
+    terreno. ``near`` e ``in_rect`` consultan el índice espacial.
+    """
+
+    def __init__(self, shape, bucket=16, rng=None):
+        self.shape = tuple(shape)
+        self.rng = make_rng(rng)
+        self.events = {}
+        self.index = SpatialHash(bucket)
+        self._next_id = 0
+        self.volcanoes = 0
+
+    def __len__(self):
+        return len(self.events)
+
+    def add(self, kind, x, y, magnitude, lifetime):
+        event = GeoEvent(self._next_id, kind, int(x), int(y), magnitude, lifetime)
+        self._next_id += 1
+        self.events[event.id] = event
+        self.index.insert(event.id, event.x, event.y)
+        if kind == VOLCANO:
+            self.volcanoes += 1
+        return event
+
+    def remove(self, event):
+        del self.events[event.id]
+        self.index.remove(event.id)
+        if event.kind == VOLCANO:
+            self.volcanoes -= 1
+
+    def near(self, x, y, radius, kind=None):
+        """Eventos a ``radius`` celdas o menos de ``(x, y)``."""
+        found = (self.events[key] for key in self.index.query_radius(x, y, radius))
+        return [e for e in found if kind is None or e.kind == kind]
+
+    def in_rect(self, x0, y0, x1, y1, kind=None):
+        """Eventos dentro de las celdas ``[y0:y1, x0:x1]`` (p. ej. la vista)."""
+        found = (self.events[key] for key in self.index.query_rect(x0, y0, x1, y1))
+        return [e for e in found if kind is None or e.kind == kind]
+
+    def quake(self, terrain, x, y, magnitude=None):
+        """Registra un temblor; si ya hay uno activo al lado, lo reaviva."""
+        rng = self.rng
+        if magnitude is None:
+            magnitude = int(rng.integers(4, 10))  # Magnitud como en simulador.py
+        active = self.near(x, y, QUAKE_MERGE_RADIUS, QUAKE)
+        if active:
+            event = active[0]
+            event.age = 0
+            event.magnitude = max(event.magnitude, magnitude)
+            return event
+        event = self.add(QUAKE, x, y, magnitude, QUAKE_LIFETIME)
+        # El suelo se hunde alrededor del epicentro
+        displace(terrain, event.x, event.y, 3, -QUAKE_SUBSIDENCE * magnitude)
+        return event
+
+    def _try_volcano(self, heights):
+        rng = self.rng
+        rows, cols = self.shape
+        for cell in rng.integers(rows * cols, size=VOLCANO_TRIES).tolist():
+            y, x = divmod(cell, cols)
+            if heights[y, x] > VOLCANO_HEIGHT and not self.near(x, y, VOLCANO_SPACING, VOLCANO):
+                return self.add(VOLCANO, x, y, int(rng.integers(1, 6)), int(rng.integers(*VOLCANO_LIFETIME)))
+        return None
+
+    def step(self, terrain, earthquake_points=(), volcano_rate=VOLCANO_RATE):
+        """Avanza un paso: envejece, registra ``earthquake_points`` y aplica lava y hundimientos."""
+        heights = np.asarray(terrain)
+        for event in list(self.events.values()):
+            event.age += 1
+            if event.age >= event.lifetime:
+                self.remove(event)
+            elif event.kind == VOLCANO:
+                displace(terrain, event.x, event.y, 2 + event.magnitude, VOLCANO_UPLIFT * event.magnitude)
+        for x, y in earthquake_points:
+            self.quake(terrain, x, y)
+        if self.volcanoes < MAX_VOLCANOES and self.rng.random() < volcano_rate:
+            self._try_volcano(heights)
+
+    def snapshot(self):
+        """Copia de los eventos y del índice para dibujarlos sin el candado de la simulación."""
+        copy = EventModel(self.shape, self.index.bucket, self.rng)
+        for event in self.events.values():
+            clone = GeoEvent(event.id, event.kind, event.x, event.y, event.magnitude,
+                             event.lifetime, event.age)
+            copy.events[clone.id] = clone
+            copy.index.insert(clone.id, clone.x, clone.y)
+        copy.volcanoes = self.volcanoes
+        copy._next_id = self._next_id
+        return copy
+
+    def clear(self):
+        for event in list(self.events.values()):
+            self.remove(event)
+
+    def to_state(self):
+        return {'next_id': self._next_id,
+                'events': [[e.id] + e.to_state() for e in self.events.values()]}
+
+    @classmethod
+    def from_state(cls, shape, data, bucket=16, rng=None):
+        model = cls(shape, bucket, rng)
+        for item in data['events']:
+            event = GeoEvent.from_state(item[0], item[1:])
+            model.events[event.id] = event
+            model.index.insert(event.id, event.x, event.y)
+            model.volcanoes += event.kind == VOLCANO
+        model._next_id = data['next_id']
+        return model
@@ -0,0 +1,181 @@
+"""Simulación por lotes sin ventana ni pygame.
+
+Avanza ``simulate_plate_tectonics`` y la erosión durante muchos pasos (o
+solo la erosión hidráulica), guarda instantáneas de alturas en ``.npy`` e
+informa del rendimiento.
+"""
+import os
+import random
+import time
+
+import numpy as np
+
+from tectonics import checkpoint, erosion
+from tectonics.hydraulics import HydraulicErosion
+from tectonics.parallel import ParallelErosion
+from tectonics.snapshots import SnapshotWriter
+from tectonics.simulation import (
+    NOISE_SCALE, create_plates_from_lines, create_random_plates, generate_terrain,
+    plates_from_state, plates_to_state, random_dividing_line, simulate_plate_tectonics,
+)
+
+EROSION_RATE = 0.01
+
+
+def parse_size(text):
+    """Convierte ``ANCHOxALTO`` (columnas x filas) en ``(filas, columnas)``."""
+    try:
+        cols, rows = (int(part) for part in text.lower().split('x'))
+    except ValueError:
+        raise ValueError(f"tamaño inválido {text!r}, se esperaba ANCHOxALTO") from None
+    if rows <= 0 or cols <= 0:
+        raise ValueError(f"tamaño inválido {text!r}")
+    return rows, cols
+
+
+def checkpoint_state(plates, rng, erosion_rate):
+    """Estado del lote que no está en las alturas, listo para ``checkpoint.save``."""
+    return {
+        'plates': plates_to_state(plates),
+        'erosion_rate': erosion_rate,
+        'rng': rng.bit_generator.state,
+        'random': random.getstate(),
+    }
+
+
+def restore_state(state, rng, shape):
+    """Recupera las placas y los generadores aleatorios de un punto de control."""
+    # Las placas se crean antes porque su constructor consume números aleatorios
+    plates = plates_from_state(state['plates'], shape)
+    rng.bit_generator.state = state['rng']
+    version, internal, gauss = state['random']
+    random.setstate((version, tuple(internal), gauss))
+    return plates
+
+
+def run(steps, rows, cols, out_dir=None, snapshot_every=0, report_every=1000,
+        seed=None, erosion_rate=EROSION_RATE, noise_scale=NOISE_SCALE,
+        checkpoint_path=None, checkpoint_every=0, resume=False, plate_count=0, workers=None,
+        erosion_workers=1, snapshot_format='npy', snapshot_policy='block', snapshot_queue=8,
+        log=print):
+    """Ejecuta hasta el paso ``steps`` y devuelve ``(terrain, pasos_por_segundo)``.
+
+    Con ``checkpoint_path`` guarda el estado completo cada ``checkpoint_every``
+    pasos y al terminar; con ``resume`` continúa desde ese archivo si existe,
+    con la ``erosion_rate`` guardada en él (avisa si no coincide con la pedida).
+    Con ``plate_count`` la rejilla se reparte en ese número de placas móviles;
+    si no, se divide en dos con una divisoria al azar. ``workers`` es el
+    número de procesos para generar el terreno inicial y ``erosion_workers``
+    los que reparten la erosión de cada paso (mismo resultado que en serie).
+    Las instantáneas de ``out_dir`` las escribe un ``SnapshotWriter`` en otro
+    hilo con el formato, la política y el tamaño de cola indicados.
+    """
+    if seed is not None:
+        random.seed(seed)
+    rng = erosion.make_rng(seed)
+
+    first_step = 0
+    if resume and checkpoint_path and os.path.exists(checkpoint_path):
+        terrain, first_step, state = checkpoint.load(checkpoint_path, mmap=False)
+        rows, cols = terrain.shape
+        plates = restore_state(state, rng, terrain.shape)
+        saved_rate = state.get('erosion_rate', erosion_rate)
+        if saved_rate != erosion_rate:
+            log(f"aviso: se usa la tasa de erosión del punto de control ({saved_rate}), "
+                f"no {erosion_rate}")
+            erosion_rate = saved_rate
+        log(f"reanudando desde el paso {first_step} ({checkpoint_path})")
+    else:
+        terrain = generate_terrain(rows, cols, scale=noise_scale, workers=workers)
+        if plate_count:
+            plates = create_random_plates((rows, cols), plate_count, rng)
+        else:
+            plates = create_plates_from_lines(random_dividing_line(rows, cols), (rows, cols))
+    writer = checkpoint.CheckpointWriter(checkpoint_path, checkpoint_every, first_step) \
+        if checkpoint_path else None
+    snapshots = SnapshotWriter(out_dir, snapshot_format, snapshot_queue, snapshot_policy) \
+        if out_dir else None
+    if snapshots is not None:
+        snapshots.submit(first_step, terrain)
+
+    start = last_time = time.perf_counter()
+    last_step = first_step
+    # Con varios procesos el terreno pasa a memoria compartida hasta cerrar el backend
+    backend = ParallelErosion(terrain.shape, erosion_workers) if erosion_workers > 1 else None
+    erode = backend.apply if backend is not None else erosion.apply_erosion
+    try:
+        for step in range(first_step + 1, steps + 1):
+            terrain, earthquake_points = simulate_plate_tectonics(terrain, plates, rng)
+            erode(terrain, erosion_rate, rng)
+            if writer is not None:
+                writer.maybe_save(step, terrain, lambda: checkpoint_state(plates, rng, erosion_rate))
+
+            if snapshots is not None and snapshot_every and step % snapshot_every == 0:
+                snapshots.submit(step, terrain)
+            if report_every and step % report_every == 0:
+                now = time.perf_counter()
+                log(f"paso {step}/{steps}: {(step - last_step) / (now - last_time):.1f} pasos/s")
+                last_time, last_step = now, step
+    finally:
+        if backend is not None:
+            backend.close()
+
+    elapsed = time.perf_counter() - start
+    done = max(0, steps - first_step)
+    rate = done / elapsed if elapsed > 0 else float('inf')
+    if snapshots is not None:
+        if not snapshot_every or steps % snapshot_every:
+            snapshots.submit(steps, terrain)
+        log_snapshot_stats(snapshots.close(), log)
+    if writer is not None and writer.last_step != max(steps, first_step):
+        writer.save(max(steps, first_step), terrain, checkpoint_state(plates, rng, erosion_rate))
+    log(f"{done} pasos de {cols}x{rows} en {elapsed:.2f} s: {rate:.1f} pasos/s, "
+        f"{rate * rows * cols / 1e6:.1f} Mceldas/s")
+    return terrain, rate
+
+
+def log_snapshot_stats(stats, log=print):
+    log(f"instantáneas: {stats['written']} escritas, {stats['dropped']} descartadas, "
+        f"{stats['frames_per_s']:.1f} instantáneas/s, {stats['mb_per_s']:.1f} MB/s "
+        f"(cola máxima {stats['max_backlog']})")
+
+
+def run_hydraulics(iterations, rows, cols, out_dir=None, snapshot_every=0, report_every=500,
+                   noise_scale=NOISE_SCALE, workers=None, snapshot_format='npy',
+                   snapshot_policy='block', snapshot_queue=8, log=print, **params):
+    """Erosión hidráulica de un terreno nuevo; devuelve ``(terrain, hydraulics, iteraciones_por_segundo)``.
+
+    ``params`` se pasa a ``HydraulicErosion`` (``rain``, ``capacity``...). En
+    ``out_dir`` se guardan las alturas y, al final, el agua (``water.npy``),
+    donde se ven los ríos.
+    """
+    terrain = generate_terrain(rows, cols, scale=noise_scale, workers=workers)
+    hydraulics = HydraulicErosion(terrain.shape, **params)
+    megacells = rows * cols / 1e6
+    snapshots = SnapshotWriter(out_dir, snapshot_format, snapshot_queue, snapshot_policy) \
+        if out_dir else None
+    if snapshots is not None:
+        snapshots.submit(0, terrain)
+
+    start = last_time = time.perf_counter()
+    last = 0
+    for iteration in range(1, iterations + 1):
+        hydraulics.step(terrain)
+        if snapshots is not None and snapshot_every and iteration % snapshot_every == 0:
+            snapshots.submit(iteration, terrain)
+        if report_every and iteration % report_every == 0:
+            now = time.perf_counter()
+            rate = (iteration - last) / (now - last_time)
+            log(f"iteración {iteration}/{iterations}: {rate:.1f} it/s, {rate * megacells:.2f} it/s·Mcelda")
+            last_time, last = now, iteration
+
+    elapsed = time.perf_counter() - start
+    rate = iterations / elapsed if elapsed > 0 else float('inf')
+    if snapshots is not None:
+        if not snapshot_every or iterations % snapshot_every:
+            snapshots.submit(iterations, terrain)
+        log_snapshot_stats(snapshots.close(), log)
+        np.save(os.path.join(out_dir, 'water.npy'), hydraulics.water)
+    log(f"{iterations} iteraciones de {cols}x{rows} en {elapsed:.2f} s: {rate:.1f} it/s, "
+        f"{rate * megacells:.2f} it/s·Mcelda")
+    return terrain, hydraulics, rate
@@ -0,0 +1,170 @@
+"""Historial de deshacer/rehacer para las ediciones del terreno.
+
+Cada entrada guarda solo la caja de celdas que cambió un trazo, comprimida
+con zlib, y no una copia del terreno entero. Deshacer intercambia el parche
+guardado con el contenido actual de la caja, así que la misma entrada sirve
+después para rehacer. El tamaño total está limitado por ``max_bytes``: al
+pasarse se olvidan las entradas más antiguas.
+"""
+import zlib
+from collections import deque
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+TILE = 32  # Lado de los bloques en que se guardan los valores originales de un trazo
+
+
+def _pack(patch, level):
+    """Comprime un parche float32 separando el byte alto del resto.
+
+    Solo se comprime el byte más significativo (signo y exponente), que se
+    repite mucho; los bytes de mantisa del ruido son casi aleatorios y zlib
+    tardaría decenas de ms en ahorrar muy poco. Devuelve ``(alto, medio, bajo)``.
+    """
+    bits = np.ascontiguousarray(patch).reshape(-1).view(np.uint32)
+    high = (bits >> 24).astype(np.uint8)
+    middle = (bits >> 16).astype(np.uint8)
+    low = bits.astype(np.uint16)
+    return zlib.compress(high, level), middle.tobytes(), low.tobytes()
+
+
+def _unpack(data, shape):
+    packed, middle, low = data
+    bits = np.frombuffer(zlib.decompress(packed), dtype=np.uint8).astype(np.uint32) << 24
+    bits |= np.frombuffer(middle, dtype=np.uint8).astype(np.uint32) << 16
+    bits |= np.frombuffer(low, dtype=np.uint16)
+    return bits.view(np.float32).reshape(shape)
+
+
+class _Entry:
+    """Una edición: caja ``(x0, y0, x1, y1)`` con su parche y/o las divisorias."""
+
+    __slots__ = ('box', 'data', 'lines')
+
+    def __init__(self, box, data, lines):
+        self.box = box
+        self.data = data
+        self.lines = lines
+
+    @property
+    def nbytes(self):
+        return sum(len(part) for part in self.data) if self.data is not None else 0
+
+
+class EditHistory:
+    """Pilas de deshacer/rehacer de parches de terreno y de divisorias.
+
+    Durante un trazo, ``touch`` se llama con la caja que se va a modificar
+    *antes* de escribir en ella; ``commit`` cierra el trazo y lo apila.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, level=1):
+        self.max_bytes = max_bytes
+        self.level = level
+        self._undo = deque()
+        self._redo = []
+        self._nbytes = 0
+        self._originals = {}  # (fila, columna) de bloque -> valores antes del trazo
+        self._box = None      # Caja acumulada del trazo abierto
+
+    @property
+    def nbytes(self):
+        """Bytes comprimidos que ocupan las dos pilas."""
+        return self._nbytes
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def touch(self, terrain, x0, y0, x1, y1):
+        """Guarda los valores originales de ``[y0:y1, x0:x1]`` si el trazo abierto aún no los tenía."""
+        rows, cols = terrain.shape
+        x0, y0, x1, y1 = max(0, x0), max(0, y0), min(cols, x1), min(rows, y1)
+        if x0 >= x1 or y0 >= y1:
+            return
+        if self._box is None:
+            self._box = (x0, y0, x1, y1)
+        else:
+            bx0, by0, bx1, by1 = self._box
+            self._box = (min(bx0, x0), min(by0, y0), max(bx1, x1), max(by1, y1))
+        heights = np.asarray(terrain)
+        for ty in range(y0 // TILE, (y1 - 1) // TILE + 1):
+            for tx in range(x0 // TILE, (x1 - 1) // TILE + 1):
+                if (ty, tx) not in self._originals:
+                    self._originals[ty, tx] = heights[ty * TILE:(ty + 1) * TILE, tx * TILE:(tx + 1) * TILE].copy()
+
+    def commit(self, terrain):
+        """Cierra el trazo abierto y lo apila; no hace nada si no se tocó el terreno."""
+        if self._box is None:
+            return False
+        x0, y0, x1, y1 = self._box
+        before = np.asarray(terrain)[y0:y1, x0:x1].copy()
+        # Las celdas de la caja fuera de los bloques tocados no cambiaron
+        for (ty, tx), original in self._originals.items():
+            ty0, tx0 = ty * TILE, tx * TILE
+            h, w = original.shape
+            sy0, sx0 = max(ty0, y0), max(tx0, x0)
+            sy1, sx1 = min(ty0 + h, y1), min(tx0 + w, x1)
+            before[sy0 - y0:sy1 - y0, sx0 - x0:sx1 - x0] = original[sy0 - ty0:sy1 - ty0, sx0 - tx0:sx1 - tx0]
+        entry = _Entry(self._box, _pack(before, self.level), None)
+        self._originals = {}
+        self._box = None
+        self._push(entry)
+        return True
+
+    def record_lines(self, lines):
+        """Apila el estado de las divisorias antes de modificarlas."""
+        self._push(_Entry(None, None, list(lines)))
+
+    def _push(self, entry):
+        self._nbytes -= sum(e.nbytes for e in self._redo)
+        self._redo.clear()
+        self._undo.append(entry)
+        self._nbytes += entry.nbytes
+        # Se olvidan las ediciones más antiguas, pero nunca la recién hecha
+        while self._nbytes > self.max_bytes and len(self._undo) > 1:
+            self._nbytes -= self._undo.popleft().nbytes
+
+    def _swap(self, entry, terrain, lines):
+        """Intercambia el contenido de ``entry`` con el estado actual; devuelve las divisorias."""
+        if entry.box is not None:
+            x0, y0, x1, y1 = entry.box
+            region = np.asarray(terrain)[y0:y1, x0:x1]
+            current = _pack(region, self.level)
+            region[...] = _unpack(entry.data, region.shape)
+            terrain.mark_dirty(x0, y0, x1, y1)
+            self._nbytes -= entry.nbytes
+            entry.data = current
+            self._nbytes += entry.nbytes
+        if entry.lines is not None:
+            entry.lines, lines = list(lines), list(entry.lines)
+        return lines
+
+    def undo(self, terrain, lines):
+        """Deshace la última edición; devuelve las divisorias resultantes."""
+        if not self._undo:
+            return lines
+        entry = self._undo.pop()
+        lines = self._swap(entry, terrain, lines)
+        self._redo.append(entry)
+        return lines
+
+    def redo(self, terrain, lines):
+        """Rehace la última edición deshecha; devuelve las divisorias resultantes."""
+        if not self._redo:
+            return lines
+        entry = self._redo.pop()
+        lines = self._swap(entry, terrain, lines)
+        self._undo.append(entry)
+        return lines
+
+    def clear(self):
+        """Olvida todo el historial (al regenerar o cargar otro terreno)."""
+        self._undo.clear()
+        self._redo.clear()
+        self._nbytes = 0
+        self._originals = {}
+        self._box = None
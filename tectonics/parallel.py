@@ -0,0 +1,234 @@
+"""Generación de ruido y erosión en varios procesos por bandas de filas.
+
+Cada proceso del ``ProcessPoolExecutor`` trabaja sobre unas filas de un
+mismo array en memoria compartida (``multiprocessing.shared_memory``), así
+que no se devuelve nada por *pickle*: solo viajan el nombre del bloque y los
+límites de la banda. ``noise_grid`` usa coordenadas globales con
+``row_offset``, de modo que las bandas encajan sin costuras.
+"""
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from tectonics.erosion import erode_padded, make_rng, reach
+from tectonics.perlin import noise_grid
+from tectonics.terrain import Terrain
+
+# Por debajo de este tamaño arrancar procesos cuesta más de lo que se gana
+PARALLEL_MIN_CELLS = 4096 * 4096
+BANDS_PER_WORKER = 4  # Más bandas que procesos para repartir bien la carga
+
+
+def band_edges(rows, bands):
+    """Límites ``[(inicio, fin), ...]`` de hasta ``bands`` bandas de filas casi iguales."""
+    edges = np.unique(np.linspace(0, rows, max(1, bands) + 1).astype(int))
+    return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+
+def _fill_band(name, shape, start, stop, params):
+    """Trabajo de cada proceso: genera las filas ``[start, stop)`` en el bloque compartido."""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        params = dict(params, row_offset=params.get('row_offset', 0) + start)
+        noise_grid(stop - start, shape[1], out=out[start:stop], **params)
+        del out  # Sin vistas vivas para poder cerrar el bloque
+    finally:
+        shm.close()
+    return stop - start
+
+
+def parallel_noise_grid(rows, cols, scale, workers=None, bands=None, **params):
+    """Como ``noise_grid`` pero repartiendo bandas de filas entre ``workers`` procesos."""
+    workers = workers or os.cpu_count() or 1
+    bands = band_edges(rows, bands or workers * BANDS_PER_WORKER)
+    params = dict(params, scale=scale)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, rows * cols * 4))
+    try:
+        shared = np.ndarray((rows, cols), dtype=np.float32, buffer=shm.buf)
+        with ProcessPoolExecutor(max_workers=min(workers, len(bands))) as pool:
+            futures = [pool.submit(_fill_band, shm.name, (rows, cols), start, stop, params)
+                       for start, stop in bands]
+            for future in futures:
+                future.result()
+        # Copia propia: el bloque compartido se libera al salir
+        result = shared.copy()
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
+    return result
+
+
+def generate_noise(rows, cols, scale, workers=None, **params):
+    """``noise_grid`` en paralelo solo si compensa.
+
+    ``workers=None`` usa todos los núcleos para rejillas de al menos
+    ``PARALLEL_MIN_CELLS`` celdas y un solo proceso para las demás;
+    ``workers=1`` fuerza la versión secuencial.
+    """
+    if workers is None:
+        workers = (os.cpu_count() or 1) if rows * cols >= PARALLEL_MIN_CELLS else 1
+    if workers <= 1:
+        return noise_grid(rows, cols, scale, **params)
+    return parallel_noise_grid(rows, cols, scale, workers=workers, **params)
+
+
+# --- Erosión -----------------------------------------------------------------
+
+# Generadores cuyo ``advance`` salta pares de float32 (cada salida de 64 bits
+# da dos números de 32); con ellos cada banda genera su propio ruido
+SPLITTABLE_BIT_GENERATORS = {'PCG64': np.random.PCG64, 'PCG64DXSM': np.random.PCG64DXSM}
+
+_worker = {}  # Vistas de la memoria compartida dentro de cada proceso
+
+
+def _attach_erosion(heights_name, halo_name, shape, bands):
+    """Inicializador de cada proceso: abre los bloques compartidos una sola vez."""
+    cols = shape[1]
+    _worker['shm'] = [shared_memory.SharedMemory(name=heights_name),
+                      shared_memory.SharedMemory(name=halo_name)]
+    _worker['heights'] = np.ndarray(shape, dtype=np.float32, buffer=_worker['shm'][0].buf)
+    _worker['halo'] = np.ndarray((bands, 2, cols), dtype=np.float32, buffer=_worker['shm'][1].buf)
+
+
+def noise_cells(state, first, last):
+    """Ruido ``[first, last)`` de la secuencia que daría ``random(dtype=float32)`` desde ``state``.
+
+    Equivale a ``Generator(state).random(last, dtype=np.float32)[first:]``
+    pero salta directamente a ``first`` con ``advance``.
+    """
+    out = np.empty(last - first, dtype=np.float32)
+    i = 0
+    buffered = state['has_uint32']
+    if buffered and first == 0:
+        # El primer número sale de la mitad de 32 bits guardada
+        out[0] = (state['uinteger'] >> 8) * np.float32(1.0 / 16777216.0)
+        i = 1
+    index = first + i - buffered  # Posición contando desde la primera salida de 64 bits
+    bit_generator = SPLITTABLE_BIT_GENERATORS[state['bit_generator']]()
+    bit_generator.state = state
+    bit_generator.advance(index // 2)  # También descarta la mitad guardada
+    generator = np.random.Generator(bit_generator)
+    if index % 2:
+        generator.random(dtype=np.float32)  # Empieza en la mitad alta de una salida
+    if i < len(out):
+        generator.random(out=out[i:], dtype=np.float32)
+    return out
+
+
+def _erode_band(band, start, stop, rate, state):
+    """Trabajo de cada proceso: erosiona las filas ``[start, stop)`` en sitio.
+
+    Lee el borde de las bandas vecinas de la copia ``halo`` tomada antes del
+    paso, así que no importa si la vecina ya escribió sus filas.
+    """
+    heights = _worker['heights']
+    rows, cols = heights.shape
+    padded = np.full((stop - start + 2, cols + 2), np.nan, dtype=np.float32)
+    padded[1:-1, 1:-1] = heights[start:stop]
+    padded[0, 1:-1] = _worker['halo'][band, 0]
+    padded[-1, 1:-1] = _worker['halo'][band, 1]
+
+    # Ruido de la banda y de sus dos filas de borde, igual que en la versión en serie
+    first, last = max(0, start - 1), min(rows, stop + 1)
+    noise = np.zeros(padded.shape, dtype=np.float32)
+    top = 1 - (start - first)
+    noise[top:top + last - first, 1:-1] = noise_cells(state, first * cols, last * cols).reshape(-1, cols)
+
+    heights[start:stop] = erode_padded(padded, noise, rate)
+    return stop - start
+
+
+class ParallelErosion:
+    """``erosion.apply_erosion`` repartida por bandas de filas entre procesos.
+
+    El terreno vive en memoria compartida (``share`` mueve ahí las alturas de
+    un ``Terrain``); en cada paso se copian los bordes entre bandas (*halo*) y
+    cada proceso erosiona sus filas en sitio. Con el mismo ``rng`` el
+    resultado y el estado final del generador son idénticos a la versión en
+    serie. Hay que llamar a ``close`` (o usarla con ``with``) al terminar.
+    """
+
+    def __init__(self, shape, workers=None):
+        rows, cols = shape
+        self.shape = (rows, cols)
+        self.workers = workers or os.cpu_count() or 1
+        self.bands = band_edges(rows, self.workers)
+        self._shm = [shared_memory.SharedMemory(create=True, size=max(1, rows * cols * 4)),
+                     shared_memory.SharedMemory(create=True, size=max(1, len(self.bands) * 2 * cols * 4))]
+        self.heights = np.ndarray(self.shape, dtype=np.float32, buffer=self._shm[0].buf)
+        self._halo = np.ndarray((len(self.bands), 2, cols), dtype=np.float32, buffer=self._shm[1].buf)
+        self._shared = weakref.WeakSet()  # Terrenos cuyas alturas apuntan a la memoria compartida
+        self._pool = ProcessPoolExecutor(
+            max_workers=len(self.bands), initializer=_attach_erosion,
+            initargs=(self._shm[0].name, self._shm[1].name, self.shape, len(self.bands)))
+
+    def share(self, terrain):
+        """Copia las alturas a la memoria compartida y, si es un ``Terrain``, lo apunta a ella."""
+        heights = terrain.heights if isinstance(terrain, Terrain) else np.asarray(terrain)
+        if heights is self.heights:
+            return
+        if heights.shape != self.shape:
+            raise ValueError(f"el terreno mide {heights.shape}, se esperaba {self.shape}")
+        self.heights[...] = heights
+        if isinstance(terrain, Terrain):
+            terrain.heights = self.heights
+            self._shared.add(terrain)
+
+    def apply(self, terrain, rate, rng=None, changed=None):
+        """Un paso de erosión en sitio, como ``erosion.apply_erosion``.
+
+        Las bandas se erosionan en otros procesos, así que en ``changed`` se
+        marca lo que el paso puede tocar (``erosion.reach``), no solo lo que cambió.
+        """
+        rng = make_rng(rng)
+        state = rng.bit_generator.state
+        if state['bit_generator'] not in SPLITTABLE_BIT_GENERATORS:
+            from tectonics.erosion import apply_erosion  # Sin saltos en la secuencia: en serie
+            return apply_erosion(terrain, rate, rng, changed)
+
+        self.share(terrain)
+        heights = self.heights
+        if changed is not None:
+            reach(heights, out=changed)
+        rows = self.shape[0]
+        for band, (start, stop) in enumerate(self.bands):
+            self._halo[band, 0] = heights[start - 1] if start > 0 else np.nan
+            self._halo[band, 1] = heights[stop] if stop < rows else np.nan
+        futures = [self._pool.submit(_erode_band, band, start, stop, rate, state)
+                   for band, (start, stop) in enumerate(self.bands)]
+        for future in futures:
+            future.result()
+
+        # El generador queda como si hubiera sacado un float32 por celda
+        remaining = heights.size - state['has_uint32']
+        rng.bit_generator.advance(remaining // 2)
+        if remaining % 2:
+            rng.random(dtype=np.float32)
+        if not isinstance(terrain, Terrain):
+            np.asarray(terrain)[...] = heights
+        return terrain
+
+    def close(self):
+        """Para los procesos y libera la memoria compartida (los terrenos recuperan su copia)."""
+        if self._pool is None:
+            return
+        self._pool.shutdown()
+        self._pool = None
+        for terrain in list(self._shared):
+            if terrain.heights is self.heights:
+                terrain.heights = self.heights.copy()
+        del self.heights, self._halo
+        for shm in self._shm:
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,144 @@
+"""Sistema de partículas sobre arrays de NumPy preasignados.
+
+Posición, velocidad, color, opacidad, tamaño y vida de cada partícula viven
+en arrays de capacidad fija; las vivas ocupan siempre ``[0, count)``, así que
+crear, mover, envejecer y dibujar miles de partículas son unas pocas
+operaciones vectorizadas sin bucles por partícula.
+"""
+import numpy as np
+import pygame
+
+from tectonics.erosion import make_rng
+
+
+def sample_cells(cells, rate, rng=None):
+    """Índices de ``cells`` que emiten en este fotograma, cada uno con probabilidad ``rate``.
+
+    Equivale a tirar un dado por celda, pero solo cuesta en proporción a las
+    celdas elegidas: se sortea cuántas emiten y luego cuáles.
+    """
+    if len(cells) == 0:
+        return cells
+    rng = make_rng(rng)
+    return cells[rng.integers(len(cells), size=rng.binomial(len(cells), rate))]
+
+
+class ParticleSystem:
+    """Hasta ``capacity`` partículas; las que no caben al crearlas se descartan.
+
+    Las coordenadas y velocidades están en píxeles (y píxeles por segundo).
+    La opacidad baja linealmente hasta 0 a lo largo de la vida de cada una.
+    """
+
+    TILE = 32  # Lado en píxeles de las zonas de pantalla que devuelve ``draw``
+
+    def __init__(self, capacity, rng=None):
+        self.capacity = capacity
+        self.rng = make_rng(rng)
+        self.count = 0
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.vel = np.zeros((capacity, 2), dtype=np.float32)
+        self.color = np.zeros((capacity, 3), dtype=np.uint8)
+        self.alpha = np.zeros(capacity, dtype=np.float32)  # Opacidad inicial (0..1)
+        self.life = np.zeros(capacity, dtype=np.float32)  # Segundos que le quedan
+        self.lifetime = np.ones(capacity, dtype=np.float32)  # Vida total, para el desvanecido
+        self.size = np.ones(capacity, dtype=np.int32)  # Lado del cuadrado en píxeles
+        self.dropped = 0
+
+    def spawn(self, x, y, color, life=(0.5, 1.0), alpha=(0.5, 1.0), size=(1, 1),
+              speed=0.0, drift=(0.0, 0.0), jitter=0.0):
+        """Crea una partícula en cada ``(x, y)`` (arrays de píxeles); devuelve cuántas cupieron.
+
+        ``life``, ``alpha`` y ``size`` son rangos ``(mín, máx)`` sorteados por
+        partícula; ``speed`` es la rapidez en una dirección al azar, ``drift``
+        una velocidad común y ``jitter`` el desplazamiento máximo del origen.
+        ``color`` es un RGB o un array (n, 3) de colores.
+        """
+        x = np.asarray(x, dtype=np.float32).reshape(-1)
+        n = min(len(x), self.capacity - self.count)
+        self.dropped += len(x) - n
+        if n <= 0:
+            return 0
+        new = slice(self.count, self.count + n)
+        rng = self.rng
+        pos = self.pos[new]
+        pos[:, 0] = x[:n]
+        pos[:, 1] = np.asarray(y, dtype=np.float32).reshape(-1)[:n]
+        if jitter:
+            pos += rng.uniform(-jitter, jitter, (n, 2))
+        vel = self.vel[new]
+        vel[:] = drift
+        if speed:
+            angle = rng.uniform(0, 2 * np.pi, n)
+            vel[:, 0] += speed * np.cos(angle)
+            vel[:, 1] += speed * np.sin(angle)
+        color = np.asarray(color, dtype=np.uint8)
+        self.color[new] = color[:n] if color.ndim == 2 else color
+        self.life[new] = rng.uniform(*life, n)
+        self.lifetime[new] = self.life[new]
+        self.alpha[new] = rng.uniform(*alpha, n)
+        self.size[new] = rng.integers(size[0], size[1] + 1, n)
+        self.count += n
+        return n
+
+    def update(self, dt):
+        """Mueve y envejece las partículas ``dt`` segundos y compacta las que siguen vivas."""
+        live = slice(0, self.count)
+        self.pos[live] += self.vel[live] * dt
+        self.life[live] -= dt
+        alive = np.flatnonzero(self.life[live] > 0)
+        if len(alive) < self.count:
+            for array in (self.pos, self.vel, self.color, self.alpha, self.life, self.lifetime, self.size):
+                array[:len(alive)] = array[alive]
+            self.count = len(alive)
+
+    def clear(self):
+        self.count = 0
+
+    def draw(self, surface):
+        """Mezcla las partículas sobre ``surface`` y devuelve los ``Rect`` de las zonas tocadas.
+
+        Se escribe directamente en los píxeles (``surfarray.pixels3d``) con un
+        cuadrado de ``size`` píxeles por partícula; las zonas devueltas son
+        baldosas de ``TILE`` píxeles, listas para ``restore`` y ``display.update``.
+        """
+        if self.count == 0:
+            return []
+        width, height = surface.get_size()
+        live = slice(0, self.count)
+        corner = self.pos[live].astype(np.int32)
+        corner -= (self.size[live] // 2)[:, None]
+        opacity = self.alpha[live] * (self.life[live] / self.lifetime[live])
+        color = self.color[live].astype(np.float32)
+
+        tiles_x = -(-width // self.TILE)
+        pixels = pygame.surfarray.pixels3d(surface)  # Orden (x, y, canal)
+        tiles = []
+        for side in range(1, int(self.size[live].max()) + 1):
+            group = np.flatnonzero(self.size[live] >= side)
+            for dy in range(side):
+                for dx in range(side):
+                    if dx < side - 1 and dy < side - 1:
+                        continue  # Solo el borde nuevo: lo de dentro ya lo pintó un lado menor
+                    x = corner[group, 0] + dx
+                    y = corner[group, 1] + dy
+                    inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+                    x, y, which = x[inside], y[inside], group[inside]
+                    below = pixels[x, y].astype(np.float32)
+                    a = opacity[which, None]
+                    pixels[x, y] = below + (color[which] - below) * a
+                    tiles.append((y // self.TILE) * tiles_x + x // self.TILE)
+        del pixels  # Libera el bloqueo de la superficie
+
+        # Une las baldosas contiguas de cada fila en un solo rectángulo
+        rects = []
+        previous = None
+        for tile in np.unique(np.concatenate(tiles)).tolist():
+            if previous is not None and tile == previous + 1 and tile % tiles_x:
+                rects[-1].width += self.TILE
+            else:
+                rects.append(pygame.Rect((tile % tiles_x) * self.TILE, (tile // tiles_x) * self.TILE,
+                                         self.TILE, self.TILE))
+            previous = tile
+        bounds = surface.get_rect()
+        return [rect.clip(bounds) for rect in rects]
@@ -0,0 +1,169 @@
+"""Ruido Perlin vectorizado con NumPy.
+
+Reproduce ``noise.pnoise2`` (misma tabla de permutación, mismos gradientes y
+misma suma de octavas) pero calcula una rejilla completa en una sola llamada
+en lugar de una llamada por celda.
+"""
+import numpy as np
+
+# Tabla de permutación de Ken Perlin (la misma que usa la librería ``noise``)
+PERM = np.array([
+    151, 160, 137, 91, 90, 15, 131, 13, 201, 95, 96, 53, 194, 233, 7, 225,
+    140, 36, 103, 30, 69, 142, 8, 99, 37, 240, 21, 10, 23, 190, 6, 148,
+    247, 120, 234, 75, 0, 26, 197, 62, 94, 252, 219, 203, 117, 35, 11, 32,
+    57, 177, 33, 88, 237, 149, 56, 87, 174, 20, 125, 136, 171, 168, 68, 175,
+    74, 165, 71, 134, 139, 48, 27, 166, 77, 146, 158, 231, 83, 111, 229, 122,
+    60, 211, 133, 230, 220, 105, 92, 41, 55, 46, 245, 40, 244, 102, 143, 54,
+    65, 25, 63, 161, 1, 216, 80, 73, 209, 76, 132, 187, 208, 89, 18, 169,
+    200, 196, 135, 130, 116, 188, 159, 86, 164, 100, 109, 198, 173, 186, 3, 64,
+    52, 217, 226, 250, 124, 123, 5, 202, 38, 147, 118, 126, 255, 82, 85, 212,
+    207, 206, 59, 227, 47, 16, 58, 17, 182, 189, 28, 42, 223, 183, 170, 213,
+    119, 248, 152, 2, 44, 154, 163, 70, 221, 153, 101, 155, 167, 43, 172, 9,
+    129, 22, 39, 253, 19, 98, 108, 110, 79, 113, 224, 232, 178, 185, 112, 104,
+    218, 246, 97, 228, 251, 34, 242, 193, 238, 210, 144, 12, 191, 179, 162, 241,
+    81, 51, 145, 235, 249, 14, 239, 107, 49, 192, 214, 31, 181, 199, 106, 157,
+    184, 84, 204, 176, 115, 121, 50, 45, 127, 4, 150, 254, 138, 236, 205, 93,
+    222, 114, 67, 29, 24, 72, 243, 141, 128, 195, 78, 66, 215, 61, 156, 180,
+], dtype=np.intp)
+
+# Componentes (x, y) de los 16 gradientes de ``GRAD3``
+GRAD_X = np.array([1, -1, 1, -1, 1, -1, 1, -1, 0, 0, 0, 0, 1, -1, 0, 0], dtype=np.float64)
+GRAD_Y = np.array([1, 1, -1, -1, 0, 0, 0, 0, 1, -1, 1, -1, 0, 0, -1, 1], dtype=np.float64)
+
+
+def _perm_table(base):
+    """Repite la permutación lo suficiente para indexar con el desplazamiento ``base``."""
+    # En C el índice A + j puede pasarse de las 512 entradas cuando base > 0;
+    # aquí la tabla simplemente continúa de forma periódica.
+    reps = -(-(512 + base) // 256)
+    return np.tile(PERM, reps)
+
+
+def _lattice(t, repeat, base):
+    """Índices de la celda y fracción suavizada a lo largo de un eje."""
+    i = np.floor(np.fmod(t, repeat))
+    ii = np.fmod(i + 1, repeat).astype(np.intp)
+    i = i.astype(np.intp)
+    i = (i & 255) + base
+    ii = (ii & 255) + base
+    frac = t - np.floor(t)
+    fade = frac * frac * frac * (frac * (frac * 6 - 15) + 10)
+    return i, ii, frac, fade
+
+
+def _grad(perm, hashed, x, y):
+    h = perm[hashed] & 15
+    return GRAD_X[h] * x + GRAD_Y[h] * y
+
+
+def _noise2(x, y, repeatx, repeaty, base, perm):
+    i, ii, xf, fx = _lattice(x, repeatx, base)
+    j, jj, yf, fy = _lattice(y, repeaty, base)
+
+    a = perm[i]
+    b = perm[ii]
+    aa = perm[a + j]
+    ab = perm[a + jj]
+    ba = perm[b + j]
+    bb = perm[b + jj]
+
+    bottom = _grad(perm, aa, xf, yf)
+    bottom = bottom + fx * (_grad(perm, ba, xf - 1, yf) - bottom)
+    top = _grad(perm, ab, xf, yf - 1)
+    top = top + fx * (_grad(perm, bb, xf - 1, yf - 1) - top)
+    return bottom + fy * (top - bottom)
+
+
+def pnoise2(x, y, octaves=1, persistence=0.5, lacunarity=2.0,
+            repeatx=1024, repeaty=1024, base=0):
+    """Versión vectorizada de ``noise.pnoise2`` para arrays que se puedan difundir entre sí."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    perm = _perm_table(base)
+
+    freq = 1.0
+    amp = 1.0
+    total = 0.0
+    max_amp = 0.0
+    for _ in range(max(1, octaves)):
+        total = total + _noise2(x * freq, y * freq, repeatx * freq, repeaty * freq, base, perm) * amp
+        max_amp += amp
+        freq *= lacunarity
+        amp *= persistence
+    return total / max_amp
+
+
+def _octave_rows(xs, ys, freq, repeatx, repeaty, base, perm, grad_x, grad_y):
+    """Descompone una octava en productos fila x columna.
+
+    Dentro de un tramo de filas consecutivas que comparten celda de la
+    retícula el ruido es ``Q[y] @ U[tramo]``, con ``Q`` de 4 factores por fila
+    y ``U`` de 4 filas por columna. Devuelve ``Q``, ``U`` y el inicio de cada
+    tramo (más el final).
+    """
+    i, ii, xf, fx = _lattice(xs * freq, repeatx * freq, base)
+    j, jj, yf, fy = _lattice(ys * freq, repeaty * freq, base)
+
+    # Las filas con la misma celda (j, jj) comparten todos los hashes
+    key = j * 1024 + jj
+    starts = np.concatenate(([0], np.flatnonzero(key[1:] != key[:-1]) + 1, [len(key)]))
+    j = j[starts[:-1]][:, np.newaxis]
+    jj = jj[starts[:-1]][:, np.newaxis]
+    a = perm[i][np.newaxis, :]
+    b = perm[ii][np.newaxis, :]
+
+    gfx = 1 - fx
+    u = np.stack([
+        gfx * grad_x[a + j] * xf + fx * grad_x[b + j] * (xf - 1),
+        gfx * grad_y[a + j] + fx * grad_y[b + j],
+        gfx * grad_x[a + jj] * xf + fx * grad_x[b + jj] * (xf - 1),
+        gfx * grad_y[a + jj] + fx * grad_y[b + jj],
+    ], axis=1)
+
+    gfy = 1 - fy
+    q = np.stack([gfy, gfy * yf, fy, fy * (yf - 1)], axis=1)
+    return q, u, starts
+
+
+def noise_grid(rows, cols, scale, octaves=1, persistence=0.5, lacunarity=2.0,
+               repeatx=1024, repeaty=1024, base=0, row_offset=0, col_offset=0,
+               out=None, chunk_rows=256):
+    """Rellena un array (rows, cols) float32 con ``pnoise2(x / scale, y / scale)``.
+
+    La celda ``[y, x]`` usa las coordenadas globales ``x + col_offset`` e
+    ``y + row_offset``, así que varias bandas generadas por separado encajan
+    sin costuras. Se procesa por bloques de filas para acotar la memoria.
+    """
+    if out is None:
+        out = np.empty((rows, cols), dtype=np.float32)
+    perm = _perm_table(base)
+    # Gradiente final indexado directamente por A + j (dos saltos de permutación)
+    hashed = perm[perm] & 15
+    grad_x = GRAD_X[hashed]
+    grad_y = GRAD_Y[hashed]
+
+    xs = (np.arange(cols, dtype=np.float64) + col_offset) / scale
+    total = np.empty((min(rows, chunk_rows), cols), dtype=np.float64)
+    term = np.empty_like(total)
+    for start in range(0, rows, chunk_rows):
+        stop = min(rows, start + chunk_rows)
+        ys = (np.arange(start, stop, dtype=np.float64) + row_offset) / scale
+        acc = total[:stop - start]
+        tmp = term[:stop - start]
+        acc.fill(0)
+
+        freq = 1.0
+        amp = 1.0
+        max_amp = 0.0
+        for _ in range(max(1, octaves)):
+            q, u, starts = _octave_rows(xs, ys, freq, repeatx, repeaty, base, perm, grad_x, grad_y)
+            q *= amp
+            for k in range(len(starts) - 1):
+                lo, hi = starts[k], starts[k + 1]
+                np.matmul(q[lo:hi], u[k], out=tmp[lo:hi])
+            acc += tmp
+            max_amp += amp
+            freq *= lacunarity
+            amp *= persistence
+        np.divide(acc, max_amp, out=out[start:stop], casting='unsafe')
+    return out
@@ -0,0 +1,422 @@
+"""Mapa de propiedad de placas y movimiento real de cada placa.
+
+Cada celda guarda en un raster ``uint8`` el id de la placa a la que
+pertenece. Las placas salen del relleno por inundación de las regiones que
+separan las divisorias dibujadas; cada paso se desplazan con su velocidad
+arrastrando su terreno, y los bordes se clasifican en convergentes o
+divergentes según la velocidad relativa de las dos placas. La deformación
+actúa en una zona de choque de ``COLLISION_RADIUS`` celdas a cada lado del
+borde, precalculada mientras las placas no se muevan.
+"""
+import base64
+import zlib
+
+import numpy as np
+
+from tectonics.boundaries import rasterize_polyline
+from tectonics.labeling import label
+
+MAX_PLATES = 255
+VACANT = MAX_PLATES  # Id provisional de las celdas que acaba de dejar una placa
+MOTION_SCALE = 0.05  # Celdas por paso por unidad de velocidad de TectonicPlate
+MIN_PLATE_AREA = 64  # Regiones más pequeñas se reparten entre sus vecinas
+NEW_CRUST_HEIGHT = -1.0  # Altura del fondo que queda al separarse una placa
+CONVERGENT_UPLIFT = 4.0  # Elevación por celda/paso de acercamiento en bordes convergentes
+SUBDUCTION_SINK = 2.0  # Hundimiento de la corteza oceánica que subduce en un borde convergente
+DIVERGENT_SINK = 4.0  # Hundimiento por celda/paso de separación en bordes divergentes
+COLLISION_RADIUS = 5  # Ancho en celdas de la zona de deformación a cada lado del borde
+ACTIVITY_PROBABILITY = 0.05  # Probabilidad por celda y paso de actividad tectónica
+EARTHQUAKE_PROBABILITY = 0.01  # Probabilidad de terremoto en una celda activa convergente
+MAX_HEIGHT = 15
+MIN_HEIGHT = -1
+
+
+def _extend_to_border(points, shape):
+    """Prolonga los extremos de la polilínea hasta el borde de la rejilla."""
+    if len(points) < 2:
+        return list(points)
+    rows, cols = shape
+    points = [tuple(map(float, p)) for p in points]
+
+    def extend(tip, previous):
+        dx, dy = tip[0] - previous[0], tip[1] - previous[1]
+        # Distancia (en múltiplos del segmento) hasta salir por un borde
+        ts = []
+        if dx:
+            ts.append(((cols - 1 if dx > 0 else 0) - tip[0]) / dx)
+        if dy:
+            ts.append(((rows - 1 if dy > 0 else 0) - tip[1]) / dy)
+        t = min((t for t in ts if t >= 0), default=0)
+        return tip[0] + dx * t, tip[1] + dy * t
+
+    start = extend(points[0], points[1])
+    end = extend(points[-1], points[-2])
+    return [start] + points + [end]
+
+
+def _fill_unassigned(ids, unassigned):
+    """Da a cada celda sin placa la de una vecina, creciendo las regiones a la vez."""
+    while unassigned.any():
+        grown = False
+        for axis, shift in ((0, 1), (0, -1), (1, 1), (1, -1)):
+            neighbour = np.roll(ids, shift, axis=axis)
+            edge = [slice(None), slice(None)]
+            edge[axis] = 0 if shift == 1 else -1
+            owned = ~np.roll(unassigned, shift, axis=axis)
+            owned[tuple(edge)] = False  # np.roll da la vuelta al borde
+            take = unassigned & owned
+            if take.any():
+                ids[take] = neighbour[take]
+                unassigned &= ~take
+                grown = True
+        if not grown:
+            break
+
+
+class PlateField:
+    """Raster de ids de placa (``uint8``) y las placas que se mueven sobre él.
+
+    ``plates[i]`` es el ``TectonicPlate`` del id ``i``: su ``velocity`` (por
+    ``MOTION_SCALE``) es el desplazamiento en celdas por paso y su ``type``
+    decide quién monta sobre quién en las colisiones.
+    """
+
+    def __init__(self, ids, plates):
+        if len(plates) > MAX_PLATES:
+            raise ValueError(f"como mucho {MAX_PLATES} placas, hay {len(plates)}")
+        self.ids = np.ascontiguousarray(ids, dtype=np.uint8)
+        self.plates = list(plates)
+        self.offsets = np.zeros((len(self.plates), 2))  # Desplazamiento fraccionario acumulado
+        self._boundary = None
+        self._zone = None
+        self._bboxes = self._bounding_boxes()
+        # Peso de cada placa en la deriva común que se descuenta al moverlas
+        areas = np.bincount(self.ids.reshape(-1), minlength=len(self.plates))[:len(self.plates)]
+        self._weights = areas / max(1, areas.sum())
+
+    @classmethod
+    def from_regions(cls, labels, count, plate_factory):
+        """Crea el campo a partir de regiones etiquetadas ``1..count`` (0 = sin asignar)."""
+        labels = np.asarray(labels)
+        areas = np.bincount(labels.ravel(), minlength=count + 1)
+        # Regiones grandes primero; las diminutas o que no caben se reparten
+        order = [r for r in np.argsort(-areas[1:], kind='stable') + 1
+                 if areas[r] >= MIN_PLATE_AREA][:MAX_PLATES]
+        if not order:
+            # Sin regiones útiles toda la rejilla es una sola placa
+            return cls(np.zeros(labels.shape, dtype=np.uint8), [plate_factory()])
+        lut = np.full(count + 1, MAX_PLATES, dtype=np.uint8)
+        lut[order] = np.arange(len(order))
+        ids = lut[labels]
+        _fill_unassigned(ids, ids == MAX_PLATES)
+        return cls(ids, [plate_factory() for _ in order])
+
+    @classmethod
+    def from_lines(cls, lines, shape, plate_factory):
+        """Rellena por inundación las regiones que separan las divisorias ``lines``."""
+        barrier = np.zeros(shape, dtype=bool)
+        if len(lines) >= 2:
+            # Radio > 1/√2 para que la divisoria no tenga huecos en diagonal
+            cells, _ = rasterize_polyline(_extend_to_border(lines, shape), shape, 0.75)
+            barrier.reshape(-1)[cells] = True
+        labels, count = label(~barrier)
+        return cls.from_regions(labels, count, plate_factory)
+
+    @classmethod
+    def from_seeds(cls, shape, count, plate_factory, rng=None):
+        """Divide la rejilla en ``count`` placas de Voronoi alrededor de puntos al azar."""
+        rng = np.random.default_rng(rng)
+        rows, cols = shape
+        seeds = rng.random((count, 2)) * (cols, rows)
+        ys, xs = np.ogrid[:rows, :cols]
+        best = np.full(shape, np.inf, dtype=np.float32)
+        labels = np.zeros(shape, dtype=np.int32)
+        for i, (sx, sy) in enumerate(seeds):
+            distance = (xs - np.float32(sx)) ** 2 + (ys - np.float32(sy)) ** 2
+            closer = distance < best
+            best[closer] = distance[closer]
+            labels[closer] = i + 1
+        return cls.from_regions(labels, count, plate_factory)
+
+    def _bounding_boxes(self):
+        """Caja ``(x0, y0, x1, y1)`` que contiene las celdas de cada placa."""
+        rows, cols = self.ids.shape
+        n = len(self.plates)
+        in_row = np.zeros((rows, n), dtype=bool)
+        in_col = np.zeros((cols, n), dtype=bool)
+        in_row[np.arange(rows)[:, None], self.ids] = True
+        in_col[np.arange(cols)[None, :], self.ids] = True
+        boxes = []
+        for plate in range(n):
+            ys, xs = np.flatnonzero(in_row[:, plate]), np.flatnonzero(in_col[:, plate])
+            if len(ys) == 0:
+                boxes.append((0, 0, 0, 0))
+            else:
+                boxes.append((int(xs[0]), int(ys[0]), int(xs[-1]) + 1, int(ys[-1]) + 1))
+        return boxes
+
+    @property
+    def shape(self):
+        return self.ids.shape
+
+    def __len__(self):
+        return len(self.plates)
+
+    def __iter__(self):
+        return iter(self.plates)
+
+    def velocities(self):
+        """Velocidad de cada placa en celdas por paso, (n, 2) con columnas (x, y)."""
+        return np.array([p.velocity for p in self.plates], dtype=float).reshape(-1, 2) * MOTION_SCALE
+
+    def boundaries(self):
+        """Pares de celdas vecinas de placas distintas y su velocidad de acercamiento.
+
+        Devuelve ``(a, b, closing)`` con índices planos; ``closing > 0`` es un
+        borde convergente y ``closing < 0`` uno divergente.
+        """
+        if self._boundary is None:
+            cols = self.ids.shape[1]
+            velocity = self.velocities()
+            flat = self.ids.reshape(-1)
+            # Vecina a la derecha (normal +x) y vecina de abajo (normal +y),
+            # comparando el array plano desplazado (más rápido que en 2D)
+            a_h = np.flatnonzero(flat[:-1] != flat[1:])
+            a_h = a_h[a_h % cols != cols - 1]  # La última columna no tiene vecina a la derecha
+            a_v = np.flatnonzero(flat[:-cols] != flat[cols:])
+            a = np.concatenate((a_h, a_v))
+            b = np.concatenate((a_h + 1, a_v + cols))
+            relative = velocity[flat[a]] - velocity[flat[b]]
+            closing = np.concatenate((relative[:len(a_h), 0], relative[len(a_h):, 1]))
+            self._boundary = (a, b, closing)
+        return self._boundary
+
+    def step(self, terrain, rng=None):
+        """Mueve las placas un paso y deforma sus bordes; devuelve los terremotos ``(x, y)``."""
+        rng = np.random.default_rng() if rng is None else rng
+        heights = np.asarray(terrain)
+        moved = self.advect(heights)
+        if len(moved):
+            self._boundary = self._zone = None
+            terrain.mark_cells(moved)
+        return self._deform_boundaries(terrain, heights, rng)
+
+    def advect(self, heights):
+        """Desplaza en celdas enteras las placas cuyo desplazamiento acumulado lo permite.
+
+        Devuelve los índices planos de las celdas tocadas (vacío si ninguna
+        placa avanzó una celda entera).
+        """
+        # El mapa sigue a las placas: sin la deriva media (ponderada por área)
+        # todas se irían a la vez por el mismo borde
+        velocity = self.velocities()
+        self.offsets += velocity - self._weights @ velocity
+        shifts = np.trunc(self.offsets).astype(np.int64)
+        self.offsets -= shifts
+        moving = shifts.any(axis=1)
+        if not moving.any():
+            return np.empty(0, dtype=np.int64)
+
+        rows, cols = heights.shape
+        flat_h = heights.reshape(-1)
+        flat_ids = self.ids.reshape(-1)
+        moves = []
+        for plate in np.flatnonzero(moving):
+            dx, dy = shifts[plate]
+            x0, y0, x1, y1 = self._bboxes[plate]
+            # Solo se buscan las celdas de la placa dentro de su caja
+            local_y, local_x = np.divmod(np.flatnonzero(self.ids[y0:y1, x0:x1] == plate), x1 - x0)
+            gx, gy = local_x + x0, local_y + y0
+            src = gy * cols + gx
+            if 0 <= x0 + dx and x1 + dx <= cols and 0 <= y0 + dy and y1 + dy <= rows:
+                tgt, incoming = src + (dy * cols + dx), flat_h[src]
+            else:
+                tx, ty = gx + dx, gy + dy
+                inside = (tx >= 0) & (tx < cols) & (ty >= 0) & (ty < rows)
+                tgt, incoming = (ty * cols + tx)[inside], flat_h[src[inside]]
+            moves.append((plate, src, tgt, incoming))
+            # Contra el borde del mapa la placa conserva la corteza que deja atrás
+            self._bboxes[plate] = (max(0, min(x0, x0 + dx)), max(0, min(y0, y0 + dy)),
+                                   min(cols, max(x1, x1 + dx)), min(rows, max(y1, y1 + dy)))
+
+        # Se levantan todas las placas que se mueven: sus celdas quedan vacías
+        for _, src, _, _ in moves:
+            flat_ids[src] = VACANT
+            flat_h[src] = NEW_CRUST_HEIGHT
+        # Cada placa se posa donde no hay nadie; si debajo hay una placa quieta
+        # u otra que ya se posó en este paso, esas celdas chocan
+        clashes = []
+        for plate, _, tgt, incoming in moves:
+            free = flat_ids[tgt] == VACANT
+            if not free.all():
+                clashes.append((tgt[~free], np.full(np.count_nonzero(~free), plate, dtype=np.uint8),
+                                incoming[~free]))
+                tgt, incoming = tgt[free], incoming[free]
+            flat_ids[tgt] = plate
+            flat_h[tgt] = incoming
+        if clashes:
+            self._collide(flat_h, flat_ids, moving, *map(np.concatenate, zip(*clashes)))
+
+        src = np.concatenate([move[1] for move in moves])
+        leaver = np.concatenate([np.full(len(move[1]), move[0], dtype=np.uint8) for move in moves])
+        left = flat_ids[src] == VACANT
+        if left.any():
+            self._fill_vacated(flat_ids, src[left], leaver[left], cols)
+        return np.concatenate([src] + [move[2] for move in moves])
+
+    def _continental(self):
+        return np.array([p.type == 'continental' for p in self.plates], dtype=bool)
+
+    def _collide(self, flat_h, flat_ids, moving, cells, owner, incoming):
+        """Resuelve las celdas a las que llega más de una placa (convergencia).
+
+        El relieve positivo se apila (se conserva hasta ``MAX_HEIGHT``); si todo
+        es fondo oceánico queda el más alto. La celda es de la placa continental;
+        a igualdad, de la quieta que ya estaba y luego de la que llega más alta.
+        """
+        spots = np.unique(cells)
+        resident = flat_ids[spots]  # Una placa quieta o la primera que se posó
+        plate = np.concatenate((owner, resident))
+        h = np.concatenate((incoming, flat_h[spots]))
+        stays = ~moving[plate]
+        group = np.searchsorted(spots, np.concatenate((cells, spots)))
+
+        land = np.bincount(group, weights=np.maximum(h, 0), minlength=len(spots))
+        floor = np.full(len(spots), -np.inf)
+        np.maximum.at(floor, group, h)
+        flat_h[spots] = np.where(land > 0, np.minimum(land, MAX_HEIGHT), floor)
+
+        rank = np.lexsort((h, stays, self._continental()[plate], group))
+        last = np.flatnonzero(np.append(group[rank][1:] != group[rank][:-1], True))
+        flat_ids[spots] = plate[rank[last]]
+
+    def _fill_vacated(self, flat_ids, cells, leaver, cols):
+        """Reparte la corteza nueva que deja una placa al alejarse.
+
+        Cada celda pasa a la placa vecina de la que se separa (la divergente);
+        si solo toca la placa que se fue, como contra el borde del mapa, sigue
+        siendo de esta.
+        """
+        size = flat_ids.size
+        while len(cells):
+            x = cells % cols
+            other = np.full(len(cells), VACANT, dtype=np.uint8)
+            own = other.copy()
+            for offset, valid in ((-cols, cells >= cols), (cols, cells < size - cols),
+                                  (-1, x > 0), (1, x < cols - 1)):
+                neighbour = np.where(valid, flat_ids[np.where(valid, cells + offset, cells)], VACANT)
+                other = np.where((other == VACANT) & (neighbour != VACANT) & (neighbour != leaver),
+                                 neighbour, other)
+                own[neighbour == leaver] = neighbour[neighbour == leaver]
+            choice = np.where(other != VACANT, other, own)
+            done = choice != VACANT
+            if not done.any():
+                choice, done = leaver, np.ones(len(cells), dtype=bool)  # Nadie alrededor: sin salida
+            flat_ids[cells[done]] = choice[done]
+            for plate in np.unique(choice[done]):
+                ys, xs = np.divmod(cells[done][choice[done] == plate], cols)
+                x0, y0, x1, y1 = self._bboxes[plate]
+                self._bboxes[plate] = (min(x0, int(xs.min())), min(y0, int(ys.min())),
+                                       max(x1, int(xs.max()) + 1), max(y1, int(ys.max()) + 1))
+            cells, leaver = cells[~done], leaver[~done]
+
+    def _collision_zone(self):
+        """Celdas a menos de ``COLLISION_RADIUS`` de un borde, dentro de su placa.
+
+        Devuelve ``(cells, origin, weight, seeds, side)``: índices planos de la
+        zona, el índice en ``seeds`` (las celdas de borde sin repetir) de la más
+        cercana a cada celda, por distancia Manhattan como una transformada de
+        distancia del raster de bordes, y un peso que baja linealmente con la
+        distancia. ``side`` da la semilla de cada celda ``a`` y luego ``b`` de
+        ``boundaries()``. Se recalcula solo cuando las placas se mueven.
+        """
+        if self._zone is None:
+            a, b, _ = self.boundaries()
+            seeds, side = np.unique(np.concatenate((a, b)), return_inverse=True)
+            flat_ids = self.ids.reshape(-1)
+            cols = self.ids.shape[1]
+            size = flat_ids.size
+            visited = np.zeros(size, dtype=bool)
+            visited[seeds] = True
+            frontier, origin = seeds, np.arange(len(seeds))
+            cells, origins, weights = [frontier], [origin], [np.ones(len(seeds), dtype=np.float32)]
+            for distance in range(1, COLLISION_RADIUS + 1):
+                x = frontier % cols
+                reached, came_from = [], []
+                for offset, valid in ((-cols, frontier >= cols), (cols, frontier < size - cols),
+                                      (-1, x > 0), (1, x < cols - 1)):
+                    step = frontier[valid] + offset
+                    # La zona crece hacia dentro de la placa de cada celda de borde;
+                    # marcar antes de la siguiente dirección evita repetidas
+                    fresh = ~visited[step] & (flat_ids[step] == flat_ids[frontier[valid]])
+                    step = step[fresh]
+                    visited[step] = True
+                    reached.append(step)
+                    came_from.append(origin[valid][fresh])
+                frontier, origin = np.concatenate(reached), np.concatenate(came_from)
+                cells.append(frontier)
+                origins.append(origin)
+                weights.append(np.full(len(frontier), 1 - distance / (COLLISION_RADIUS + 1), dtype=np.float32))
+            self._zone = (np.concatenate(cells), np.concatenate(origins), np.concatenate(weights), seeds, side)
+        return self._zone
+
+    def _deform_boundaries(self, terrain, heights, rng):
+        """Eleva o hunde la zona de choque de cada borde según el tipo de placa.
+
+        En un borde convergente la corteza oceánica subduce bajo la continental
+        (o bajo la oceánica más alta) y se hunde; el resto se eleva. En los
+        divergentes se hunden los dos lados. Cada paso solo una fracción
+        ``ACTIVITY_PROBABILITY`` de la zona está activa, con un cambio mayor en
+        proporción, lo que da un relieve irregular.
+        """
+        a, b, closing = self.boundaries()
+        if len(a) == 0:
+            return []
+        cells, origin, weight, seeds, side = self._collision_zone()
+        flat_h = heights.reshape(-1)
+        flat_ids = self.ids.reshape(-1)
+        continental = self._continental()
+        ha, hb = flat_h[a], flat_h[b]
+        cont_a, cont_b = continental[flat_ids[a]], continental[flat_ids[b]]
+        converging = closing > 0
+        sinks_a = ~cont_a & (cont_b | (ha < hb))
+        sinks_b = ~cont_b & (cont_a | (hb < ha))
+        rate = np.abs(closing)
+        delta_a = np.where(converging, np.where(sinks_a, -SUBDUCTION_SINK, CONVERGENT_UPLIFT), -DIVERGENT_SINK) * rate
+        delta_b = np.where(converging, np.where(sinks_b, -SUBDUCTION_SINK, CONVERGENT_UPLIFT), -DIVERGENT_SINK) * rate
+        # Cambio por paso de cada celda de borde, sumando todos sus pares (esquinas)
+        seed_delta = np.bincount(side, weights=np.concatenate((delta_a, delta_b)), minlength=len(seeds))
+        seed_converging = np.bincount(side, weights=np.tile(converging, 2), minlength=len(seeds)) > 0
+
+        # Celdas activas de la zona en este paso (con repetición, se acumulan)
+        active = rng.integers(0, len(cells), rng.binomial(len(cells), ACTIVITY_PROBABILITY))
+        touched = cells[active]
+        source = origin[active]
+        delta = seed_delta[source] * weight[active] / ACTIVITY_PROBABILITY
+        np.add.at(flat_h, touched, delta.astype(flat_h.dtype))
+        flat_h[touched] = np.clip(flat_h[touched], MIN_HEIGHT, MAX_HEIGHT)
+        terrain.mark_cells(touched)
+
+        quakes = touched[seed_converging[source] & (rng.random(len(touched)) < EARTHQUAKE_PROBABILITY)]
+        cols = heights.shape[1]
+        return list(zip((quakes % cols).tolist(), (quakes // cols).tolist()))
+
+    def to_state(self):
+        """Estado serializable en JSON; el raster va comprimido en base64."""
+        return {
+            'shape': list(self.ids.shape),
+            'ids': base64.b64encode(zlib.compress(self.ids.tobytes())).decode('ascii'),
+            'offsets': self.offsets.tolist(),
+            'weights': self._weights.tolist(),
+            'plates': [plate.to_state() for plate in self.plates],
+        }
+
+    @classmethod
+    def from_state(cls, data, plate_from_state):
+        ids = np.frombuffer(zlib.decompress(base64.b64decode(data['ids'])), dtype=np.uint8)
+        field = cls(ids.reshape(data['shape']).copy(), [plate_from_state(p) for p in data['plates']])
+        field.offsets = np.array(data['offsets'], dtype=float).reshape(-1, 2)
+        if 'weights' in data:  # Los puntos de control antiguos no los guardaban
+            field._weights = np.array(data['weights'], dtype=float)
+        return field
+
@@ -0,0 +1,88 @@
+"""Medición del tiempo por fase de cada fotograma.
+
+Guarda las últimas duraciones de cada fase para calcular percentiles y, a la
+vez, eventos en formato *Chrome trace* (``chrome://tracing`` o Perfetto) para
+ver en qué fase se pasa un fotograma de los 16 ms.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class FrameProfiler:
+    """Cronómetros por fase, seguros para usar desde el hilo de simulación.
+
+    ``history`` es cuántas duraciones recientes se guardan por fase y
+    ``max_events`` el tamaño del búfer circular de eventos de traza.
+    """
+
+    def __init__(self, history=240, max_events=100000, enabled=True):
+        self.history = history
+        self.enabled = enabled
+        self._samples = {}  # fase -> deque de duraciones en segundos
+        self._events = deque(maxlen=max_events)
+        self._threads = {}  # ident -> nombre del hilo, para la traza
+        self._origin = time.perf_counter_ns()
+
+    @contextmanager
+    def phase(self, name):
+        """Mide el bloque ``with`` como la fase ``name``."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter_ns())
+
+    def record(self, name, start_ns, end_ns):
+        """Añade una duración medida a mano (marcas de ``perf_counter_ns``)."""
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples.setdefault(name, deque(maxlen=self.history))
+        samples.append((end_ns - start_ns) / 1e9)
+
+        thread = threading.current_thread()
+        self._threads.setdefault(thread.ident, thread.name)
+        self._events.append((name, start_ns - self._origin, end_ns - start_ns, thread.ident))
+
+    def phases(self):
+        return list(self._samples)
+
+    def percentiles(self, name, qs=(50, 95, 99)):
+        """Percentiles en milisegundos de las últimas duraciones de ``name``."""
+        samples = self._samples.get(name)
+        if not samples:
+            return [0.0] * len(qs)
+        return [float(v) * 1000 for v in np.percentile(np.fromiter(samples, float), qs)]
+
+    def summary(self, qs=(50, 95, 99)):
+        """Lista de ``(fase, muestras, [percentiles en ms])`` en orden de aparición."""
+        return [(name, len(self._samples[name]), self.percentiles(name, qs))
+                for name in self.phases()]
+
+    def reset(self):
+        self._samples.clear()
+        self._events.clear()
+
+    def trace_events(self):
+        """Eventos en el formato JSON de Chrome trace (tiempos en microsegundos)."""
+        pid = os.getpid()
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                  for tid, name in list(self._threads.items())]
+        for name, start, duration, tid in list(self._events):
+            events.append({'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                           'ts': start / 1000, 'dur': duration / 1000})
+        return events
+
+    def export_chrome_trace(self, path):
+        """Escribe la traza para abrirla en https://ui.perfetto.dev o ``chrome://tracing``."""
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.trace_events(), 'displayTimeUnit': 'ms'}, f)
+        return path
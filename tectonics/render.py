@@ -0,0 +1,185 @@
+"""Renderizado del terreno con ``pygame.surfarray`` y una tabla de colores precalculada."""
+import numpy as np
+import pygame
+
+
+def hillshade(heights, azimuth=315.0, altitude=45.0, relief=1.0, sea_level=None):
+    """Iluminación entre 0 y 1 de cada celda según su pendiente (sombreado de relieve).
+
+    La luz llega desde ``azimuth`` (grados, 0 es arriba y crece en sentido
+    horario) con una elevación de ``altitude`` grados; ``relief`` exagera las
+    alturas. Por debajo de ``sea_level`` el terreno se toma plano, como el agua.
+    """
+    z = np.asarray(heights, dtype=np.float32)
+    if sea_level is not None:
+        z = np.maximum(z, np.float32(sea_level))
+    dzdy, dzdx = (np.gradient(z, axis=axis) if z.shape[axis] > 1 else np.zeros_like(z)
+                  for axis in (0, 1))
+    azimuth, altitude = np.radians(azimuth), np.radians(altitude)
+    lx = np.cos(altitude) * np.sin(azimuth)
+    ly = -np.cos(altitude) * np.cos(azimuth)  # Las filas crecen hacia abajo (sur)
+    dzdx *= relief
+    dzdy *= relief
+    # Producto escalar entre la normal (-dz/dx, -dz/dy, 1) normalizada y la luz
+    shade = np.sqrt(dzdx * dzdx + dzdy * dzdy + 1)
+    np.divide(np.sin(altitude) - lx * dzdx - ly * dzdy, shade, out=shade)
+    return np.clip(shade, 0, 1, out=shade)
+
+
+class TerrainRenderer:
+    """Pinta una rejilla de alturas de una sola vez en lugar de un rectángulo por celda.
+
+    ``color_for_height`` es la función de color del simulador (``get_color``);
+    se evalúa una única vez sobre alturas cuantizadas en pasos de
+    ``1 / steps_per_unit`` entre ``min_height`` y ``max_height``, así que los
+    umbrales enteros de los colores caen exactamente en el borde de un paso.
+
+    Con ``shading`` cada color se aclara u oscurece con ``hillshade``; la
+    tabla guarda ya cada color con ``SHADE_LEVELS`` intensidades de luz, así
+    que el sombreado solo cuesta al repintar las baldosas sucias. ``shading``
+    se puede cambiar en cualquier momento (el siguiente ``draw`` repinta todo).
+    """
+
+    TILE = 32  # Lado en celdas de las baldosas que se repintan
+    SHADE_LEVELS = 32  # Intensidades de luz distintas en la tabla sombreada
+    AMBIENT = 0.4  # Fracción del color que queda en las laderas a la sombra
+
+    def __init__(self, color_for_height, grid_size, min_height, max_height, steps_per_unit=16,
+                 shading=False, azimuth=315.0, altitude=45.0, relief=1.0, sea_level=None):
+        self.grid_size = grid_size
+        self.min_height = min_height
+        self.steps_per_unit = steps_per_unit
+        levels = int(round((max_height - min_height) * steps_per_unit)) + 1
+        heights = min_height + np.arange(levels) / steps_per_unit
+        self.lut_rgb = np.array([color_for_height(h) for h in heights], dtype=np.uint8)
+        self.shading = shading
+        self.light = dict(azimuth=azimuth, altitude=altitude, relief=relief, sea_level=sea_level)
+        # Un terreno plano recibe sin(altitude) de luz y conserva su color tal cual
+        light = np.linspace(0, 1, self.SHADE_LEVELS) / np.sin(np.radians(altitude))
+        factor = self.AMBIENT + (1 - self.AMBIENT) * light
+        self.shaded_rgb = np.clip(self.lut_rgb[:, None, :] * factor[None, :, None], 0, 255).astype(np.uint8)
+        self._lut = None  # Colores ya mapeados al formato de píxel de la superficie
+        self._shaded_lut = None
+        self._drawn_shading = None  # ``shading`` con el que se pintó la caché
+        self._surface = None
+        self._scaled = None
+
+    def quantize(self, heights, out=None):
+        """Convierte alturas en índices (int32) de la tabla de colores."""
+        idx = np.multiply(heights, self.steps_per_unit, dtype=np.float32)
+        idx -= self.min_height * self.steps_per_unit
+        if out is None:
+            out = np.empty(idx.shape, dtype=np.int32)
+        # Tras recortar a >= 0 la conversión a entero trunca igual que floor
+        return np.clip(idx, 0, len(self.lut_rgb) - 1, out=out, casting='unsafe')
+
+    def colorize(self, heights):
+        """Devuelve la imagen RGB (filas, columnas, 3) de las alturas."""
+        return self.lut_rgb[self.quantize(heights)]
+
+    def _prepare(self, cols, rows):
+        """Crea las superficies de caché; devuelve True si hubo que recrearlas."""
+        created = False
+        if self._surface is None or self._surface.get_size() != (cols, rows):
+            # Superficie de 32 bits para poder escribir los píxeles con pixels2d
+            self._surface = pygame.Surface((cols, rows), 0, 32)
+            self._lut = np.array([self._surface.map_rgb(tuple(color)) for color in self.lut_rgb],
+                                 dtype=np.uint32)
+            self._shaded_lut = pygame.surfarray.map_array(self._surface, self.shaded_rgb).astype(np.uint32).ravel()
+            self._index = np.empty((rows, cols), dtype=np.int32)
+            self._scaled = None
+            created = True
+        size = (cols * self.grid_size, rows * self.grid_size)
+        if self.grid_size == 1:
+            self._scaled = self._surface
+        elif self._scaled is None or self._scaled.get_size() != size:
+            self._scaled = pygame.Surface(size, 0, self._surface)
+            created = True
+        return created
+
+    def _shade_index(self, heights, x0, y0, x1, y1):
+        """Nivel de luz (0..SHADE_LEVELS-1) de ``[y0:y1, x0:x1]``, con una celda de margen."""
+        rows, cols = heights.shape
+        top, left = max(0, y0 - 1), max(0, x0 - 1)
+        shade = hillshade(heights[top:min(rows, y1 + 1), left:min(cols, x1 + 1)], **self.light)
+        shade = shade[y0 - top:y1 - top, x0 - left:x1 - left]
+        shade *= self.SHADE_LEVELS - 1
+        return np.rint(shade, out=shade).astype(np.int32)
+
+    def _dirty_tiles(self, boxes, cols, rows):
+        """Agrupa las cajas sucias en rectángulos de celdas alineados a ``TILE``."""
+        tiles_x = -(-cols // self.TILE)
+        tiles_y = -(-rows // self.TILE)
+        marked = np.zeros((tiles_y, tiles_x), dtype=bool)
+        for x0, y0, x1, y1 in boxes:
+            x1, y1 = min(x1, cols), min(y1, rows)
+            if x0 < x1 and y0 < y1:
+                marked[y0 // self.TILE:(y1 - 1) // self.TILE + 1,
+                       x0 // self.TILE:(x1 - 1) // self.TILE + 1] = True
+        if marked.mean() > 0.5:
+            return [(0, 0, cols, rows)]
+        # Une las baldosas contiguas de cada fila en un solo rectángulo
+        regions = []
+        for ty in range(tiles_y):
+            edges = np.flatnonzero(np.diff(np.concatenate(([0], marked[ty].view(np.int8), [0]))))
+            for start, stop in zip(edges[::2], edges[1::2]):
+                regions.append((start * self.TILE, ty * self.TILE,
+                                min(cols, stop * self.TILE), min(rows, (ty + 1) * self.TILE)))
+        return regions
+
+    def draw(self, screen, heights, dest=(0, 0), dirty=None):
+        """Dibuja las alturas en ``screen`` con la esquina superior izquierda en ``dest``.
+
+        Si se pasa ``dirty`` (cajas de celdas ``(x0, y0, x1, y1)``, por ejemplo
+        de ``Terrain.take_dirty()``) solo se recolorean y copian las baldosas
+        afectadas. Devuelve los ``Rect`` de pantalla que cambiaron, listos para
+        ``pygame.display.update``.
+        """
+        heights = np.asarray(heights)
+        # Solo se colorean las celdas que caen dentro de la pantalla
+        width, height = screen.get_size()
+        cols = min(heights.shape[1], max(0, -(-(width - dest[0]) // self.grid_size)))
+        rows = min(heights.shape[0], max(0, -(-(height - dest[1]) // self.grid_size)))
+        if cols == 0 or rows == 0:
+            return []
+        if self._prepare(cols, rows) or dirty is None or self.shading != self._drawn_shading:
+            regions = [(0, 0, cols, rows)]
+        else:
+            if self.shading:
+                # La pendiente de una celda depende de sus vecinas: se repinta también el borde
+                dirty = [(max(0, x0 - 1), max(0, y0 - 1), x1 + 1, y1 + 1) for x0, y0, x1, y1 in dirty]
+            regions = self._dirty_tiles(dirty, cols, rows)
+        self._drawn_shading = self.shading
+
+        g = self.grid_size
+        pixels = pygame.surfarray.pixels2d(self._surface)
+        for x0, y0, x1, y1 in regions:
+            index = self.quantize(heights[y0:y1, x0:x1], out=self._index[y0:y1, x0:x1])
+            lut = self._lut
+            if self.shading:
+                index *= self.SHADE_LEVELS
+                index += self._shade_index(heights, x0, y0, x1, y1)
+                lut = self._shaded_lut
+            # surfarray trabaja en orden (x, y); su traspuesta es (fila, columna)
+            np.take(lut, index, out=pixels[x0:x1, y0:y1].T, mode='clip')
+        del pixels  # Libera el bloqueo de la superficie
+
+        rects = []
+        for x0, y0, x1, y1 in regions:
+            area = pygame.Rect(x0 * g, y0 * g, (x1 - x0) * g, (y1 - y0) * g)
+            if g != 1:
+                source = self._surface.subsurface((x0, y0, x1 - x0, y1 - y0))
+                pygame.transform.scale(source, area.size, self._scaled.subsurface(area))
+            rects.append(screen.blit(self._scaled, (dest[0] + area.x, dest[1] + area.y), area))
+        return rects
+
+    def restore(self, screen, rects, dest=(0, 0)):
+        """Vuelve a copiar el terreno ya pintado bajo ``rects`` (p. ej. tras borrar overlays)."""
+        if self._scaled is None:
+            return []
+        restored = []
+        for rect in rects:
+            area = pygame.Rect(rect).move(-dest[0], -dest[1]).clip(self._scaled.get_rect())
+            if area.width and area.height:
+                restored.append(screen.blit(self._scaled, (dest[0] + area.x, dest[1] + area.y), area))
+        return restored
@@ -0,0 +1,120 @@
+"""Simulación a paso fijo en un hilo aparte del renderizado."""
+import threading
+import time
+from collections import deque
+
+
+class FairLock:
+    """Candado que se concede por orden de llegada (un número por turno).
+
+    Con ``threading.Lock`` el hilo que lo suelta puede volver a tomarlo antes
+    de que despierte el que espera; el hilo de la simulación, que lo toma en
+    bucle, dejaría así a la ventana esperando varios pasos seguidos. Aquí
+    quien espera entra como mucho tras el paso en curso. No es reentrante.
+    """
+
+    def __init__(self):
+        self._turns = threading.Condition(threading.Lock())
+        self._next_ticket = 0
+        self._serving = 0
+
+    def acquire(self):
+        with self._turns:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while ticket != self._serving:
+                self._turns.wait()
+        return True
+
+    def release(self):
+        with self._turns:
+            self._serving += 1
+            self._turns.notify_all()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class SimulationScheduler:
+    """Llama a ``step()`` ``substeps`` veces cada ``timestep`` segundos en un hilo propio.
+
+    Así la velocidad de la simulación no depende de lo que tarde en dibujarse
+    cada fotograma, y una erosión pesada no congela los eventos de la ventana.
+    ``step`` se ejecuta siempre con ``lock`` tomado (un ``FairLock`` por
+    defecto): el hilo principal debe tomarlo también para modificar o leer el
+    terreno, y conviene que lo suelte antes de dibujar.
+    """
+
+    def __init__(self, step, timestep, substeps=1, lock=None, max_catch_up=5):
+        self.step = step
+        self.timestep = timestep
+        self.substeps = substeps
+        self.lock = lock if lock is not None else FairLock()
+        self.max_catch_up = max_catch_up  # Ticks atrasados que se recuperan de golpe como mucho
+        self.total_steps = 0
+        self._active = threading.Event()
+        self._stopping = threading.Event()
+        self._samples = deque(maxlen=64)  # (instante, pasos acumulados)
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._active.is_set()
+
+    def start(self):
+        """Arranca el hilo (en pausa hasta llamar a ``resume``)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='simulation', daemon=True)
+            self._thread.start()
+
+    def resume(self):
+        self._active.set()
+
+    def pause(self):
+        self._active.clear()
+
+    def stop(self):
+        """Detiene el hilo y espera a que termine el paso en curso."""
+        self._stopping.set()
+        self._active.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def steps_per_second(self):
+        """Pasos de simulación por segundo medidos en el último segundo aprox."""
+        if not self.running or len(self._samples) < 2:
+            return 0.0
+        now = time.perf_counter()
+        samples = [s for s in self._samples if now - s[0] <= 1.0]
+        if len(samples) < 2:
+            samples = list(self._samples)[-2:]
+        (t0, n0), (t1, n1) = samples[0], samples[-1]
+        return (n1 - n0) / (t1 - t0) if t1 > t0 else 0.0
+
+    def _run(self):
+        next_tick = time.perf_counter()
+        while not self._stopping.is_set():
+            if not self._active.wait(0.1):
+                next_tick = time.perf_counter()
+                continue
+            now = time.perf_counter()
+            if now < next_tick:
+                time.sleep(min(next_tick - now, 0.05))
+                continue
+
+            behind = int((now - next_tick) / self.timestep) + 1
+            ticks = min(behind, self.max_catch_up)
+            for _ in range(ticks * self.substeps):
+                if self._stopping.is_set() or not self._active.is_set():
+                    break
+                with self.lock:
+                    self.step()
+                self.total_steps += 1
+            # Si la simulación no da abasto se descarta el retraso en vez de acumularlo
+            next_tick = next_tick + ticks * self.timestep if behind <= self.max_catch_up else now
+            self._samples.append((time.perf_counter(), self.total_steps))
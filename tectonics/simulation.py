@@ -0,0 +1,107 @@
+"""Núcleo de la simulación de placas, sin dependencias de pygame.
+
+Lo usan tanto ``simuladorJordan2.py`` como el modo sin ventana
+(``python -m tectonics run``).
+"""
+import random
+
+import numpy as np
+
+from tectonics.cache import cached_noise_grid
+from tectonics.erosion import make_rng
+from tectonics.plates import PlateField
+from tectonics.terrain import Terrain
+
+NOISE_SCALE = 100.0  # Escala para el ruido Perlin
+SIMULATION_SPEED = 0.5
+PLATE_TYPES = ['oceanic', 'continental']
+
+
+class TectonicPlate:
+    """Clase para manejar las placas tectónicas (tipo y velocidad de cada una de un ``PlateField``)"""
+    def __init__(self, points, plate_type='continental'):
+        self.points = points
+        self.type = plate_type
+        self.velocity = np.array([random.uniform(-1, 1), random.uniform(-1, 1)])
+        self.velocity *= SIMULATION_SPEED
+
+    def to_state(self):
+        """Estado serializable en JSON (para los puntos de control)."""
+        return {'points': [list(p) for p in self.points], 'type': self.type,
+                'velocity': self.velocity.tolist()}
+
+    @classmethod
+    def from_state(cls, data):
+        plate = cls([tuple(p) for p in data['points']], data['type'])
+        plate.velocity = np.array(data['velocity'], dtype=float)
+        return plate
+
+
+def generate_terrain(rows, cols, scale=NOISE_SCALE, base=0, cache=None, workers=None):
+    """Genera un terreno utilizando Perlin Noise para un mapa más natural.
+
+    En mapas grandes el ruido se reparte por bandas de filas entre
+    ``workers`` procesos (ver ``tectonics.parallel``).
+    """
+    # Calculamos todo el campo de ruido de una vez en lugar de celda a celda
+    noise_values = cached_noise_grid(rows, cols, scale, octaves=6, persistence=0.5, lacunarity=2.0,
+                                     base=base, cache=cache, workers=workers)
+    noise_values *= 10  # Multiplicamos por un factor para amplificar la variabilidad
+    return Terrain(noise_values)
+
+
+def random_dividing_line(rows, cols, spacing=10):
+    """Traza una divisoria de arriba abajo que serpentea alrededor del centro."""
+    x = cols // 2
+    lines = []
+    for y in range(0, rows, spacing):
+        lines.append((x, y))
+        x = min(cols - 1, max(0, x + random.randint(-spacing // 2, spacing // 2)))
+    return lines
+
+
+def random_plate():
+    """Placa sin divisoria propia, de tipo y velocidad al azar."""
+    return TectonicPlate([], random.choice(PLATE_TYPES))
+
+
+def create_plates_from_lines(lines, shape):
+    """Convierte las líneas dibujadas en placas tectónicas
+
+    Devuelve un ``PlateField`` de filas x columnas ``shape`` con una placa
+    móvil por cada región que separan las líneas.
+    """
+    if len(lines) < 2:
+        return []
+    return PlateField.from_lines(lines, shape, random_plate)
+
+
+def create_random_plates(shape, count, rng=None):
+    """Reparte la rejilla en ``count`` placas móviles (regiones de Voronoi)."""
+    return PlateField.from_seeds(shape, count, random_plate, rng)
+
+
+def plates_to_state(plates):
+    """Estado JSON de un ``PlateField`` (o de ninguna placa)."""
+    if isinstance(plates, PlateField):
+        return {'field': plates.to_state()}
+    return []
+
+
+def plates_from_state(data, shape):
+    """Recupera el ``PlateField`` de un punto de control sobre una rejilla ``shape``.
+
+    Los puntos de control anteriores a ``PlateField`` guardaban una lista de
+    placas con la divisoria; el campo se vuelve a crear a partir de ella.
+    """
+    if isinstance(data, dict):
+        return PlateField.from_state(data['field'], TectonicPlate.from_state)
+    lines = [tuple(p) for plate in data[:1] for p in plate['points']]
+    return create_plates_from_lines(lines, shape)
+
+
+def simulate_plate_tectonics(terrain, plates, rng=None):
+    """Mueve las placas un paso y deforma sus bordes; devuelve ``(terrain, terremotos)``"""
+    if not plates:
+        return terrain, []
+    return terrain, plates.step(terrain, make_rng(rng))
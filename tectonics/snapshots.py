@@ -0,0 +1,199 @@
+"""Escritura de instantáneas en segundo plano para hacer *time-lapses*.
+
+El bucle de simulación entrega copias de las alturas a ``SnapshotWriter`` a
+través de una cola acotada y sigue; un hilo aparte las comprime y escribe
+(zlib suelta el GIL mientras comprime). Si la cola se llena, ``policy``
+decide entre esperar (``'block'``) o descartar la instantánea (``'drop'``).
+
+Formatos:
+
+* ``npy``: un ``heights_<paso>.npy`` por instantánea, como hasta ahora.
+* ``npz``: bloques ``chunk_<paso>.npz`` comprimidos de ``chunk_frames``
+  instantáneas con un índice ``index.json``; se leen con ``read_sequence``.
+* ``png``: una imagen ``frame_<paso>.png`` coloreada con ``colorize``.
+"""
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+FORMATS = ('npy', 'npz', 'png')
+POLICIES = ('block', 'drop')
+
+# Colores por altura para los PNG cuando no se da otra paleta (mar, playa, llanura, montaña)
+DEFAULT_PALETTE = [(-16, (0, 0, 139)), (0, (0, 191, 255)), (1, (238, 214, 175)),
+                   (2, (144, 238, 144)), (8, (34, 139, 34)), (12, (139, 69, 19)), (16, (255, 250, 250))]
+
+
+def default_colorize(heights):
+    """Imagen RGB (filas, columnas, 3) interpolando ``DEFAULT_PALETTE``."""
+    stops = np.array([h for h, _ in DEFAULT_PALETTE], dtype=np.float32)
+    colors = np.array([c for _, c in DEFAULT_PALETTE], dtype=np.float32)
+    image = np.empty(heights.shape + (3,), dtype=np.uint8)
+    for channel in range(3):
+        image[..., channel] = np.interp(heights, stops, colors[:, channel])
+    return image
+
+
+def encode_png(image, level=6):
+    """Codifica una imagen RGB uint8 (filas, columnas, 3) como PNG, sin dependencias."""
+    rows, cols, _ = image.shape
+    raw = np.zeros((rows, cols * 3 + 1), dtype=np.uint8)  # Byte 0 de cada fila: filtro «ninguno»
+    raw[:, 1:] = image.reshape(rows, cols * 3)
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    header = struct.pack('>IIBBBBB', cols, rows, 8, 2, 0, 0, 0)  # 8 bits, RGB
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(raw.tobytes(), level)) + chunk(b'IEND', b''))
+
+
+def read_sequence(directory):
+    """Recorre ``(paso, alturas)`` de una secuencia ``npz`` en orden."""
+    with open(os.path.join(directory, 'index.json')) as f:
+        index = json.load(f)
+    for name in index['chunks']:
+        with np.load(os.path.join(directory, name)) as data:
+            for step, frame in zip(data['steps'], data['frames']):
+                yield int(step), frame
+
+
+class SnapshotWriter:
+    """Hilo que escribe las instantáneas que recibe por una cola acotada.
+
+    ``submit`` copia el array (la simulación puede seguir modificándolo) y
+    devuelve ``False`` si la instantánea se descartó por tener la cola llena.
+    ``close`` escribe lo pendiente y espera al hilo.
+    """
+
+    def __init__(self, directory, format='npy', max_queue=8, policy='block', chunk_frames=16,
+                 colorize=None):
+        if format not in FORMATS:
+            raise ValueError(f"formato desconocido {format!r}, se esperaba uno de {FORMATS}")
+        if policy not in POLICIES:
+            raise ValueError(f"política desconocida {policy!r}, se esperaba una de {POLICIES}")
+        self.directory = directory
+        self.format = format
+        self.policy = policy
+        self.chunk_frames = chunk_frames
+        self.colorize = colorize or default_colorize
+        os.makedirs(directory, exist_ok=True)
+
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.bytes_written = 0
+        self.busy_seconds = 0.0  # Tiempo del hilo escribiendo (no esperando)
+        self.max_backlog = 0
+        self.error = None
+        self._started = time.perf_counter()
+        self._pending = []  # Instantáneas del bloque npz en curso
+        self._chunks = []
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name='snapshot-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, step, heights):
+        """Encola una copia de ``heights`` (``Terrain`` o ndarray) para el paso ``step``."""
+        if self.error is not None:
+            raise RuntimeError("el escritor de instantáneas falló") from self.error
+        item = (int(step), np.array(heights, dtype=np.float32, copy=True))
+        self.submitted += 1
+        if self.policy == 'block':
+            self._queue.put(item)
+        else:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self.dropped += 1
+                return False
+        self.max_backlog = max(self.max_backlog, self._queue.qsize())
+        return True
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if self.error is None:
+                    start = time.perf_counter()
+                    if item is None:
+                        self._flush_chunk()
+                    else:
+                        self._write(*item)
+                    self.busy_seconds += time.perf_counter() - start
+                if item is None:
+                    return
+            except Exception as exc:  # Se informa en el siguiente submit/close
+                self.error = exc
+            finally:
+                self._queue.task_done()
+
+    def _write(self, step, heights):
+        if self.format == 'npy':
+            path = os.path.join(self.directory, f"heights_{step:08d}.npy")
+            np.save(path, heights)
+            self.bytes_written += os.path.getsize(path)
+        elif self.format == 'png':
+            data = encode_png(self.colorize(heights))
+            with open(os.path.join(self.directory, f"frame_{step:08d}.png"), 'wb') as f:
+                f.write(data)
+            self.bytes_written += len(data)
+        else:
+            self._pending.append((step, heights))
+            if len(self._pending) >= self.chunk_frames:
+                self._flush_chunk()
+            return  # Se cuentan como escritas al cerrar el bloque
+        self.written += 1
+
+    def _flush_chunk(self):
+        """Escribe el bloque npz en curso y actualiza ``index.json``."""
+        if not self._pending:
+            return
+        name = f"chunk_{self._pending[0][0]:08d}.npz"
+        path = os.path.join(self.directory, name)
+        np.savez_compressed(path, steps=np.array([s for s, _ in self._pending], dtype=np.int64),
+                            frames=np.stack([h for _, h in self._pending]))
+        self.bytes_written += os.path.getsize(path)
+        self.written += len(self._pending)
+        shape = self._pending[0][1].shape
+        self._pending = []
+        self._chunks.append(name)
+        index = {'format': 'npz', 'shape': list(shape), 'dtype': 'float32',
+                 'chunk_frames': self.chunk_frames, 'chunks': self._chunks}
+        tmp = os.path.join(self.directory, 'index.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp, os.path.join(self.directory, 'index.json'))
+
+    def stats(self):
+        """Contadores y rendimiento: instantáneas/s y MB/s del hilo mientras escribe."""
+        busy = self.busy_seconds
+        return {
+            'submitted': self.submitted, 'written': self.written, 'dropped': self.dropped,
+            'queued': self._queue.qsize(), 'max_backlog': self.max_backlog,
+            'bytes': self.bytes_written,
+            'frames_per_s': self.written / busy if busy > 0 else 0.0,
+            'mb_per_s': self.bytes_written / busy / 1e6 if busy > 0 else 0.0,
+            'elapsed_s': time.perf_counter() - self._started,
+        }
+
+    def close(self):
+        """Escribe lo pendiente y termina el hilo; devuelve ``stats()``."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if self.error is not None:
+            raise RuntimeError("el escritor de instantáneas falló") from self.error
+        return self.stats()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
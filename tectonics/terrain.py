@@ -0,0 +1,124 @@
+"""Almacenamiento compartido del terreno como array float32 contiguo."""
+import numpy as np
+
+
+class Terrain:
+    """Rejilla de alturas respaldada por un ``ndarray`` float32 contiguo.
+
+    Sustituye a la lista de listas de floats: ocupa 4 bytes por celda y admite
+    tanto el acceso clásico ``terrain[y][x]`` como ``terrain[y, x]`` o cortes
+    ``terrain[y0:y1, x0:x1]``. ``np.asarray(terrain)`` devuelve el array sin
+    copiarlo, así que las funciones vectorizadas trabajan directamente sobre él.
+
+    Las funciones que modifican alturas anotan la caja que tocan con
+    ``mark_dirty`` para que el renderizado solo repinte esas zonas.
+    """
+
+    dtype = np.float32
+    max_dirty = 256  # Con más cajas pendientes se repinta todo (p. ej. un bloque que nadie dibuja)
+
+    def __init__(self, heights):
+        self.heights = np.ascontiguousarray(heights, dtype=self.dtype)
+        self._dirty = [(0, 0, self.cols, self.rows)]  # Un terreno nuevo se pinta entero
+
+    @classmethod
+    def zeros(cls, rows, cols):
+        """Crea un terreno plano al nivel del mar."""
+        return cls(np.zeros((rows, cols), dtype=cls.dtype))
+
+    @property
+    def shape(self):
+        return self.heights.shape
+
+    @property
+    def rows(self):
+        return self.heights.shape[0]
+
+    @property
+    def cols(self):
+        return self.heights.shape[1]
+
+    @property
+    def nbytes(self):
+        return self.heights.nbytes
+
+    def mark_dirty(self, x0, y0, x1, y1):
+        """Anota que cambiaron las celdas ``[y0:y1, x0:x1]`` (extremos exclusivos)."""
+        x0, y0 = max(0, int(x0)), max(0, int(y0))
+        x1, y1 = min(self.cols, int(x1)), min(self.rows, int(y1))
+        if x0 < x1 and y0 < y1:
+            if len(self._dirty) >= self.max_dirty:
+                self.mark_all_dirty()
+            else:
+                self._dirty.append((x0, y0, x1, y1))
+
+    def mark_changed(self, before, tile=32):
+        """Anota las baldosas de ``tile`` x ``tile`` celdas que difieren de ``before``.
+
+        ``before`` es una copia de las alturas tomada antes de modificarlas;
+        sirve para pasos que tocan muchas celdas sueltas (como la erosión).
+        """
+        self.mark_mask(np.not_equal(before, self.heights), tile)
+
+    def mark_mask(self, changed, tile=32):
+        """Anota las baldosas de ``tile`` x ``tile`` celdas con alguna celda ``True`` en ``changed``."""
+        # Primero por columnas: reduceat sobre el eje contiguo es mucho más rápido
+        tiles = np.logical_or.reduceat(changed, np.arange(0, self.cols, tile), axis=1)
+        tiles = np.logical_or.reduceat(tiles, np.arange(0, self.rows, tile), axis=0)
+        self._mark_tiles(tiles, tile)
+
+    def mark_cells(self, cells, tile=32):
+        """Anota las baldosas de ``tile`` x ``tile`` que contienen los índices planos ``cells``."""
+        cells = np.asarray(cells)
+        if len(cells) * 8 > self.heights.size:
+            # Muchas celdas: sale más barato pasar por una máscara que dividir
+            changed = np.zeros(self.heights.size, dtype=bool)
+            changed[cells] = True
+            self.mark_mask(changed.reshape(self.shape), tile)
+            return
+        tiles_y, tiles_x = -(-self.rows // tile), -(-self.cols // tile)
+        ys, xs = np.divmod(cells, self.cols)
+        hits = np.bincount((ys // tile) * tiles_x + xs // tile, minlength=tiles_y * tiles_x)
+        self._mark_tiles(hits.reshape(tiles_y, tiles_x) > 0, tile)
+
+    def _mark_tiles(self, tiles, tile):
+        # Una caja por tramo de baldosas seguidas de cada fila, no una por baldosa
+        edges = np.diff(tiles.astype(np.int8), axis=1, prepend=0, append=0)
+        rows, starts = np.nonzero(edges == 1)
+        _, stops = np.nonzero(edges == -1)
+        if len(self._dirty) + len(rows) > self.max_dirty:
+            self.mark_all_dirty()
+            return
+        for ty, start, stop in zip(rows.tolist(), starts.tolist(), stops.tolist()):
+            self.mark_dirty(start * tile, ty * tile, stop * tile, (ty + 1) * tile)
+
+    def mark_all_dirty(self):
+        self._dirty = [(0, 0, self.cols, self.rows)]
+
+    def take_dirty(self):
+        """Devuelve las cajas ``(x0, y0, x1, y1)`` modificadas desde la última llamada."""
+        dirty, self._dirty = self._dirty, []
+        return dirty
+
+    def copy(self):
+        return Terrain(self.heights.copy())
+
+    def __getitem__(self, key):
+        return self.heights[key]
+
+    def __setitem__(self, key, value):
+        self.heights[key] = value
+
+    def __len__(self):
+        return self.heights.shape[0]
+
+    def __iter__(self):
+        return iter(self.heights)
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is not None and np.dtype(dtype) != self.heights.dtype:
+            return self.heights.astype(dtype)
+        return self.heights.copy() if copy else self.heights
+
+    def __repr__(self):
+        return f"Terrain(rows={self.rows}, cols={self.cols})"
@@ -0,0 +1,220 @@
+"""Mundo dividido en bloques (chunks) que se generan al visitarlos.
+
+Solo se mantienen en memoria los bloques usados más recientemente; el resto
+se vuelve a generar a partir del ruido (que es determinista) o, si se
+habían modificado, se guardan en disco y se recargan al volver a ellos.
+Los bloques a la vista se simulan en cada tick y los demás cargados cada
+pocos ticks; los que no están en memoria quedan congelados.
+"""
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+from tectonics.terrain import Terrain
+
+CHUNK_SIZE = 256  # Lado de cada bloque en celdas
+
+
+class Camera:
+    """Ventana de ``cols`` x ``rows`` celdas sobre el mundo, con esquina en ``(x, y)``."""
+
+    def __init__(self, cols, rows, x=0, y=0):
+        self.cols = cols
+        self.rows = rows
+        self.x = x
+        self.y = y
+
+    def move(self, dx, dy):
+        self.x += dx
+        self.y += dy
+
+    @property
+    def bounds(self):
+        """Caja ``(x0, y0, x1, y1)`` de celdas visibles (extremos exclusivos)."""
+        return self.x, self.y, self.x + self.cols, self.y + self.rows
+
+
+class ChunkedWorld:
+    """Terreno de tamaño ilimitado formado por bloques ``Terrain`` de ``chunk_size``².
+
+    ``generate(x0, y0, cols, rows)`` crea las alturas de un bloque a partir de
+    su esquina global. Como mucho se guardan ``max_chunks`` bloques; al
+    superarlo se descarta el menos usado. Los bloques pedidos con
+    ``write=True`` se consideran modificados y antes de descartarse se
+    vuelcan a ``spill_dir`` (una carpeta temporal si no se indica); ``close``
+    (o salir de un ``with``) borra esos volcados.
+    """
+
+    def __init__(self, generate, chunk_size=CHUNK_SIZE, max_chunks=64, spill_dir=None):
+        self.generate = generate
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.spill_dir = spill_dir
+        self._own_spill_dir = False  # La carpeta temporal la creó el mundo y la borra al cerrar
+        self.ticks = 0
+        self._chunks = OrderedDict()  # (cx, cy) -> Terrain, del menos al más usado
+        self._modified = set()
+        self._spilled = set()
+
+    def __len__(self):
+        return len(self._chunks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Borra los bloques volcados a disco (y la carpeta temporal si la creó el mundo)."""
+        if self._own_spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            self.spill_dir = None
+            self._own_spill_dir = False
+        else:
+            for key in self._spilled:
+                try:
+                    os.remove(self._spill_path(*key))
+                except FileNotFoundError:
+                    pass
+        self._spilled.clear()
+
+    @property
+    def nbytes(self):
+        """Memoria que ocupan los bloques cargados."""
+        return sum(chunk.nbytes for chunk in self._chunks.values())
+
+    def chunk_of(self, x, y):
+        """Bloque que contiene la celda global ``(x, y)``."""
+        return x // self.chunk_size, y // self.chunk_size
+
+    def chunk(self, cx, cy, write=False):
+        """Devuelve el bloque ``(cx, cy)``, generándolo o recargándolo si hace falta."""
+        key = (cx, cy)
+        chunk = self._chunks.get(key)
+        if chunk is None:
+            chunk = self._load(cx, cy)
+            self._chunks[key] = chunk
+            self._evict()
+        else:
+            self._chunks.move_to_end(key)
+        if write:
+            self._modified.add(key)
+        return chunk
+
+    def chunks_in(self, x0, y0, x1, y1):
+        """Coordenadas de los bloques que cortan la caja de celdas ``[x0:x1, y0:y1]``."""
+        if x1 <= x0 or y1 <= y0:
+            return []
+        cx0, cy0 = self.chunk_of(x0, y0)
+        cx1, cy1 = self.chunk_of(x1 - 1, y1 - 1)
+        return [(cx, cy) for cy in range(cy0, cy1 + 1) for cx in range(cx0, cx1 + 1)]
+
+    def visible(self, camera, margin=0, write=False):
+        """Bloques ``(cx, cy, Terrain)`` que cortan la cámara ampliada en ``margin`` celdas.
+
+        Es el conjunto que ``step`` simula a ritmo completo.
+        """
+        x0, y0, x1, y1 = camera.bounds
+        keys = self.chunks_in(x0 - margin, y0 - margin, x1 + margin, y1 + margin)
+        return [(cx, cy, self.chunk(cx, cy, write)) for cx, cy in keys]
+
+    def step(self, camera, step_chunk, margin=0, offscreen_every=8):
+        """Avanza un tick llamando a ``step_chunk(terrain, ticks, padded)`` en cada bloque que toca.
+
+        ``padded`` son las alturas del bloque con un borde de una celda copiado
+        de los bloques vecinos que están en memoria (``NaN`` si no lo están),
+        como espera ``erosion.erode_padded``; todos los bordes se copian antes
+        de simular ninguno, así que el material cruza las costuras igual que
+        dentro de un bloque. Los bloques visibles se simulan siempre
+        (``ticks=1``); los demás que siguen en memoria, uno de cada
+        ``offscreen_every`` ticks, repartidos para no juntarlos todos en el
+        mismo, y con ``ticks=offscreen_every`` para que avancen lo mismo.
+        Todos quedan como modificados, así que al salir de la memoria se
+        vuelcan a disco. Devuelve cuántos se simularon.
+        """
+        self.ticks += 1
+        due = [(cx, cy, chunk, 1) for cx, cy, chunk in self.visible(camera, margin, write=True)]
+        if offscreen_every:
+            seen = {(cx, cy) for cx, cy, _, _ in due}
+            # Sin pasar por ``chunk``: simularlos no cuenta como usarlos para el LRU
+            for key, chunk in list(self._chunks.items()):
+                if key not in seen and (self.ticks + key[0] + 3 * key[1]) % offscreen_every == 0:
+                    self._modified.add(key)
+                    due.append((key[0], key[1], chunk, offscreen_every))
+        padded = [self.padded(cx, cy) for cx, cy, _, _ in due]
+        for (_, _, chunk, ticks), block in zip(due, padded):
+            step_chunk(chunk, ticks, block)
+        return len(due)
+
+    def padded(self, cx, cy):
+        """Alturas del bloque ``(cx, cy)`` con un borde de una celda de sus vecinos en memoria."""
+        size = self.chunk_size
+        out = np.full((size + 2, size + 2), np.nan, dtype=Terrain.dtype)
+        out[1:-1, 1:-1] = self._chunks[(cx, cy)].heights
+        for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1)):  # La erosión solo mira vecinos ortogonales
+            neighbour = self._chunks.get((cx + dx, cy + dy))
+            if neighbour is None:
+                continue
+            # Fila o columna del vecino que toca este bloque, colocada en el borde
+            src_y = {-1: slice(size - 1, size), 0: slice(None), 1: slice(0, 1)}[dy]
+            src_x = {-1: slice(size - 1, size), 0: slice(None), 1: slice(0, 1)}[dx]
+            dst_y = {-1: slice(0, 1), 0: slice(1, -1), 1: slice(size + 1, size + 2)}[dy]
+            dst_x = {-1: slice(0, 1), 0: slice(1, -1), 1: slice(size + 1, size + 2)}[dx]
+            out[dst_y, dst_x] = neighbour.heights[src_y, src_x]
+        return out
+
+    def read(self, x0, y0, x1, y1, out=None):
+        """Copia las alturas de la caja ``[y0:y1, x0:x1]`` a un array (filas, columnas)."""
+        if out is None:
+            out = np.empty((y1 - y0, x1 - x0), dtype=Terrain.dtype)
+        size = self.chunk_size
+        for cx, cy in self.chunks_in(x0, y0, x1, y1):
+            chunk = self.chunk(cx, cy)
+            # Intersección del bloque con la caja pedida, en coordenadas globales
+            gx0, gy0 = max(x0, cx * size), max(y0, cy * size)
+            gx1, gy1 = min(x1, (cx + 1) * size), min(y1, (cy + 1) * size)
+            out[gy0 - y0:gy1 - y0, gx0 - x0:gx1 - x0] = \
+                chunk[gy0 - cy * size:gy1 - cy * size, gx0 - cx * size:gx1 - cx * size]
+        return out
+
+    def dirty_in(self, x0, y0, x1, y1):
+        """Cajas modificadas de los bloques cargados, relativas a la esquina ``(x0, y0)``.
+
+        Consume las marcas de ``Terrain.take_dirty()`` de esos bloques.
+        """
+        size = self.chunk_size
+        boxes = []
+        for key in self.chunks_in(x0, y0, x1, y1):
+            chunk = self._chunks.get(key)
+            if chunk is None:
+                continue
+            ox, oy = key[0] * size - x0, key[1] * size - y0
+            for bx0, by0, bx1, by1 in chunk.take_dirty():
+                boxes.append((max(0, bx0 + ox), max(0, by0 + oy),
+                              min(x1 - x0, bx1 + ox), min(y1 - y0, by1 + oy)))
+        return boxes
+
+    def _spill_path(self, cx, cy):
+        return os.path.join(self.spill_dir, f"chunk_{cx}_{cy}.npy")
+
+    def _load(self, cx, cy):
+        if (cx, cy) in self._spilled:
+            self._modified.add((cx, cy))  # Sigue difiriendo del ruido original
+            return Terrain(np.load(self._spill_path(cx, cy)))
+        size = self.chunk_size
+        return Terrain(self.generate(cx * size, cy * size, size, size))
+
+    def _evict(self):
+        while len(self._chunks) > self.max_chunks:
+            key, chunk = self._chunks.popitem(last=False)
+            if key in self._modified:
+                if self.spill_dir is None:
+                    self.spill_dir = tempfile.mkdtemp(prefix='tectonics_chunks_')
+                    self._own_spill_dir = True
+                np.save(self._spill_path(*key), chunk.heights)
+                self._modified.discard(key)
+                self._spilled.add(key)
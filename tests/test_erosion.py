@@ -0,0 +1,51 @@
+import numpy as np
+
+from benchmarks.bench_erosion import apply_erosion_scalar, erosion_jacobi_scalar
+from tectonics.erosion import apply_erosion, erode_padded
+from tectonics.perlin import noise_grid
+
+RATE = 0.01
+# float32 frente a los bucles en float64, con alturas de hasta ~40
+TOLERANCE = 1e-5
+
+
+def sample(rows, cols, relief, seed=0):
+    heights = noise_grid(rows, cols, 25.0, octaves=6, persistence=0.5, lacunarity=2.0) * relief
+    noise = np.random.default_rng(seed).random((rows, cols), dtype=np.float32)
+    return heights, noise
+
+
+def vectorized(heights, noise):
+    return erode_padded(np.pad(heights, 1, constant_values=np.nan), np.pad(noise, 1), RATE)
+
+
+def test_matches_original_loop_without_steep_slopes():
+    # Sin pendientes mayores que 1 el orden de actualización no importa
+    heights, noise = sample(32, 32, relief=10)
+    expected = apply_erosion_scalar(heights.astype(np.float64).tolist(), RATE, noise.tolist())
+    assert np.abs(vectorized(heights, noise) - np.array(expected)).max() <= TOLERANCE
+
+
+def test_matches_start_of_step_reference_with_steep_slopes():
+    # Con pendientes pronunciadas el orden cambia a propósito (ver tectonics.erosion):
+    # se compara con el bucle que lee el estado del principio del paso
+    for rows, cols in [(8, 8), (16, 24), (32, 32)]:
+        heights, noise = sample(rows, cols, relief=40)
+        expected = erosion_jacobi_scalar(heights.astype(np.float64).tolist(), RATE, noise.tolist())
+        assert np.abs(vectorized(heights, noise) - np.array(expected)).max() <= TOLERANCE
+
+
+def test_fixed_seed_is_reproducible():
+    a, _ = sample(64, 64, relief=10)
+    b = a.copy()
+    apply_erosion(a, RATE, rng=7)
+    apply_erosion(b, RATE, rng=7)
+    assert np.array_equal(a, b)
+
+
+def test_changed_mask_matches_the_cells_that_moved():
+    heights, _ = sample(64, 64, relief=40)
+    before = heights.copy()
+    changed = np.empty(heights.shape, dtype=bool)
+    apply_erosion(heights, RATE, rng=3, changed=changed)
+    assert np.array_equal(changed, before != heights)
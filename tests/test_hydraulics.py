@@ -0,0 +1,49 @@
+import numpy as np
+
+from tectonics.hydraulics import HydraulicErosion
+from tectonics.perlin import noise_grid
+
+# Deriva permitida de la masa total (terreno + sedimento), relativa a la masa
+# en valor absoluto: es solo el redondeo de float32 en 1000 iteraciones
+MASS_TOLERANCE = 1e-6
+
+
+def sample_heights(sea):
+    heights = noise_grid(128, 128, 25.0, octaves=4, persistence=0.5, lacunarity=2.0) * 10
+    if not sea:
+        heights -= heights.min() - 0.5  # Todo tierra: no hay sumideros
+    return heights.astype(np.float32)
+
+
+def total_mass(heights, hydraulics):
+    return heights.sum(dtype=np.float64) + hydraulics.sediment.sum(dtype=np.float64)
+
+
+def test_mass_is_conserved_on_land():
+    heights = sample_heights(sea=False)
+    hydraulics = HydraulicErosion(heights.shape)
+    before = total_mass(heights, hydraulics)
+    hydraulics.run(heights, 1000)
+    assert hydraulics.sediment.max() > 0  # Hubo erosión de verdad
+    assert abs(total_mass(heights, hydraulics) - before) <= MASS_TOLERANCE * np.abs(heights).sum()
+
+
+def test_mass_is_conserved_with_sea():
+    heights = sample_heights(sea=True)
+    hydraulics = HydraulicErosion(heights.shape)
+    before = total_mass(heights, hydraulics)
+    hydraulics.run(heights, 1000)
+    assert abs(total_mass(heights, hydraulics) - before) <= MASS_TOLERANCE * np.abs(heights).sum()
+
+
+def test_sediment_stays_where_no_water_flows():
+    heights = sample_heights(sea=False)
+    hydraulics = HydraulicErosion(heights.shape, rain=0)
+    hydraulics.sediment[40:60, 40:60] = 1.0
+    before = total_mass(heights, hydraulics)
+    hydraulics.step(heights)
+    # Sin agua no hay flujo: el sedimento se deposita donde estaba y no aparece en otras celdas
+    outside = np.ones(heights.shape, dtype=bool)
+    outside[40:60, 40:60] = False
+    assert hydraulics.sediment[outside].max() == 0
+    assert abs(total_mass(heights, hydraulics) - before) <= MASS_TOLERANCE * np.abs(heights).sum()
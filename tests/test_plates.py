@@ -0,0 +1,74 @@
+import random
+
+import numpy as np
+
+from tectonics.plates import COLLISION_RADIUS, MOTION_SCALE, PlateField
+from tectonics.simulation import (TectonicPlate, create_plates_from_lines, generate_terrain,
+                                  random_dividing_line)
+from tectonics.terrain import Terrain
+
+
+def make_plate(plate_type, velocity):
+    plate = TectonicPlate([], plate_type)
+    plate.velocity = np.array(velocity, dtype=float)
+    return plate
+
+
+def island_field(rows=60, cols=80):
+    """Un continente cuadrado (id 1) que cruza hacia la derecha un océano (id 0)."""
+    labels = np.ones((rows, cols), dtype=np.int32)
+    labels[20:40, 20:40] = 2
+    ocean = make_plate('oceanic', (0, 0))
+    island = make_plate('continental', (1 / MOTION_SCALE, 0))
+    plates = iter([ocean, island])
+    return PlateField.from_regions(labels, 2, lambda: next(plates))
+
+
+def test_dividing_line_plates_keep_their_area():
+    random.seed(5)
+    rows, cols = 300, 400
+    terrain = generate_terrain(rows, cols)
+    plates = create_plates_from_lines(random_dividing_line(rows, cols), (rows, cols))
+    start = np.bincount(plates.ids.ravel(), minlength=2)
+    rng = np.random.default_rng(5)
+    for _ in range(2000):
+        plates.step(terrain, rng)
+    areas = np.bincount(plates.ids.ravel(), minlength=len(plates))
+    # Ninguna placa se traga a la otra: cada celda sigue teniendo una sola dueña
+    assert areas.sum() == rows * cols
+    assert np.all(np.abs(areas - start) < 0.1 * start)
+
+
+def test_advect_conserves_terrain_away_from_edges():
+    field = island_field()
+    heights = np.full(field.shape, -0.5, dtype=np.float32)
+    heights[20:40, 20:40] = np.linspace(0.5, 3.0, 400, dtype=np.float32).reshape(20, 20)
+    island = heights[20:40, 20:40].copy()
+    land = np.maximum(heights, 0).sum(dtype=np.float64)
+    for _ in range(15):
+        field.advect(heights)
+    # El continente avanza intacto sin tocar el borde del mapa; el hueco que
+    # deja detrás es corteza nueva (fondo oceánico)
+    ys, xs = np.nonzero(heights > 0)
+    assert len(ys) == 400 and np.all(field.ids[ys, xs] == 1)
+    assert ys.min() == 20 and xs.min() > 20 and xs.max() < field.shape[1] - 1
+    np.testing.assert_array_equal(heights[20:40, xs.min():xs.min() + 20], island)
+    assert np.maximum(heights, 0).sum(dtype=np.float64) == land
+
+
+def test_oceanic_crust_subducts_under_continental():
+    rows, cols = 40, 40
+    labels = np.ones((rows, cols), dtype=np.int32)
+    labels[:, cols // 2:] = 2
+    plates = iter([make_plate('continental', (0.5, 0)), make_plate('oceanic', (-0.5, 0))])
+    field = PlateField.from_regions(labels, 2, lambda: next(plates))
+    terrain = Terrain(np.zeros((rows, cols)))
+    rng = np.random.default_rng(0)
+    for _ in range(30):  # Aún no avanzan una celda: solo se deforma la zona de choque
+        field.step(terrain, rng)
+    border = cols // 2
+    assert terrain[:, border - COLLISION_RADIUS - 1:border].mean() > 0  # El continente se eleva
+    assert terrain[:, border:border + COLLISION_RADIUS + 1].mean() < 0  # El océano se hunde
+    # Fuera de la zona de choque el terreno no cambia
+    assert not terrain[:, :border - COLLISION_RADIUS - 1].any()
+    assert not terrain[:, border + COLLISION_RADIUS + 1:].any()